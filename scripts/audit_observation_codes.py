@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Audit FHIR Observation Archives Against the NLK Codebook
+
+Scans a directory of FHIR Observation files (NDJSON, gzipped NDJSON, or JSON
+Bundles/resources), extracts `Observation.code.coding` entries for the NLK
+system, and checks them against the codebook at the observation's effective
+date. Files are processed in parallel, one file per worker process, and read
+incrementally so no file is loaded into memory as a whole.
+
+The NLK system URLs are taken from the IG: the CodeSystem `^url` values in
+input/fsh and the canonical in sushi-config.yaml, plus the known NLK URLs.
+
+Outputs:
+  - a JSON report with aggregated counts and per-file counts
+  - optionally an NDJSON file with one finding per unknown/retired/not-yet-valid coding
+
+Usage:
+  python audit_observation_codes.py <archive_dir> [--report audit.json] [--findings findings.ndjson]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, TextIO, Tuple
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_batch_validation import DEFAULT_CSV, STATUSES, VALID, NLKBatchValidator, summarize
+from nlk_code_index import NLK_SYSTEM_URLS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_IG_DIR = "../nlk-test"
+FILE_PATTERNS = ('*.ndjson', '*.ndjson.gz', '*.json')
+BATCH_SIZE = 50000
+READ_SIZE = 1 << 20
+
+
+def load_nlk_system_urls(ig_dir: str) -> Set[str]:
+    """Collect NLK CodeSystem URLs from the IG's FSH files and sushi-config.yaml."""
+    urls = set(NLK_SYSTEM_URLS)
+    ig_path = Path(ig_dir)
+
+    for fsh_file in (ig_path / 'input' / 'fsh').rglob('*.fsh'):
+        with open(fsh_file, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f):
+                match = re.match(r'^\* \^url = "([^"]+)"', line)
+                if match:
+                    urls.add(match.group(1))
+                if line_num > 100:
+                    break
+
+    sushi_config = ig_path / 'sushi-config.yaml'
+    if sushi_config.exists():
+        match = re.search(r'^canonical:\s*(\S+)', sushi_config.read_text(encoding='utf-8'), re.MULTILINE)
+        if match:
+            urls.add(f"{match.group(1).rstrip('/')}/CodeSystem/norsk-laboratoriekodeverk")
+
+    return urls
+
+
+def _open_text(path: Path) -> TextIO:
+    """Open a text file, decompressing .gz files on the fly."""
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def _iter_ndjson_resources(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, resource) from an NDJSON file."""
+    with _open_text(path) as f:
+        for line_num, line in enumerate(f, 1):
+            if line.strip():
+                yield line_num, json.loads(line)
+
+
+def _iter_json_resources(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield (entry number, resource) from a JSON Bundle without loading it whole.
+
+    The file is read in blocks; each element of the top-level "entry" array is
+    decoded on its own. A file that is a single (non-Bundle) resource is
+    decoded as one object.
+    """
+    decoder = json.JSONDecoder()
+    entry_start = re.compile(r'"entry"\s*:\s*\[')
+    separators = re.compile(r'[\s,]*')
+
+    with _open_text(path) as f:
+        buffer = f.read(READ_SIZE)
+
+        # Find the entry array, reading further blocks until it appears
+        match = entry_start.search(buffer)
+        while match is None:
+            block = f.read(READ_SIZE)
+            if not block:
+                # Not a Bundle with entries: a single resource (or an empty Bundle)
+                resource = json.loads(buffer)
+                if resource.get('resourceType') != 'Bundle':
+                    yield 1, resource
+                return
+            search_from = max(0, len(buffer) - 64)
+            buffer += block
+            match = entry_start.search(buffer, search_from)
+
+        # Decode entries in place from an offset; the buffer is only
+        # compacted when the next block is appended
+        pos = match.end()
+        entry_num = 0
+        eof = False
+
+        while True:
+            pos = separators.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+
+            try:
+                entry, pos_after = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                block = f.read(READ_SIZE)
+                eof = not block
+                buffer = buffer[pos:] + block
+                pos = 0
+                continue
+
+            entry_num += 1
+            pos = pos_after
+            resource = entry.get('resource') if isinstance(entry, dict) else None
+            if resource:
+                yield entry_num, resource
+
+
+def iter_resources(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (position, resource) from an archive file, expanding NDJSON Bundles."""
+    name = path.name
+    source = _iter_ndjson_resources(path) if name.endswith(('.ndjson', '.ndjson.gz')) else _iter_json_resources(path)
+
+    for position, resource in source:
+        if resource.get('resourceType') == 'Bundle':
+            for entry in resource.get('entry', []):
+                if entry.get('resource'):
+                    yield position, entry['resource']
+        else:
+            yield position, resource
+
+
+def observation_date(resource: Dict[str, Any]) -> Optional[str]:
+    """Get the clinically relevant date of an Observation."""
+    return (
+        resource.get('effectiveDateTime')
+        or (resource.get('effectivePeriod') or {}).get('start')
+        or resource.get('effectiveInstant')
+        or resource.get('issued')
+    )
+
+
+# ----------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------
+
+_worker_validator: Optional[NLKBatchValidator] = None
+_worker_systems: Set[str] = set()
+
+
+def _init_worker(validator: NLKBatchValidator, systems: Set[str]) -> None:
+    """Process pool initializer: keep the validator and system URLs per worker."""
+    global _worker_validator, _worker_systems
+    _worker_validator = validator
+    _worker_systems = systems
+
+
+def audit_file(path: str, findings_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Audit one archive file.
+
+    Args:
+        path: NDJSON or JSON file
+        findings_path: Optional NDJSON file for this file's findings
+
+    Returns:
+        dict: Per-file counts (observations, NLK codings, classifications, errors)
+    """
+    file_path = Path(path)
+    counts = {'observations': 0, 'nlk_codings': 0, 'missing_date': 0, 'errors': 0}
+    status_counts = dict.fromkeys(STATUSES, 0)
+    problem_codes: Counter = Counter()
+
+    batch: List[Tuple[int, Optional[str], str, Optional[str]]] = []
+    findings_file = open(findings_path, 'w', encoding='utf-8') if findings_path else None
+
+    def flush() -> None:
+        if not batch:
+            return
+        positions, ids, codes, dates = zip(*batch)
+        result = _worker_validator.validate_batch(list(codes), list(dates))
+
+        for name, count in summarize(result['status']).items():
+            status_counts[name] += count
+
+        for i in (result['status'] != VALID).nonzero()[0]:
+            status = STATUSES[result['status'][i]]
+            problem_codes[(codes[i], status)] += 1
+            if findings_file:
+                findings_file.write(json.dumps({
+                    'file': str(file_path), 'position': positions[i], 'id': ids[i],
+                    'code': codes[i], 'date': dates[i], 'status': status,
+                    'replacedBy': result['replaced_by'][i]
+                }, ensure_ascii=False) + '\n')
+        batch.clear()
+
+    try:
+        try:
+            for position, resource in iter_resources(file_path):
+                if resource.get('resourceType') != 'Observation':
+                    continue
+                counts['observations'] += 1
+
+                date = observation_date(resource)
+                for coding in (resource.get('code') or {}).get('coding', []):
+                    if coding.get('system') not in _worker_systems or not coding.get('code'):
+                        continue
+                    counts['nlk_codings'] += 1
+                    if date is None:
+                        counts['missing_date'] += 1
+                    batch.append((position, resource.get('id'), coding['code'], date))
+
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+        except (ValueError, OSError) as e:
+            logger.warning(f"Error reading {file_path}: {e}")
+            counts['errors'] += 1
+
+        # Codings read before an error are already counted, so classify them too
+        flush()
+    finally:
+        if findings_file:
+            findings_file.close()
+
+    return {
+        'file': str(file_path),
+        **counts,
+        'status': status_counts,
+        'problem_codes': [
+            {'code': code, 'status': status, 'count': count}
+            for (code, status), count in problem_codes.most_common()
+        ]
+    }
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+
+def find_archive_files(directory: str, exclude: Sequence[str] = ()) -> List[Path]:
+    """
+    List archive files in a directory tree, in a stable order.
+
+    Args:
+        directory: Archive directory
+        exclude: Files to leave out, e.g. this tool's own report and findings
+                 files when they are written into the archive directory
+    """
+    excluded = {Path(path).resolve() for path in exclude if path}
+    files: Set[Path] = set()
+    for pattern in FILE_PATTERNS:
+        files.update(path for path in Path(directory).rglob(pattern) if path.resolve() not in excluded)
+    return sorted(files)
+
+
+def audit_directory(directory: str, validator: NLKBatchValidator, systems: Set[str],
+                    workers: int = 1, findings_path: Optional[str] = None,
+                    exclude: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Audit all archive files in a directory, one file per worker process.
+
+    The findings file and any paths in exclude are never audited themselves.
+
+    Returns:
+        dict: Report with aggregated summary and per-file results
+    """
+    files = find_archive_files(directory, [*exclude, findings_path])
+    part_paths = [f"{findings_path}.part{i}" if findings_path else None for i in range(len(files))]
+    logger.info(f"Auditing {len(files):,} files with {workers} workers")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(files)
+
+    if workers <= 1:
+        _init_worker(validator, systems)
+        for i, (path, part) in enumerate(zip(files, part_paths)):
+            results[i] = audit_file(str(path), part)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(validator, systems)) as executor:
+            futures = {executor.submit(audit_file, str(path), part): i
+                       for i, (path, part) in enumerate(zip(files, part_paths))}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                logger.info(f"Audited {results[futures[future]]['file']}")
+
+    if findings_path:
+        with open(findings_path, 'wb') as out:
+            for part in part_paths:
+                if Path(part).exists():
+                    with open(part, 'rb') as f:
+                        out.write(f.read())
+                    os.remove(part)
+
+    summary = {'files': len(files), 'observations': 0, 'nlk_codings': 0, 'missing_date': 0, 'errors': 0}
+    status_totals = dict.fromkeys(STATUSES, 0)
+    problem_totals: Counter = Counter()
+
+    for result in results:
+        for key in ('observations', 'nlk_codings', 'missing_date', 'errors'):
+            summary[key] += result[key]
+        for name, count in result['status'].items():
+            status_totals[name] += count
+        for problem in result['problem_codes']:
+            problem_totals[(problem['code'], problem['status'])] += problem['count']
+
+    summary['status'] = status_totals
+    summary['top_problem_codes'] = [
+        {'code': code, 'status': status, 'count': count}
+        for (code, status), count in problem_totals.most_common(50)
+    ]
+
+    return {'systems': sorted(systems), 'summary': summary, 'files': results}
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Audit FHIR Observation archives for unknown or retired NLK codes")
+    parser.add_argument("archive_dir", help="Directory with NDJSON/JSON Observation files")
+    parser.add_argument("--csv-file", default=DEFAULT_CSV, help="Processed NLK CSV file")
+    parser.add_argument("--ig-dir", default=DEFAULT_IG_DIR, help="IG directory to read NLK system URLs from")
+    parser.add_argument("--report", default="observation_audit.json", help="JSON report file")
+    parser.add_argument("--findings", help="NDJSON file for individual findings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+
+    args = parser.parse_args()
+
+    for path in (args.archive_dir, args.csv_file):
+        if not Path(path).exists():
+            print(f"❌ Not found: {path}")
+            return 1
+
+    systems = load_nlk_system_urls(args.ig_dir)
+    validator = NLKBatchValidator.from_csv(args.csv_file)
+
+    report = audit_directory(args.archive_dir, validator, systems, args.workers, args.findings,
+                             exclude=[args.report])
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    summary = report['summary']
+    print(f"\n📊 Audit Summary:")
+    print(f"   Files: {summary['files']:,}")
+    print(f"   Observations: {summary['observations']:,}")
+    print(f"   NLK codings: {summary['nlk_codings']:,} ({summary['missing_date']:,} without date)")
+    for name in STATUSES:
+        print(f"   {name}: {summary['status'][name]:,}")
+    if summary['errors']:
+        print(f"   ⚠️  Files with read errors: {summary['errors']}")
+    print(f"\n💾 Report written to: {args.report}")
+    if args.findings:
+        print(f"💾 Findings written to: {args.findings}")
+
+    problems = sum(count for name, count in summary['status'].items() if name != STATUSES[VALID])
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
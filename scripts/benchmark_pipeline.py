@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+End-to-End Performance Benchmarks for the NLK Pipeline
+
+Runs each pipeline stage on the NLK dataset scaled to 1x, 10x and 100x the
+real size and reports wall time, rows/second and peak memory per stage:
+
+  convert_excel_to_csv      Excel -> CSV conversion
+  validate_csv_quality      CSVQualityValidator.run_full_validation
+  clean_data                CSVQualityValidator.clean_data
+  select_active_versions    Temporal deduplication (fix_fsh_duplicates.py)
+  generate_enhanced_fsh     EnhancedNLKFSHGenerator.generate_enhanced_fsh
+  populate_detailed_fsh     NLKDetailedFSHPopulator.generate_populated_fsh
+  fix_fsh_property_syntax   Streaming FSH property syntax fix
+  validate_fsh              FSHValidator.run_validation
+  extract_medical_genetics  Medical Genetics subset extraction
+  in_process_pipeline       nlk_pipeline.NLKPipeline: CSV -> cleaned -> deduplicated -> FSH in memory
+  processor_*               NLKDataProcessor load and queries
+
+Scaled datasets repeat the real rows with codes made unique per replica
+(NOR05001 -> NOR00105001 in replica 1), so duplicates, dates and value
+distributions stay realistic. With --synthetic, scaled datasets are drawn
+from generate_synthetic_nlk.py instead. Inputs a stage depends on (Excel
+file, deduplicated CSV, populated FSH) are prepared outside the timed section.
+
+Peak memory is the process high-water RSS during the stage (reset before
+each stage on Linux via /proc/self/clear_refs; elsewhere the lifetime peak
+is reported). With --tracemalloc the peak Python allocation is also
+measured, at the cost of slower wall times.
+
+Usage:
+  python benchmark_pipeline.py [--scales 1 10 100] [--stages ...] [--output benchmark_results.json]
+"""
+
+import argparse
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from convert_excel_to_csv import convert_excel_to_csv
+from extract_medical_genetics import extract_medical_genetics_codes
+from fix_fsh_duplicates import select_active_versions
+from nlk_pipeline import NLKPipeline
+from nlk_profiling import current_rss_mb, peak_rss_mb, reset_peak_rss
+from fix_fsh_property_syntax import fix_fsh_property_syntax_stream
+from generate_enhanced_fsh import EnhancedNLKFSHGenerator
+from generate_synthetic_nlk import NLKSyntheticGenerator, learn_profile
+from populate_detailed_fsh import NLKDetailedFSHPopulator
+from process_nlk_csv import NLKDataProcessor
+from validate_csv_quality import CSVQualityValidator
+from validate_fsh import FSHValidator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_processing.csv"
+DEFAULT_SCALES = [1, 10, 100]
+EXCEL_MAX_ROWS = 1048575  # Excel sheet limit, excluding the header row
+
+
+class StageNotApplicable(Exception):
+    """Raised when a stage cannot run at a scale (recorded as skipped, not failed)."""
+
+
+# ----------------------------------------------------------------------
+# Memory measurement
+# ----------------------------------------------------------------------
+
+def measure(func: Callable[[], Any], rows: int, use_tracemalloc: bool = False) -> Dict[str, Any]:
+    """
+    Time a zero-argument callable and record its peak memory.
+
+    Returns:
+        dict: wall_s, rows_per_s, peak_rss_mb, rss_delta_mb and (optionally) tracemalloc_peak_mb
+    """
+    gc.collect()
+    peak_reset = reset_peak_rss()
+    rss_before = current_rss_mb()
+
+    if use_tracemalloc:
+        tracemalloc.start()
+
+    # Stages print progress; keep the benchmark output readable
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        func()
+    wall = time.perf_counter() - started
+
+    result = {
+        'rows': rows,
+        'wall_s': round(wall, 4),
+        'rows_per_s': round(rows / wall, 1) if wall > 0 else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rss_delta_mb': None,
+        'peak_rss_reset': peak_reset,
+    }
+
+    if rss_before is not None:
+        result['rss_delta_mb'] = round(result['peak_rss_mb'] - rss_before, 1)
+
+    if use_tracemalloc:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['tracemalloc_peak_mb'] = round(traced_peak / 1024**2, 1)
+
+    return result
+
+
+# ----------------------------------------------------------------------
+# Scaled datasets
+# ----------------------------------------------------------------------
+
+def _replica_codes(codes: pd.Series, replica: int) -> pd.Series:
+    """Make codes unique per replica by inserting the replica number after the prefix."""
+    if replica == 0:
+        return codes
+    return codes.str.slice(0, 3) + f"{replica:03d}" + codes.str.slice(3)
+
+
+def scale_dataset(df: pd.DataFrame, factor: int) -> pd.DataFrame:
+    """
+    Repeat the rows of an NLK dataset with unique codes per replica.
+
+    Replacement references (erstattes_av) are remapped within each replica so
+    replacement chains stay resolvable.
+    """
+    if factor <= 1:
+        return df.copy()
+
+    replicas = []
+    for replica in range(factor):
+        part = df.copy()
+        part['kode'] = _replica_codes(df['kode'], replica)
+        if 'erstattes_av' in part.columns:
+            part['erstattes_av'] = _replica_codes(df['erstattes_av'], replica)
+        replicas.append(part)
+
+    return pd.concat(replicas, ignore_index=True)
+
+
+class BenchmarkContext:
+    """Inputs and intermediate artifacts for one scale, prepared on demand."""
+
+    def __init__(self, df: pd.DataFrame, scale: int, work_dir: Path):
+        self.scale = scale
+        self.work_dir = work_dir / f"scale_{scale}x"
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+        self.df = df
+        self.rows = len(self.df)
+        self.csv_path = self.work_dir / "nlk_scaled.csv"
+        self.df.to_csv(self.csv_path, index=False, encoding='utf-8')
+
+        self.cache: Dict[str, Any] = {}
+
+    def excel_path(self) -> Path:
+        """Scaled dataset as an Excel workbook (requires openpyxl)."""
+        if 'excel' not in self.cache:
+            if self.rows > EXCEL_MAX_ROWS:
+                raise StageNotApplicable(f"{self.rows:,} rows exceed the Excel sheet limit")
+            path = self.work_dir / "nlk_scaled.xlsx"
+            self.df.to_excel(path, index=False, engine='openpyxl')
+            self.cache['excel'] = path
+        return self.cache['excel']
+
+    def deduplicated_path(self) -> Path:
+        """Scaled dataset with one (active) version per code."""
+        if 'deduplicated' not in self.cache:
+            path = self.work_dir / "nlk_scaled_deduplicated.csv"
+            deduplicated = self.cache.get('deduplicated_df')
+            if deduplicated is None:
+                with redirect_stdout(io.StringIO()):
+                    deduplicated = select_active_versions(pd.read_csv(self.csv_path))
+            deduplicated.to_csv(path, index=False)
+            self.cache['deduplicated'] = path
+        return self.cache['deduplicated']
+
+    def populated_fsh_path(self) -> Path:
+        """Multi-line FSH output of the detailed populator."""
+        path = self.work_dir / "nlk_scaled_populated.fsh"
+        if not path.exists():
+            NLKDetailedFSHPopulator(str(self.deduplicated_path())).generate_populated_fsh(str(path))
+        return path
+
+    def fixed_fsh_path(self) -> Path:
+        """Populated FSH with single-line property syntax."""
+        path = self.work_dir / "nlk_scaled_fixed.fsh"
+        if not path.exists():
+            with open(self.populated_fsh_path(), 'r', encoding='utf-8') as source, \
+                    open(path, 'w', encoding='utf-8') as target:
+                fix_fsh_property_syntax_stream(source, target)
+        return path
+
+    def processor(self) -> NLKDataProcessor:
+        """NLKDataProcessor loaded with the scaled dataset."""
+        if 'processor' not in self.cache:
+            self.cache['processor'] = NLKDataProcessor(str(self.csv_path))
+        return self.cache['processor']
+
+
+# ----------------------------------------------------------------------
+# Stages: each prepares its inputs and returns the callable to time
+# ----------------------------------------------------------------------
+
+def _stage_convert_excel(ctx: BenchmarkContext) -> Callable[[], Any]:
+    excel = ctx.excel_path()
+    output_dir = ctx.work_dir / "converted"
+
+    def run():
+        result = convert_excel_to_csv(str(excel), str(output_dir))
+        if not result['success']:
+            raise RuntimeError(result['error'])
+    return run
+
+
+def _stage_validate_csv(ctx: BenchmarkContext) -> Callable[[], Any]:
+    return lambda: CSVQualityValidator(str(ctx.csv_path)).run_full_validation()
+
+
+def _stage_clean_data(ctx: BenchmarkContext) -> Callable[[], Any]:
+    validator = CSVQualityValidator(str(ctx.csv_path))
+    validator.load_csv()
+    return validator.clean_data
+
+
+def _stage_select_active_versions(ctx: BenchmarkContext) -> Callable[[], Any]:
+    df = pd.read_csv(ctx.csv_path)
+
+    def run():
+        ctx.cache['deduplicated_df'] = select_active_versions(df)
+    return run
+
+
+def _stage_enhanced_fsh(ctx: BenchmarkContext) -> Callable[[], Any]:
+    output = ctx.work_dir / "nlk_scaled_enhanced.fsh"
+    return lambda: EnhancedNLKFSHGenerator(str(ctx.csv_path)).generate_enhanced_fsh(str(output))
+
+
+def _stage_populate_fsh(ctx: BenchmarkContext) -> Callable[[], Any]:
+    csv_path = ctx.deduplicated_path()
+    output = ctx.work_dir / "nlk_scaled_populated.fsh"
+    return lambda: NLKDetailedFSHPopulator(str(csv_path)).generate_populated_fsh(str(output))
+
+
+def _stage_fix_property_syntax(ctx: BenchmarkContext) -> Callable[[], Any]:
+    source = ctx.populated_fsh_path()
+    output = ctx.work_dir / "nlk_scaled_fixed.fsh"
+
+    def run():
+        with open(source, 'r', encoding='utf-8') as f_in, open(output, 'w', encoding='utf-8') as f_out:
+            fix_fsh_property_syntax_stream(f_in, f_out)
+    return run
+
+
+def _stage_validate_fsh(ctx: BenchmarkContext) -> Callable[[], Any]:
+    fsh = ctx.fixed_fsh_path()
+    return lambda: FSHValidator(str(fsh)).run_validation()
+
+
+def _stage_extract_medical_genetics(ctx: BenchmarkContext) -> Callable[[], Any]:
+    fsh = ctx.fixed_fsh_path()
+    output = ctx.work_dir / "nlk_scaled_medical_genetics.fsh"
+    return lambda: extract_medical_genetics_codes(str(fsh), str(output))
+
+
+def _stage_in_process_pipeline(ctx: BenchmarkContext) -> Callable[[], Any]:
+    return lambda: NLKPipeline().run(str(ctx.csv_path))
+
+
+def _stage_processor_load(ctx: BenchmarkContext) -> Callable[[], Any]:
+    def run():
+        ctx.cache['processor'] = NLKDataProcessor(str(ctx.csv_path))
+    return run
+
+
+def _processor_query(query: Callable[[NLKDataProcessor], Any]) -> Callable[[BenchmarkContext], Callable[[], Any]]:
+    def stage(ctx: BenchmarkContext) -> Callable[[], Any]:
+        processor = ctx.processor()
+        return lambda: query(processor)
+    return stage
+
+
+STAGES: Dict[str, Callable[[BenchmarkContext], Callable[[], Any]]] = {
+    'convert_excel_to_csv': _stage_convert_excel,
+    'validate_csv_quality': _stage_validate_csv,
+    'clean_data': _stage_clean_data,
+    'select_active_versions': _stage_select_active_versions,
+    'generate_enhanced_fsh': _stage_enhanced_fsh,
+    'populate_detailed_fsh': _stage_populate_fsh,
+    'fix_fsh_property_syntax': _stage_fix_property_syntax,
+    'validate_fsh': _stage_validate_fsh,
+    'extract_medical_genetics': _stage_extract_medical_genetics,
+    'in_process_pipeline': _stage_in_process_pipeline,
+    'processor_load': _stage_processor_load,
+    'processor_active_codes': _processor_query(lambda p: p.get_active_codes()),
+    'processor_codes_by_domain': _processor_query(lambda p: p.get_codes_by_domain('Medisinsk biokjemi')),
+    'processor_search_codes': _processor_query(lambda p: p.search_codes('kolesterol')),
+    'processor_domain_statistics': _processor_query(lambda p: p.get_domain_statistics()),
+    'processor_faceted_filter': _processor_query(
+        lambda p: p.faceted_filter({'primært_fagområde': 'Medisinsk genetikk'})),
+}
+
+
+def run_benchmarks(csv_path: str, scales: List[int], stages: List[str], work_dir: Path,
+                   use_tracemalloc: bool = False, synthetic: bool = False, seed: int = 42) -> Dict[str, Any]:
+    """
+    Run the selected stages at each scale.
+
+    Args:
+        synthetic: Draw scaled datasets from the synthetic generator instead of replicating rows
+        seed: Seed for the synthetic generator
+
+    Returns:
+        dict: Environment information and one result per (scale, stage)
+    """
+    source_df = pd.read_csv(csv_path, encoding='utf-8', dtype=str)
+    results = []
+
+    for scale in scales:
+        print(f"\n📏 Scale {scale}x: preparing {len(source_df) * scale:,} rows...")
+        if synthetic and scale > 1:
+            generator = NLKSyntheticGenerator(learn_profile(source_df), seed=seed)
+            scaled_df = pd.concat(generator.iter_chunks(len(source_df) * scale), ignore_index=True)
+        else:
+            scaled_df = scale_dataset(source_df, scale)
+        ctx = BenchmarkContext(scaled_df, scale, work_dir)
+
+        for name in stages:
+            entry: Dict[str, Any] = {'stage': name, 'scale': scale}
+            try:
+                run = STAGES[name](ctx)
+                entry.update(measure(run, ctx.rows, use_tracemalloc))
+                entry['status'] = 'ok'
+                print(f"   {name:<28} {entry['wall_s']:>9.3f} s  {entry['rows_per_s'] or 0:>12,.0f} rows/s  "
+                      f"peak {entry['peak_rss_mb']:>8.1f} MB")
+            except (ImportError, StageNotApplicable) as e:
+                entry.update({'status': 'skipped', 'error': str(e)})
+                print(f"   {name:<28} skipped: {e}")
+            except Exception as e:
+                entry.update({'status': 'error', 'error': str(e)})
+                print(f"   {name:<28} failed: {e}")
+            results.append(entry)
+
+        del ctx
+        gc.collect()
+
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'source_csv': str(csv_path),
+        'base_rows': len(source_df),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'tracemalloc': use_tracemalloc,
+        'synthetic': synthetic,
+        'results': results,
+    }
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Benchmark the NLK pipeline stages at several data scales")
+    parser.add_argument("--csv-file", default=DEFAULT_CSV, help="Processed NLK CSV file to scale")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Dataset scale factors (default: 1 10 100)")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES),
+                        help="Stages to run (default: all)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--work-dir", help="Directory for scaled inputs and outputs (default: temporary)")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also measure peak Python allocations")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Use the synthetic generator for scaled datasets instead of replicating rows")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for --synthetic (default: 42)")
+    parser.add_argument("--verbose", action="store_true", help="Show log output of the stages")
+
+    args = parser.parse_args()
+
+    if not Path(args.csv_file).exists():
+        print(f"❌ CSV file not found: {args.csv_file}")
+        return 1
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="nlk_benchmark_"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    print("⏱️  NLK Pipeline Benchmark")
+    print(f"   Source: {args.csv_file}")
+    print(f"   Scales: {', '.join(f'{s}x' for s in args.scales)}")
+    print(f"   Work directory: {work_dir}")
+
+    try:
+        report = run_benchmarks(args.csv_file, args.scales, args.stages, work_dir, args.tracemalloc,
+                                args.synthetic, args.seed)
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    failed = [r for r in report['results'] if r['status'] == 'error']
+    print(f"\n💾 Results written to: {args.output}")
+    if failed:
+        print(f"⚠️  {len(failed)} stage runs failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,15 @@ Compare Medical Genetics codes between CSV source and FSH file
 """
 
 import pandas as pd
+import os
 import re
 import sys
 
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_profiling import profiled_main, span
+
 def extract_fsh_codes(fsh_file_path):
     """Extract codes and properties from FSH file"""
     codes = {}
@@ -65,6 +71,7 @@ def load_csv_genetics_codes(csv_file_path):
     
     return genetics_df
 
+@profiled_main
 def compare_codes():
     """Compare codes between CSV and FSH"""
     print("🔍 Comparing Medical Genetics codes between CSV and FSH...")
@@ -74,8 +81,10 @@ def compare_codes():
     fsh_file = "/Users/espen/git/nlk-test/nlk-test/input/fsh/codesystems/nlk-test.codesystem-medical-genetics.fsh"
     
     try:
-        csv_codes = load_csv_genetics_codes(csv_file)
-        fsh_codes = extract_fsh_codes(fsh_file)
+        with span('load_csv_genetics_codes'):
+            csv_codes = load_csv_genetics_codes(csv_file)
+        with span('extract_fsh_codes'):
+            fsh_codes = extract_fsh_codes(fsh_file)
         
         print(f"📊 CSV Medical Genetics codes: {len(csv_codes)}")
         print(f"📊 FSH codes extracted: {len(fsh_codes)}")
@@ -7,45 +7,47 @@ Handles large datasets efficiently with proper encoding and data validation
 import pandas as pd
 import numpy as np
 import sys
+import os
 from pathlib import Path
 import logging
 
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_profiling import profiled_main, span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def convert_excel_to_csv(excel_path: str, output_dir: str = "output") -> dict:
+def read_nlk_excel(excel_path: str) -> pd.DataFrame:
     """
-    Convert Excel file to optimized CSV format for large dataset processing
+    Read the NLK Excel file into a cleaned DataFrame with standardized column names
     
     Args:
         excel_path: Path to input Excel file
-        output_dir: Directory for output files
         
     Returns:
-        dict: Conversion statistics and file paths
+        pd.DataFrame: All values as stripped strings, empty cells as None
     """
+    logger.info(f"Reading Excel file: {excel_path}")
     
-    try:
-        # Create output directory
-        output_path = Path(output_dir)
-        output_path.mkdir(exist_ok=True)
-        
-        logger.info(f"Reading Excel file: {excel_path}")
-        
-        # Read Excel file with optimizations for large datasets
+    # Read Excel file with optimizations for large datasets
+    with span('read_excel') as read_span:
         df = pd.read_excel(
             excel_path,
             engine='openpyxl',  # Better for .xlsx files
             dtype=str,  # Read all as strings initially to preserve data
             na_filter=False  # Don't convert to NaN, keep empty strings
         )
-        
-        logger.info(f"Loaded {len(df)} rows and {len(df.columns)} columns")
-        
-        # Data cleaning and optimization
-        logger.info("Cleaning and optimizing data...")
-        
+        read_span['rows'] = len(df)
+    
+    logger.info(f"Loaded {len(df)} rows and {len(df.columns)} columns")
+    
+    # Data cleaning and optimization
+    logger.info("Cleaning and optimizing data...")
+    
+    with span('clean_cells', rows=len(df)):
         # Remove completely empty rows
         df = df.dropna(how='all')
         
@@ -54,44 +56,66 @@ def convert_excel_to_csv(excel_path: str, output_dir: str = "output") -> dict:
         
         # Replace empty strings with None for better CSV handling
         df = df.replace('', None)
+    
+    # Standardize column names (remove special characters, spaces)
+    df.columns = [
+        col.strip()
+        .replace(' ', '_')
+        .replace('(', '')
+        .replace(')', '')
+        .replace('-', '_')
+        .replace('/', '_')
+        .lower()
+        for col in df.columns
+    ]
+    
+    logger.info(f"Cleaned column names: {list(df.columns)}")
+    return df
+
+def convert_excel_to_csv(excel_path: str, output_dir: str = "output") -> dict:
+    """
+    Convert Excel file to optimized CSV format for large dataset processing
+    
+    Args:
+        excel_path: Path to input Excel file
+        output_dir: Directory for output files
         
-        # Standardize column names (remove special characters, spaces)
-        df.columns = [
-            col.strip()
-            .replace(' ', '_')
-            .replace('(', '')
-            .replace(')', '')
-            .replace('-', '_')
-            .replace('/', '_')
-            .lower()
-            for col in df.columns
-        ]
+    Returns:
+        dict: Conversion statistics and file paths
+    """
+    
+    try:
+        # Create output directory
+        output_path = Path(output_dir)
+        output_path.mkdir(exist_ok=True)
         
-        logger.info(f"Cleaned column names: {list(df.columns)}")
+        df = read_nlk_excel(excel_path)
         
         # Generate output files
         base_name = Path(excel_path).stem.replace(' ', '_').lower()
         
         # 1. Full dataset CSV (UTF-8 with BOM for Excel compatibility)
         full_csv_path = output_path / f"{base_name}_full.csv"
-        df.to_csv(
-            full_csv_path,
-            index=False,
-            encoding='utf-8-sig',  # UTF-8 with BOM for Excel compatibility
-            quoting=1,  # Quote all fields to handle special characters
-            lineterminator='\n'  # Consistent line endings
-        )
+        with span('write_full_csv', rows=len(df)):
+            df.to_csv(
+                full_csv_path,
+                index=False,
+                encoding='utf-8-sig',  # UTF-8 with BOM for Excel compatibility
+                quoting=1,  # Quote all fields to handle special characters
+                lineterminator='\n'  # Consistent line endings
+            )
         logger.info(f"Saved full dataset: {full_csv_path}")
         
         # 2. Optimized CSV for processing (UTF-8, minimal quoting)
         processing_csv_path = output_path / f"{base_name}_processing.csv"
-        df.to_csv(
-            processing_csv_path,
-            index=False,
-            encoding='utf-8',
-            quoting=0,  # Minimal quoting for faster processing
-            lineterminator='\n'
-        )
+        with span('write_processing_csv', rows=len(df)):
+            df.to_csv(
+                processing_csv_path,
+                index=False,
+                encoding='utf-8',
+                quoting=0,  # Minimal quoting for faster processing
+                lineterminator='\n'
+            )
         logger.info(f"Saved processing-optimized CSV: {processing_csv_path}")
         
         # 3. Parquet format for high-performance analytics (optional)
@@ -108,7 +132,8 @@ def convert_excel_to_csv(excel_path: str, output_dir: str = "output") -> dict:
                 except:
                     pass
             
-            df_parquet.to_parquet(parquet_path, index=False, engine='pyarrow')
+            with span('write_parquet', rows=len(df_parquet)):
+                df_parquet.to_parquet(parquet_path, index=False, engine='pyarrow')
             logger.info(f"Saved Parquet format: {parquet_path}")
         except ImportError:
             logger.warning("Parquet support not available (install pyarrow for Parquet output)")
@@ -116,28 +141,29 @@ def convert_excel_to_csv(excel_path: str, output_dir: str = "output") -> dict:
         
         # 4. Generate data summary
         summary_path = output_path / f"{base_name}_summary.txt"
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            f.write(f"Norwegian Laboratory Codebook - Data Summary\n")
-            f.write(f"Generated: {pd.Timestamp.now()}\n")
-            f.write(f"Source: {excel_path}\n\n")
-            
-            f.write(f"Dataset Statistics:\n")
-            f.write(f"- Total records: {len(df):,}\n")
-            f.write(f"- Total columns: {len(df.columns)}\n")
-            f.write(f"- Memory usage: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB\n\n")
-            
-            f.write(f"Column Information:\n")
-            for i, col in enumerate(df.columns, 1):
-                non_null = df[col].count()
-                f.write(f"{i:2d}. {col:<30} - {non_null:,} non-null values\n")
-            
-            f.write(f"\nData Quality:\n")
-            f.write(f"- Duplicate rows: {df.duplicated().sum():,}\n")
-            f.write(f"- Rows with all nulls: {df.isnull().all(axis=1).sum():,}\n")
-            
-            # Sample of first few rows for validation
-            f.write(f"\nSample Data (first 3 rows):\n")
-            f.write(df.head(3).to_string())
+        with span('write_summary', rows=len(df)):
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                f.write(f"Norwegian Laboratory Codebook - Data Summary\n")
+                f.write(f"Generated: {pd.Timestamp.now()}\n")
+                f.write(f"Source: {excel_path}\n\n")
+                
+                f.write(f"Dataset Statistics:\n")
+                f.write(f"- Total records: {len(df):,}\n")
+                f.write(f"- Total columns: {len(df.columns)}\n")
+                f.write(f"- Memory usage: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB\n\n")
+                
+                f.write(f"Column Information:\n")
+                for i, col in enumerate(df.columns, 1):
+                    non_null = df[col].count()
+                    f.write(f"{i:2d}. {col:<30} - {non_null:,} non-null values\n")
+                
+                f.write(f"\nData Quality:\n")
+                f.write(f"- Duplicate rows: {df.duplicated().sum():,}\n")
+                f.write(f"- Rows with all nulls: {df.isnull().all(axis=1).sum():,}\n")
+                
+                # Sample of first few rows for validation
+                f.write(f"\nSample Data (first 3 rows):\n")
+                f.write(df.head(3).to_string())
         
         logger.info(f"Saved data summary: {summary_path}")
         
@@ -168,6 +194,7 @@ def convert_excel_to_csv(excel_path: str, output_dir: str = "output") -> dict:
             'input_file': excel_path
         }
 
+@profiled_main
 def main():
     """Main function for command line usage"""
     if len(sys.argv) < 2:
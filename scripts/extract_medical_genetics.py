@@ -3,13 +3,19 @@
 Extract Medical Genetics codes from the detailed NLK FSH file.
 Creates a smaller version containing only codes with primaryDomain = "Medisinsk genetikk"
 """
+import os
 import re
 import sys
 
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_profiling import profiled_main, span
+
 def extract_medical_genetics_codes(input_file, output_file):
     """Extract only Medical Genetics codes from the detailed FSH file."""
     
-    with open(input_file, 'r', encoding='utf-8') as f:
+    with span('read_fsh'), open(input_file, 'r', encoding='utf-8') as f:
         content = f.read()
     
     # Find the header section (everything before the first code definition)
@@ -22,26 +28,28 @@ def extract_medical_genetics_codes(input_file, output_file):
     
     # Split content into individual code blocks using a more specific pattern
     # Each code starts with '* #' followed by properties until the next '* #'
-    code_sections = re.split(r'^(\* #[A-Z0-9]+ .*?)$', content, flags=re.MULTILINE)
-    
-    # Reconstruct code blocks by pairing code definitions with their properties
-    code_blocks = []
-    for i in range(1, len(code_sections), 2):
-        code_def = code_sections[i]
-        if i + 1 < len(code_sections):
-            properties = code_sections[i + 1]
-            code_blocks.append(code_def + properties)
-        else:
-            code_blocks.append(code_def)
+    with span('split_code_blocks'):
+        code_sections = re.split(r'^(\* #[A-Z0-9]+ .*?)$', content, flags=re.MULTILINE)
+    
+        # Reconstruct code blocks by pairing code definitions with their properties
+        code_blocks = []
+        for i in range(1, len(code_sections), 2):
+            code_def = code_sections[i]
+            if i + 1 < len(code_sections):
+                properties = code_sections[i + 1]
+                code_blocks.append(code_def + properties)
+            else:
+                code_blocks.append(code_def)
     
     print(f"📊 Found {len(code_blocks)} total code blocks")
     
     # Filter for Medical Genetics codes
-    medical_genetics_blocks = []
-    for block in code_blocks:
-        # Look for primaryDomain = "Medisinsk genetikk" pattern
-        if re.search(r'primaryDomain.*?valueString.*?"Medisinsk genetikk"', block, re.DOTALL):
-            medical_genetics_blocks.append(block)
+    with span('filter_medical_genetics', rows=len(code_blocks)):
+        medical_genetics_blocks = []
+        for block in code_blocks:
+            # Look for primaryDomain = "Medisinsk genetikk" pattern
+            if re.search(r'primaryDomain.*?valueString.*?"Medisinsk genetikk"', block, re.DOTALL):
+                medical_genetics_blocks.append(block)
     
     print(f"🧬 Found {len(medical_genetics_blocks)} Medical Genetics codes")
     
@@ -86,7 +94,7 @@ def extract_medical_genetics_codes(input_file, output_file):
     result = updated_header + '\n'.join(medical_genetics_blocks)
     
     # Write the result
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with span('write_fsh', rows=len(medical_genetics_blocks)), open(output_file, 'w', encoding='utf-8') as f:
         f.write(result)
     
     print(f"✅ Medical Genetics CodeSystem written to: {output_file}")
@@ -96,6 +104,7 @@ def extract_medical_genetics_codes(input_file, output_file):
     
     return True
 
+@profiled_main
 def main():
     input_file = '/Users/espen/git/nlk-test/nlk-test/input/fsh/codesystems/nlk-test.codesystem-detailed.fsh'
     output_file = '/Users/espen/git/nlk-test/nlk-test/input/fsh/codesystems/nlk-test.codesystem-medical-genetics.fsh'
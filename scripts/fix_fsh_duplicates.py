@@ -8,11 +8,19 @@ For concepts with the same code but different validity periods, we need to:
 3. Ensure no duplicate concept codes in the final FSH
 """
 
+import numpy as np
 import pandas as pd
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_duplicates import find_duplicates
+from nlk_profiling import profiled_main, span
+
 def load_csv_data(csv_path):
     """Load and analyze the CSV data for duplicates."""
     print(f"Loading CSV data from: {csv_path}")
@@ -21,20 +29,22 @@ def load_csv_data(csv_path):
     df = pd.read_csv(csv_path)
     print(f"Total rows: {len(df)}")
     
-    # Find duplicates by code (first column)
+    # Find duplicates by code (first column), grouped in one fingerprinting pass
     code_column = df.columns[0]
-    duplicates = df[df.duplicated(subset=[code_column], keep=False)]
+    key_groups = find_duplicates(df, [code_column]).key_groups
+    duplicate_positions = np.sort(np.concatenate([g.rows for g in key_groups])) if key_groups else []
+    duplicates = df.iloc[duplicate_positions]
     
     if len(duplicates) > 0:
-        print(f"\nFound {len(duplicates)} duplicate rows for {duplicates[code_column].nunique()} unique codes")
+        print(f"\nFound {len(duplicates)} duplicate rows for {len(key_groups)} unique codes")
         
-        # Group by code and show details
-        for code in duplicates[code_column].unique():
-            code_rows = df[df[code_column] == code]
-            print(f"\nCode {code} has {len(code_rows)} versions:")
-            for idx, row in code_rows.iterrows():
-                valid_from = row.iloc[1] if pd.notna(row.iloc[1]) else "None"
-                valid_to = row.iloc[2] if pd.notna(row.iloc[2]) else "None" 
+        # Show the versions of each duplicated code
+        for group in key_groups:
+            code_rows = df.iloc[group.rows]
+            print(f"\nCode {code_rows.iloc[0, 0]} has {len(code_rows)} versions:")
+            for idx, valid_from, valid_to in zip(code_rows.index, code_rows.iloc[:, 1], code_rows.iloc[:, 2]):
+                valid_from = valid_from if pd.notna(valid_from) else "None"
+                valid_to = valid_to if pd.notna(valid_to) else "None"
                 print(f"  Row {idx}: Valid from {valid_from} to {valid_to}")
     
     return df, duplicates
@@ -91,6 +101,7 @@ def select_active_versions(df):
     print(f"\nReduced from {len(df)} to {len(result_df)} rows")
     return result_df
 
+@profiled_main
 def main():
     csv_path = Path("nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_full_cleaned.csv")
     
@@ -99,18 +110,22 @@ def main():
         return 1
     
     # Load and analyze data
-    df, duplicates = load_csv_data(csv_path)
+    with span('load_csv_data') as load_span:
+        df, duplicates = load_csv_data(csv_path)
+        load_span['rows'] = len(df)
     
     if len(duplicates) == 0:
         print("No duplicates found in CSV data")
         return 0
     
     # Select active versions
-    cleaned_df = select_active_versions(df)
+    with span('select_active_versions', rows=len(df)):
+        cleaned_df = select_active_versions(df)
     
     # Save cleaned CSV
     output_path = csv_path.parent / "norsk_laboratoriekodeverk_7280.77-clean_full_deduplicated.csv"
-    cleaned_df.to_csv(output_path, index=False)
+    with span('write_csv', rows=len(cleaned_df)):
+        cleaned_df.to_csv(output_path, index=False)
     print(f"\nSaved deduplicated CSV to: {output_path}")
     
     # Verify no duplicates remain
@@ -13,125 +13,217 @@ Converts from:
 To:
   * ^property[+].code = #validFrom
   * ^property[=].valueDateTime = "2013-01-25T00:00:00+00:00"
+
+The conversion is streamed line-by-line with a three-line lookahead buffer,
+so memory use is constant regardless of file size. Use '-' as input and/or
+output file to read from stdin and write to stdout, e.g.:
+
+  python fix_fsh_property_syntax.py - out.fsh < nlk_enhanced_codesystem.fsh
+
+Input and output may be the same file; the fixed file is then written to a
+temporary file next to it and moved over the original once complete.
 """
 
+import os
 import re
+import shutil
 import sys
+import tempfile
+from collections import deque
 from pathlib import Path
-from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, TextIO
 
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-def fix_fsh_property_syntax(content: str) -> str:
+from nlk_profiling import profiled_main, span
+
+
+PROPERTY_START_PATTERN = re.compile(r'^\s*\* \^property\[\+\]$')
+
+
+def iter_fixed_lines(lines: Iterable[str], stats: Optional[Dict[str, int]] = None) -> Iterator[str]:
     """
-    Fix FSH property syntax by converting multi-line to single-line format.
+    Yield lines with multi-line property triples collapsed to single-line form.
+
+    Args:
+        lines: Input lines without line terminators
+        stats: Optional dict updated in place with 'converted' and 'remaining'
+               counts of multi-line property patterns
     """
-    lines = content.split('\n')
-    fixed_lines = []
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i]
-        
+    if stats is None:
+        stats = {}
+    stats.setdefault('converted', 0)
+    stats.setdefault('remaining', 0)
+
+    source = iter(lines)
+    buffer = deque()
+
+    while True:
+        # Keep up to three lines buffered: property start, code and value
+        while len(buffer) < 3:
+            try:
+                buffer.append(next(source))
+            except StopIteration:
+                break
+
+        if not buffer:
+            return
+
+        line = buffer.popleft()
+
         # Check if this is a property start line
-        if re.match(r'^\s*\* \^property\[\+\]$', line):
+        if PROPERTY_START_PATTERN.match(line):
             indent = len(line) - len(line.lstrip())
             base_indent = ' ' * indent
-            
-            # Look ahead for code and value lines
-            code_line = None
-            value_line = None
-            
-            # Check next two lines for code and value
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                if next_line.startswith('* code = #'):
-                    code_line = next_line
-                    code_value = next_line.replace('* code = #', '')
-                    
-                    # Look for value line
-                    if i + 2 < len(lines):
-                        value_next_line = lines[i + 2].strip()
-                        if value_next_line.startswith('* value'):
-                            value_line = value_next_line
-                            value_content = value_next_line.replace('* ', '')
-                            
-                            # Create fixed lines
-                            fixed_lines.append(f"{base_indent}* ^property[+].code = #{code_value}")
-                            fixed_lines.append(f"{base_indent}* ^property[=].{value_content}")
-                            
-                            # Skip the processed lines
-                            i += 3
-                            continue
-            
+
+            code_line = buffer[0].strip() if len(buffer) > 0 else ''
+            value_line = buffer[1].strip() if len(buffer) > 1 else ''
+
+            if code_line.startswith('* code = #') and value_line.startswith('* value'):
+                code_value = code_line.replace('* code = #', '')
+                value_content = value_line.replace('* ', '')
+
+                yield f"{base_indent}* ^property[+].code = #{code_value}"
+                yield f"{base_indent}* ^property[=].{value_content}"
+
+                # Skip the processed code and value lines
+                buffer.popleft()
+                buffer.popleft()
+                stats['converted'] += 1
+                continue
+
             # If we couldn't match the pattern, keep the original line
-            fixed_lines.append(line)
-            i += 1
-        else:
-            # Keep non-property lines as-is
-            fixed_lines.append(line)
-            i += 1
-    
-    return '\n'.join(fixed_lines)
+            stats['remaining'] += 1
+
+        yield line
+
+
+def fix_fsh_property_syntax(content: str) -> str:
+    """
+    Fix FSH property syntax by converting multi-line to single-line format.
+    """
+    return '\n'.join(iter_fixed_lines(content.split('\n')))
 
 
+def _split_stream(stream: TextIO) -> Iterator[str]:
+    """Yield lines from a text stream the way str.split('\\n') would."""
+    ends_with_newline = True
+    for line in stream:
+        ends_with_newline = line.endswith('\n')
+        yield line[:-1] if ends_with_newline else line
+    if ends_with_newline:
+        yield ''
+
+
+def fix_fsh_property_syntax_stream(input_stream: TextIO, output_stream: TextIO) -> Dict[str, int]:
+    """
+    Stream FSH from input_stream to output_stream, fixing property syntax.
+
+    Returns:
+        dict: Conversion counts ('converted', 'remaining')
+    """
+    stats: Dict[str, int] = {}
+    first = True
+
+    for line in iter_fixed_lines(_split_stream(input_stream), stats):
+        if not first:
+            output_stream.write('\n')
+        output_stream.write(line)
+        first = False
+
+    return stats
+
+
+@profiled_main
 def main():
     """Main function to fix FSH file syntax."""
-    
+
     if len(sys.argv) != 3:
-        print("Usage: python fix_fsh_syntax.py <input_file> <output_file>")
-        print("Example: python fix_fsh_syntax.py input.fsh output.fsh")
+        print("Usage: python fix_fsh_property_syntax.py <input_file|-> <output_file|->")
+        print("Example: python fix_fsh_property_syntax.py input.fsh output.fsh")
+        print("Use '-' to read from stdin or write to stdout")
+        return 1
+
+    input_arg = sys.argv[1]
+    output_arg = sys.argv[2]
+
+    # Keep stdout clean for FSH output when used in a pipe
+    log = sys.stderr if output_arg == '-' else sys.stdout
+
+    if input_arg != '-' and not Path(input_arg).exists():
+        print(f"❌ Error: Input file not found: {input_arg}", file=log)
         return 1
-    
-    input_file = Path(sys.argv[1])
-    output_file = Path(sys.argv[2])
-    
-    if not input_file.exists():
-        print(f"❌ Error: Input file not found: {input_file}")
+
+    print(f"🔧 Fixing FSH property syntax...", file=log)
+    print(f"📖 Reading: {'stdin' if input_arg == '-' else input_arg}", file=log)
+
+    try:
+        input_stream = sys.stdin if input_arg == '-' else open(input_arg, 'r', encoding='utf-8')
+    except Exception as e:
+        print(f"❌ Error reading file: {e}", file=log)
         return 1
-    
-    print(f"🔧 Fixing FSH property syntax...")
-    print(f"📖 Reading: {input_file}")
-    
-    # Read the input file
+
+    # Writing in place would truncate the input before it is read
+    in_place = (input_arg != '-' and output_arg != '-' and Path(output_arg).exists()
+                and os.path.samefile(input_arg, output_arg))
+    temp_path = None
+
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if output_arg == '-':
+            output_stream = sys.stdout
+        elif in_place:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_arg)),
+                                             prefix='.fix_fsh_', suffix='.tmp')
+            output_stream = open(fd, 'w', encoding='utf-8')
+        else:
+            output_stream = open(output_arg, 'w', encoding='utf-8')
     except Exception as e:
-        print(f"❌ Error reading file: {e}")
+        print(f"❌ Error writing file: {e}", file=log)
+        if input_stream is not sys.stdin:
+            input_stream.close()
         return 1
-    
-    # Count original patterns
-    original_patterns = len(re.findall(r'^\s*\* \^property\[\+\]$', content, re.MULTILINE))
-    print(f"📊 Found {original_patterns:,} multi-line property patterns to fix")
-    
-    # Fix the syntax
-    fixed_content = fix_fsh_property_syntax(content)
-    
-    # Count remaining patterns (should be 0)
-    remaining_patterns = len(re.findall(r'^\s*\* \^property\[\+\]$', fixed_content, re.MULTILINE))
-    
-    # Write the output file
+
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(fixed_content)
+        with span('fix_property_syntax') as fix_span:
+            stats = fix_fsh_property_syntax_stream(input_stream, output_stream)
+            fix_span['rows'] = stats['converted']
     except Exception as e:
-        print(f"❌ Error writing file: {e}")
+        print(f"❌ Error converting file: {e}", file=log)
+        if temp_path:
+            output_stream.close()
+            os.unlink(temp_path)
         return 1
-    
-    print(f"💾 Fixed file written to: {output_file}")
-    print(f"✅ Conversion complete!")
-    print(f"📈 Statistics:")
-    print(f"   - Original multi-line patterns: {original_patterns:,}")
-    print(f"   - Remaining patterns: {remaining_patterns:,}")
-    print(f"   - Fixed patterns: {original_patterns - remaining_patterns:,}")
-    
-    if remaining_patterns == 0:
-        print(f"🎉 All property syntax issues fixed!")
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+        else:
+            output_stream.flush()
+
+    if temp_path:
+        # mkstemp creates the file 0600; keep the original's permissions
+        shutil.copymode(input_arg, temp_path)
+        os.replace(temp_path, output_arg)
+
+    converted = stats['converted']
+    remaining = stats['remaining']
+
+    print(f"💾 Fixed file written to: {'stdout' if output_arg == '-' else output_arg}", file=log)
+    print(f"✅ Conversion complete!", file=log)
+    print(f"📈 Statistics:", file=log)
+    print(f"   - Original multi-line patterns: {converted + remaining:,}", file=log)
+    print(f"   - Remaining patterns: {remaining:,}", file=log)
+    print(f"   - Fixed patterns: {converted:,}", file=log)
+
+    if remaining == 0:
+        print(f"🎉 All property syntax issues fixed!", file=log)
     else:
-        print(f"⚠️  Warning: {remaining_patterns} patterns still need fixing")
-    
+        print(f"⚠️  Warning: {remaining} patterns still need fixing", file=log)
+
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+NLK CSV to FHIR CodeSystem JSON Generator
+
+This script writes the NLK CodeSystem directly as a FHIR R4 JSON resource,
+bypassing FSH and SUSHI compilation for the large (11k+ concept) CodeSystems.
+Concept content is taken from the same generators used for FSH output
+(NLKDetailedFSHPopulator or EnhancedNLKFSHGenerator), so the JSON is
+equivalent to what SUSHI produces from the generated FSH.
+
+The resource is streamed to disk one concept at a time rather than built
+as one large dictionary. Place the output in the IG's input/resources
+directory and remove the corresponding FSH file from input/fsh so the
+CodeSystem is not defined twice.
+
+Usage:
+  python generate_codesystem_json.py [csv_file] [--source detailed|enhanced] [--output FILE]
+  python generate_codesystem_json.py --compare fsh-generated/resources/CodeSystem-<id>.json
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+import pandas as pd
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generate_enhanced_fsh import EnhancedNLKFSHGenerator
+from nlk_profiling import profiled_main, span
+from populate_detailed_fsh import NLKDetailedFSHPopulator
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+GENERATORS = {
+    'detailed': NLKDetailedFSHPopulator,
+    'enhanced': EnhancedNLKFSHGenerator,
+}
+
+# Metadata elements that legitimately differ between runs
+VOLATILE_ELEMENTS = {'date', 'text', 'meta'}
+
+
+class NLKCodeSystemJSONWriter:
+    """Streams an NLK FHIR CodeSystem JSON resource from CSV data."""
+
+    def __init__(self, csv_path: str, source: str = 'detailed'):
+        """
+        Initialize with path to cleaned CSV file.
+
+        Args:
+            csv_path: Path to cleaned (deduplicated) CSV file
+            source: Concept generator to build on ('detailed' or 'enhanced')
+        """
+        if source not in GENERATORS:
+            raise ValueError(f"Unsupported source: {source}")
+
+        self.source = source
+        self.generator = GENERATORS[source](csv_path)
+
+    def iter_concepts(self) -> Iterator[Dict[str, Any]]:
+        """Yield FHIR CodeSystem.concept elements in code order."""
+        concepts_df = self.generator.df.sort_values('kode')
+
+        for _, row in concepts_df.iterrows():
+            concept = {'code': str(row['kode']), 'display': str(row['norsk_bruksnavn'])}
+
+            definition = row.get('kodedefinisjon', '')
+            if not pd.isna(definition) and str(definition).strip():
+                concept['definition'] = str(definition).strip()
+
+            properties = [
+                {'code': prop_code, value_type: value}
+                for prop_code, value_type, value in self.generator._get_concept_properties(row)
+            ]
+            if properties:
+                concept['property'] = properties
+
+            yield concept
+
+    def write(self, output: TextIO) -> int:
+        """
+        Write the CodeSystem resource to a text stream.
+
+        Returns:
+            int: Number of concepts written
+        """
+        metadata = self.generator.get_codesystem_metadata()
+
+        output.write('{\n')
+        for key, value in metadata.items():
+            output.write(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n')
+        output.write('  "concept": [')
+
+        concept_count = 0
+        for concept in self.iter_concepts():
+            output.write(',\n    ' if concept_count else '\n    ')
+            output.write(json.dumps(concept, ensure_ascii=False))
+            concept_count += 1
+
+            if concept_count % 500 == 0:
+                logger.info(f"Processed {concept_count:,} concepts...")
+
+        output.write('\n  ]\n}\n')
+        return concept_count
+
+    def generate_json(self, output_file: Optional[str] = None) -> Optional[str]:
+        """
+        Generate the CodeSystem JSON file.
+
+        Args:
+            output_file: Output path (default: CodeSystem-<id>.json in the IG's input/resources)
+
+        Returns:
+            str: Path of the written file, or None if loading failed
+        """
+        with span('load_data'):
+            loaded = self.generator.load_data()
+        if not loaded:
+            logger.error("Failed to load data")
+            return None
+
+        if output_file is None:
+            resource_id = self.generator.get_codesystem_metadata()['id']
+            output_file = f"../nlk-test/input/resources/CodeSystem-{resource_id}.json"
+
+        output_path = Path(output_file)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        logger.info(f"Generating CodeSystem JSON ({self.source}) to: {output_path}")
+
+        with span('write_json', rows=len(self.generator.df)), open(output_path, 'w', encoding='utf-8') as f:
+            concept_count = self.write(f)
+
+        logger.info(f"CodeSystem JSON written to: {output_path}")
+        logger.info(f"Total concepts: {concept_count:,}")
+        return str(output_path)
+
+
+def compare_codesystems(generated: Dict[str, Any], sushi: Dict[str, Any],
+                        sample_size: int = 25, seed: int = 0) -> List[str]:
+    """
+    Compare a generated CodeSystem with SUSHI's output for the same FSH.
+
+    Metadata elements are compared in full (except run-dependent ones like
+    'date'); concepts are compared for a random subset of SUSHI's codes.
+
+    Args:
+        generated: Parsed CodeSystem written by NLKCodeSystemJSONWriter
+        sushi: Parsed CodeSystem from fsh-generated/resources
+        sample_size: Number of concepts to compare
+        seed: Random seed for the concept sample
+
+    Returns:
+        list: Human-readable differences (empty if equivalent)
+    """
+    differences = []
+
+    keys = (set(generated) | set(sushi)) - VOLATILE_ELEMENTS - {'concept'}
+    for key in sorted(keys):
+        if generated.get(key) != sushi.get(key):
+            differences.append(f"{key}: generated={generated.get(key)!r} sushi={sushi.get(key)!r}")
+
+    generated_concepts = {c['code']: c for c in generated.get('concept', [])}
+    sushi_concepts = {c['code']: c for c in sushi.get('concept', [])}
+
+    sample_codes = sorted(sushi_concepts)
+    if len(sample_codes) > sample_size:
+        sample_codes = sorted(random.Random(seed).sample(sample_codes, sample_size))
+
+    for code in sample_codes:
+        if code not in generated_concepts:
+            differences.append(f"concept {code}: missing from generated JSON")
+        elif generated_concepts[code] != sushi_concepts[code]:
+            differences.append(
+                f"concept {code}: generated={generated_concepts[code]!r} sushi={sushi_concepts[code]!r}"
+            )
+
+    return differences
+
+
+@profiled_main
+def main():
+    """Main function to generate (and optionally verify) the CodeSystem JSON."""
+    parser = argparse.ArgumentParser(
+        description="Generate NLK FHIR CodeSystem JSON directly from CSV, bypassing SUSHI"
+    )
+    parser.add_argument(
+        "csv_file", nargs="?",
+        default="../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_full_deduplicated.csv",
+        help="Path to the deduplicated CSV file"
+    )
+    parser.add_argument("--source", choices=sorted(GENERATORS), default="detailed",
+                        help="Concept generator to build on (default: detailed)")
+    parser.add_argument("--output", help="Output JSON file (default: IG input/resources)")
+    parser.add_argument("--compare", metavar="SUSHI_JSON",
+                        help="Compare the output with SUSHI's CodeSystem JSON for the same data")
+    parser.add_argument("--sample-size", type=int, default=25,
+                        help="Number of concepts to compare with --compare (default: 25)")
+
+    args = parser.parse_args()
+
+    if not Path(args.csv_file).exists():
+        print(f"❌ CSV file not found: {args.csv_file}")
+        print("Please ensure the file exists and run this script from the scripts directory.")
+        return 1
+
+    print("🧬 Norwegian Laboratory Codebook - CodeSystem JSON Generator")
+    print("=" * 80)
+
+    writer = NLKCodeSystemJSONWriter(args.csv_file, source=args.source)
+    output_file = writer.generate_json(args.output)
+
+    if output_file is None:
+        print("❌ CodeSystem JSON generation failed")
+        return 1
+
+    print(f"\n✅ CodeSystem JSON written to: {output_file}")
+
+    if args.compare:
+        print(f"\n🔍 Comparing with SUSHI output: {args.compare}")
+
+        with open(output_file, 'r', encoding='utf-8') as f:
+            generated = json.load(f)
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            sushi = json.load(f)
+
+        with span('compare_codesystems'):
+            differences = compare_codesystems(generated, sushi, sample_size=args.sample_size)
+
+        if differences:
+            print(f"❌ Found {len(differences)} differences:")
+            for difference in differences[:20]:
+                print(f"   - {difference}")
+            return 1
+
+        print("✅ Generated JSON is equivalent to SUSHI output for the compared subset")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
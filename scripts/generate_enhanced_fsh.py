@@ -17,20 +17,153 @@ import pandas as pd
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+import os
 import re
+import sys
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_profiling import profiled_main, span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Concept property syntax modes
+SYNTAX_MULTILINE = 'multiline'      # * ^property[+] / * code = / * value... (needs fix_fsh_property_syntax.py)
+SYNTAX_SINGLE_LINE = 'single-line'  # * ^property[+].code = / * ^property[=].value... (SUSHI-compliant)
+SYNTAX_MODES = (SYNTAX_MULTILINE, SYNTAX_SINGLE_LINE)
+
+
+class FSHConceptPropertiesMixin:
+    """
+    Concept property collection and formatting shared by the FSH generators.
+    
+    Subclasses set syntax_mode and list their properties in
+    TEMPORAL_PROPERTIES (CSV column, property code, value type; in output
+    order) and LAB_PROPERTIES (CSV column, property code).
+    """
+    
+    TEMPORAL_PROPERTIES: List[Tuple[str, str, str]] = []
+    LAB_PROPERTIES: List[Tuple[str, str]] = []
+    
+    def _escape_fsh_string(self, text: str) -> str:
+        """Escape text for safe use in FSH strings."""
+        if pd.isna(text) or text == '':
+            return '""'
+        
+        # Convert to string and clean
+        text = str(text).strip()
+        
+        # Escape quotes and backslashes
+        text = text.replace('\\', '\\\\').replace('"', '\\"')
+        
+        # Handle newlines
+        text = text.replace('\n', '\\n').replace('\r', '\\r')
+        
+        return f'"{text}"'
+    
+    def _format_datetime(self, dt: pd.Timestamp) -> str:
+        """Format datetime for FHIR."""
+        if pd.isna(dt):
+            return None
+        return dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    
+    def _get_concept_status(self, row: pd.Series) -> str:
+        """Determine concept status based on validity dates."""
+        now = pd.Timestamp.now()
+        
+        # Check if expired
+        if not pd.isna(row['gyldig_til']) and row['gyldig_til'] < now:
+            return 'retired'
+        
+        # Check if not yet effective
+        if not pd.isna(row['gyldig_fra']) and row['gyldig_fra'] > now:
+            return 'draft'
+        
+        return 'active'
+    
+    def _get_concept_properties(self, row: pd.Series) -> List[Tuple[str, str, str]]:
+        """
+        Collect concept properties as (property code, value type, value) tuples.
+        
+        Value types are FHIR value[x] names ('valueCode', 'valueDateTime',
+        'valueString'); dates are already formatted and strings stripped.
+        """
+        properties = []
+        
+        # Temporal properties and replacement relationship
+        for csv_col, prop_code, value_type in self.TEMPORAL_PROPERTIES:
+            if not pd.isna(row[csv_col]):
+                value = (self._format_datetime(row[csv_col]) if value_type == 'valueDateTime'
+                         else str(row[csv_col]))
+                properties.append((prop_code, value_type, value))
+        
+        # Laboratory-specific properties
+        for csv_col, prop_code in self.LAB_PROPERTIES:
+            if csv_col in row and not pd.isna(row[csv_col]) and str(row[csv_col]).strip():
+                properties.append((prop_code, 'valueString', str(row[csv_col]).strip()))
+        
+        return properties
+    
+    def _format_fsh_value(self, value_type: str, value: str) -> str:
+        """Format a property value as an FSH literal for its value type."""
+        if value_type == 'valueCode':
+            return f'#{value}'
+        if value_type == 'valueDateTime':
+            return f'"{value}"'
+        return self._escape_fsh_string(value)
+    
+    def _format_fsh_property(self, prop_code: str, value_type: str, value: str) -> str:
+        """Format one concept property in the configured FSH syntax mode."""
+        fsh_value = self._format_fsh_value(value_type, value)
+        
+        if self.syntax_mode == SYNTAX_SINGLE_LINE:
+            return (f'  * ^property[+].code = #{prop_code}\n'
+                    f'  * ^property[=].{value_type} = {fsh_value}')
+        
+        return (f'  * ^property[+]\n'
+                f'    * code = #{prop_code}\n'
+                f'    * {value_type} = {fsh_value}')
+
 
-class EnhancedNLKFSHGenerator:
+class EnhancedNLKFSHGenerator(FSHConceptPropertiesMixin):
     """Enhanced generator for NLK FHIR CodeSystem with complete metadata."""
     
-    def __init__(self, csv_path: str):
-        """Initialize with path to cleaned CSV file."""
+    TEMPORAL_PROPERTIES = [
+        ('gyldig_fra', 'effectiveDate', 'valueDateTime'),
+        ('gyldig_til', 'expirationDate', 'valueDateTime'),
+        ('endringsdato', 'lastModified', 'valueDateTime'),
+        ('erstattes_av', 'replacedBy', 'valueCode'),
+    ]
+    LAB_PROPERTIES = [
+        ('komponent', 'component'),
+        ('komponent_spesifikasjon', 'componentSpec'),
+        ('system', 'system'),
+        ('system_spesifikasjon', 'systemSpec'),
+        ('egenskapsart', 'property'),
+        ('egenskapsart_spesifikasjon', 'propertySpec'),
+        ('enhet', 'unit'),
+        ('primært_fagområde', 'primaryDomain'),
+        ('sekundært_fagområde', 'secondaryDomain'),
+        ('gruppering', 'grouping')
+    ]
+    
+    def __init__(self, csv_path: str, syntax_mode: str = SYNTAX_MULTILINE):
+        """
+        Initialize with path to cleaned CSV file.
+        
+        Args:
+            csv_path: Path to cleaned CSV file
+            syntax_mode: Concept property syntax, 'multiline' or 'single-line'
+        """
+        if syntax_mode not in SYNTAX_MODES:
+            raise ValueError(f"Unsupported syntax mode: {syntax_mode}")
+        
         self.csv_path = Path(csv_path)
+        self.syntax_mode = syntax_mode
         self.df: Optional[pd.DataFrame] = None
         
         # FHIR CodeSystem property definitions
@@ -80,42 +213,6 @@ class EnhancedNLKFSHGenerator:
             logger.error(f"Error loading CSV data: {e}")
             return False
     
-    def _escape_fsh_string(self, text: str) -> str:
-        """Escape text for safe use in FSH strings."""
-        if pd.isna(text) or text == '':
-            return '""'
-        
-        # Convert to string and clean
-        text = str(text).strip()
-        
-        # Escape quotes and backslashes
-        text = text.replace('\\', '\\\\').replace('"', '\\"')
-        
-        # Handle newlines
-        text = text.replace('\n', '\\n').replace('\r', '\\r')
-        
-        return f'"{text}"'
-    
-    def _format_datetime(self, dt: pd.Timestamp) -> str:
-        """Format datetime for FHIR."""
-        if pd.isna(dt):
-            return None
-        return dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
-    
-    def _get_concept_status(self, row: pd.Series) -> str:
-        """Determine concept status based on validity dates."""
-        now = pd.Timestamp.now()
-        
-        # Check if expired
-        if not pd.isna(row['gyldig_til']) and row['gyldig_til'] < now:
-            return 'retired'
-        
-        # Check if not yet effective
-        if not pd.isna(row['gyldig_fra']) and row['gyldig_fra'] > now:
-            return 'draft'
-        
-        return 'active'
-    
     def generate_codesystem_header(self) -> str:
         """Generate FSH CodeSystem header with property definitions."""
         
@@ -159,13 +256,48 @@ Description: """Enhanced Norwegian Laboratory Codebook containing {total_count:,
         
         return header
     
+    def get_codesystem_metadata(self) -> Dict[str, Any]:
+        """
+        Get CodeSystem metadata as FHIR R4 JSON elements (without concepts).
+        
+        Mirrors the FSH header written by generate_codesystem_header.
+        """
+        total_count = len(self.df) if self.df is not None else 0
+        
+        return {
+            'resourceType': 'CodeSystem',
+            'id': 'norsk-laboratoriekodeverk',
+            'url': 'http://ehelse.no/fhir/CodeSystem/norsk-laboratoriekodeverk',
+            'version': '7280.77',
+            'name': 'NorskLaboratoriekodeverk',
+            'title': 'Norsk Laboratoriekodeverk (NLK)',
+            'status': 'active',
+            'experimental': True,
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'publisher': 'Direktoratet for e-helse',
+            'contact': [{'name': 'Direktoratet for e-helse'}],
+            'description': f'Enhanced Norwegian Laboratory Codebook containing {total_count:,} laboratory test codes with comprehensive metadata including components, systems, properties, units, and medical domains. Generated from official source data version 7280.77.',
+            'jurisdiction': [{'coding': [{'system': 'urn:iso:std:iso:3166', 'code': 'NO', 'display': 'Norway'}]}],
+            'copyright': '© Direktoratet for e-helse',
+            'caseSensitive': True,
+            'content': 'complete',
+            'count': total_count,
+            'property': [
+                {'code': prop_code, 'description': prop_def['description'], 'type': prop_def['type']}
+                for prop_code, prop_def in self.properties.items()
+            ]
+        }
+    
+    def _get_concept_properties(self, row: pd.Series) -> List[Tuple[str, str, str]]:
+        """Concept properties, led by the status derived from the validity dates."""
+        return [('status', 'valueCode', self._get_concept_status(row))] + super()._get_concept_properties(row)
+    
     def generate_concept(self, row: pd.Series) -> str:
         """Generate enhanced FSH concept with all available properties."""
         
         code = row['kode']
         display = row['norsk_bruksnavn']
         definition = row.get('kodedefinisjon', '')
-        status = self._get_concept_status(row)
         
         # Start concept definition
         concept = f'* #{code} "{display}"\n'
@@ -174,62 +306,18 @@ Description: """Enhanced Norwegian Laboratory Codebook containing {total_count:,
         if not pd.isna(definition) and definition.strip():
             concept += f'  * ^definition = {self._escape_fsh_string(definition)}\n'
         
-        # Add properties
-        properties = []
-        
-        # Status
-        properties.append(f'    * code = #status\n    * valueCode = #{status}')
-        
-        # Temporal properties
-        if not pd.isna(row['gyldig_fra']):
-            effective_date = self._format_datetime(row['gyldig_fra'])
-            properties.append(f'    * code = #effectiveDate\n    * valueDateTime = "{effective_date}"')
-        
-        if not pd.isna(row['gyldig_til']):
-            expiration_date = self._format_datetime(row['gyldig_til'])
-            properties.append(f'    * code = #expirationDate\n    * valueDateTime = "{expiration_date}"')
-        
-        if not pd.isna(row['endringsdato']):
-            last_modified = self._format_datetime(row['endringsdato'])
-            properties.append(f'    * code = #lastModified\n    * valueDateTime = "{last_modified}"')
-        
-        # Replacement relationship
-        if not pd.isna(row['erstattes_av']):
-            properties.append(f'    * code = #replacedBy\n    * valueCode = #{row["erstattes_av"]}')
-        
-        # Laboratory-specific properties
-        lab_properties = [
-            ('komponent', 'component'),
-            ('komponent_spesifikasjon', 'componentSpec'),
-            ('system', 'system'),
-            ('system_spesifikasjon', 'systemSpec'),
-            ('egenskapsart', 'property'),
-            ('egenskapsart_spesifikasjon', 'propertySpec'),
-            ('enhet', 'unit'),
-            ('primært_fagområde', 'primaryDomain'),
-            ('sekundært_fagområde', 'secondaryDomain'),
-            ('gruppering', 'grouping')
-        ]
-        
-        for csv_col, fhir_prop in lab_properties:
-            if csv_col in row and not pd.isna(row[csv_col]) and str(row[csv_col]).strip():
-                value = self._escape_fsh_string(str(row[csv_col]).strip())
-                properties.append(f'    * code = #{fhir_prop}\n    * valueString = {value}')
-        
         # Add all properties to concept
-        if properties:
-            for i, prop in enumerate(properties):
-                if i == 0:
-                    concept += '  * ^property[+]\n' + prop + '\n'
-                else:
-                    concept += '  * ^property[+]\n' + prop + '\n'
+        for prop_code, value_type, value in self._get_concept_properties(row):
+            concept += self._format_fsh_property(prop_code, value_type, value) + '\n'
         
         return concept
     
     def generate_enhanced_fsh(self, output_file: str = "nlk_enhanced_codesystem.fsh") -> None:
         """Generate complete enhanced FSH CodeSystem."""
         
-        if not self.load_data():
+        with span('load_data'):
+            loaded = self.load_data()
+        if not loaded:
             logger.error("Failed to load data")
             return
         
@@ -251,32 +339,35 @@ Description: """Enhanced Norwegian Laboratory Codebook containing {total_count:,
         batch_size = 1000
         concept_count = 0
         
-        for i in range(0, len(concepts_df), batch_size):
-            batch = concepts_df.iloc[i:i + batch_size]
+        with span('generate_concepts', rows=len(concepts_df)):
+            for i in range(0, len(concepts_df), batch_size):
+                batch = concepts_df.iloc[i:i + batch_size]
             
-            for _, row in batch.iterrows():
-                try:
-                    concept_fsh = self.generate_concept(row)
-                    fsh_content += concept_fsh + "\n"
-                    concept_count += 1
+                for _, row in batch.iterrows():
+                    try:
+                        concept_fsh = self.generate_concept(row)
+                        fsh_content += concept_fsh + "\n"
+                        concept_count += 1
                     
-                    if concept_count % 500 == 0:
-                        logger.info(f"Processed {concept_count:,} concepts...")
+                        if concept_count % 500 == 0:
+                            logger.info(f"Processed {concept_count:,} concepts...")
                         
-                except Exception as e:
-                    logger.warning(f"Error processing concept {row.get('kode', 'unknown')}: {e}")
-                    continue
+                    except Exception as e:
+                        logger.warning(f"Error processing concept {row.get('kode', 'unknown')}: {e}")
+                        continue
         
         # Write to file
         output_path = Path(output_file)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(fsh_content)
+        with span('write_fsh'):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(fsh_content)
         
         logger.info(f"Enhanced FSH CodeSystem generated: {output_path}")
         logger.info(f"Total concepts: {concept_count:,}")
         
         # Generate statistics
-        self._generate_statistics()
+        with span('statistics', rows=len(self.df)):
+            self._generate_statistics()
     
     def _generate_statistics(self) -> None:
         """Generate and log statistics about the CodeSystem."""
@@ -312,6 +403,7 @@ Description: """Enhanced Norwegian Laboratory Codebook containing {total_count:,
                 logger.info(f"   {col}: {completeness:.1f}%")
 
 
+@profiled_main
 def main():
     """Main function to generate enhanced NLK CodeSystem."""
     
@@ -326,8 +418,12 @@ def main():
     print("🧬 Enhanced Norwegian Laboratory Codebook - FSH CodeSystem Generator")
     print("=" * 80)
     
+    # Emit SUSHI-compliant single-line properties directly if requested,
+    # making the fix_fsh_property_syntax.py pass unnecessary
+    syntax_mode = SYNTAX_SINGLE_LINE if '--single-line' in sys.argv[1:] else SYNTAX_MULTILINE
+    
     # Generate enhanced CodeSystem
-    generator = EnhancedNLKFSHGenerator(csv_file)
+    generator = EnhancedNLKFSHGenerator(csv_file, syntax_mode=syntax_mode)
     generator.generate_enhanced_fsh("nlk_enhanced_codesystem.fsh")
     
     print("\n✅ Enhanced CodeSystem generation completed!")
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Synthetic NLK Dataset Generator
+
+Generates large, realistic NLK CSV or XLSX files for load testing. The
+generator learns a profile from the real CSV and emits rows in chunks, so
+memory use is bounded by the chunk size, not the row count. Output is fully
+determined by the seed (and chunk size).
+
+What is learned from the real data:
+  - code prefixes (NOR, NPU), their shares, digit widths and numbering gaps
+  - the joint distribution of descriptive columns, validity dates and
+    change dates, by sampling template rows (this keeps domain, grouping,
+    unit and date frequencies and their correlations)
+  - replacement structure: share of expired codes with a replacement,
+    share of replacements that are themselves replaced (chains), and the
+    prefixes replacement targets use
+  - share of codes with two versions (older version replaced by itself)
+  - rate of whitespace defects in text cells (can be overridden)
+
+Codes are unique within a file. Fixed-width prefixes (NOR\\d{5}) that run out
+of numbers overflow into the open-ended NPU\\d+ numbering. Replacement targets
+always exist in the same file.
+
+Usage:
+  python generate_synthetic_nlk.py <rows> <output.csv|output.xlsx> [--seed 42] [--source real.csv]
+"""
+
+import argparse
+import logging
+import math
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_processing.csv"
+DEFAULT_CHUNK_SIZE = 50000
+
+# Prefixes whose numbering is open-ended (NPU\d+); others keep their learned width
+OPEN_WIDTH_PREFIXES = ('NPU',)
+EXCEL_MAX_ROWS = 1048575  # Excel sheet limit, excluding the header row
+
+CODE_PATTERN = re.compile(r'^([A-Z]+)(\d+)$')
+WHITESPACE_DEFECT = re.compile(r'^\s|\s$|\s{2,}|[\t\u00a0]')
+
+# Defects seen in hand-edited spreadsheets: padding, doubled spaces, tabs, non-breaking spaces
+WHITESPACE_DEFECTS = (
+    lambda v: f" {v}",
+    lambda v: f"{v} ",
+    lambda v: v.replace(' ', '  ', 1) if ' ' in v else f"{v}  ",
+    lambda v: f"{v}\t",
+    lambda v: v.replace(' ', '\u00a0', 1) if ' ' in v else f"\u00a0{v}",
+)
+
+
+@dataclass
+class PrefixProfile:
+    """Numbering of codes with one prefix."""
+    share: float
+    width: int
+    start: int
+    gaps: np.ndarray
+
+
+@dataclass
+class NLKDatasetProfile:
+    """Distributions learned from a real NLK dataset."""
+    columns: List[str]
+    templates: pd.DataFrame
+    prefixes: Dict[str, PrefixProfile]
+    replacement_share: float
+    chain_share: float
+    target_prefix_shares: Dict[str, float]
+    duplicate_share: float
+    version_gap_days: np.ndarray
+    defect_rate: float
+    text_columns: List[str] = field(default_factory=list)
+
+
+def learn_profile(df: pd.DataFrame) -> NLKDatasetProfile:
+    """
+    Learn a generation profile from a real NLK dataset.
+
+    Args:
+        df: Processed NLK data, all columns as strings
+
+    Returns:
+        NLKDatasetProfile: Profile for NLKSyntheticGenerator
+    """
+    df = df.copy()
+    parts = df['kode'].str.extract(CODE_PATTERN)
+    df['_prefix'] = parts[0]
+    df['_number'] = pd.to_numeric(parts[1], errors='coerce')
+    df['_width'] = parts[1].str.len()
+    df = df[df['_prefix'].notna()]
+
+    # Older versions of multi-version codes are replaced by themselves
+    self_replaced = df['erstattes_av'] == df['kode']
+    duplicate_share = df.loc[self_replaced, 'kode'].nunique() / df['kode'].nunique()
+
+    fra = pd.to_datetime(df['gyldig_fra'], errors='coerce')
+    old_versions = df[self_replaced]
+    new_version_start = df[~self_replaced].drop_duplicates('kode').set_index('kode')['gyldig_fra']
+    gaps = (pd.to_datetime(old_versions['kode'].map(new_version_start), errors='coerce')
+            - fra[self_replaced]).dt.days.dropna()
+    version_gap_days = gaps.to_numpy(dtype=np.int64) if len(gaps) else np.array([180])
+
+    prefixes = {}
+    counts = df.drop_duplicates('kode')['_prefix'].value_counts()
+    for prefix, count in counts.items():
+        numbers = np.sort(df.loc[df['_prefix'] == prefix, '_number'].unique().astype(np.int64))
+        prefix_gaps = np.diff(numbers)
+        prefix_gaps = prefix_gaps[(prefix_gaps > 0) & (prefix_gaps <= 100)]
+        prefixes[prefix] = PrefixProfile(
+            share=count / counts.sum(),
+            width=int(df.loc[df['_prefix'] == prefix, '_width'].max()),
+            start=int(numbers[0]),
+            gaps=prefix_gaps if len(prefix_gaps) else np.array([1])
+        )
+
+    expired = df['gyldig_til'].notna() & ~self_replaced
+    replaced = expired & df['erstattes_av'].notna()
+    replacement_share = replaced.sum() / expired.sum() if expired.any() else 0.0
+    chain_share = df.loc[replaced, 'erstattes_av'].isin(df.loc[replaced, 'kode']).mean() if replaced.any() else 0.0
+    target_prefixes = df.loc[replaced, 'erstattes_av'].str.extract(CODE_PATTERN)[0].value_counts(normalize=True)
+
+    columns = [c for c in df.columns if not c.startswith('_')]
+    text_columns = [c for c in columns if c not in ('kode', 'gyldig_fra', 'gyldig_til', 'erstattes_av', 'endringsdato')]
+
+    cells = df[text_columns].stack()
+    defect_rate = float(cells.astype(str).str.contains(WHITESPACE_DEFECT).mean()) if len(cells) else 0.0
+
+    templates = df.loc[~self_replaced, columns].reset_index(drop=True)
+    templates['_prefix'] = df.loc[~self_replaced, '_prefix'].to_numpy()
+
+    return NLKDatasetProfile(
+        columns=columns,
+        templates=templates,
+        prefixes=prefixes,
+        replacement_share=float(replacement_share),
+        chain_share=float(chain_share),
+        target_prefix_shares=target_prefixes.to_dict(),
+        duplicate_share=float(duplicate_share),
+        version_gap_days=version_gap_days,
+        defect_rate=defect_rate,
+        text_columns=text_columns
+    )
+
+
+class NLKSyntheticGenerator:
+    """Deterministic, chunked generator of synthetic NLK rows."""
+
+    def __init__(self, profile: NLKDatasetProfile, seed: int = 42,
+                 defect_rate: Optional[float] = None, duplicate_share: Optional[float] = None):
+        """
+        Initialize the generator.
+
+        Args:
+            profile: Learned dataset profile
+            seed: Random seed; the same seed and chunk size give identical output
+            defect_rate: Share of text cells with whitespace defects (default: learned)
+            duplicate_share: Share of codes with two versions (default: learned)
+        """
+        self.profile = profile
+        self.seed = seed
+        self.defect_rate = profile.defect_rate if defect_rate is None else defect_rate
+        self.duplicate_share = profile.duplicate_share if duplicate_share is None else duplicate_share
+
+        self._prefix_names = list(profile.prefixes)
+        self._prefix_shares = np.array([profile.prefixes[p].share for p in self._prefix_names])
+        self._prefix_shares /= self._prefix_shares.sum()
+        self._overflow_prefix = next((p for p in self._prefix_names if p in OPEN_WIDTH_PREFIXES), None)
+
+        # Template rows per prefix, so e.g. NOR codes keep NOR-like content
+        template_prefix = profile.templates['_prefix'].to_numpy()
+        self._templates = profile.templates[profile.columns]
+        self._template_rows = {p: np.flatnonzero(template_prefix == p) for p in self._prefix_names}
+
+    def _allocate_codes(self, rng: np.random.Generator, size: int,
+                        counters: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Draw a prefix per row and allocate unique codes in numbering order.
+
+        Rows drawn for a fixed-width prefix whose numbers run out move to the
+        open-ended prefix. Returns (codes, prefixes).
+        """
+        prefixes = np.array(self._prefix_names, dtype=object)[
+            rng.choice(len(self._prefix_names), size=size, p=self._prefix_shares)
+        ]
+        codes = np.empty(size, dtype=object)
+
+        # Fixed-width prefixes first, so their overflow is numbered with the open-ended prefix
+        order = sorted(self._prefix_names, key=lambda p: p in OPEN_WIDTH_PREFIXES)
+        for prefix in order:
+            rows = np.flatnonzero(prefixes == prefix)
+            if not len(rows):
+                continue
+            settings = self.profile.prefixes[prefix]
+            numbers = counters[prefix] + np.cumsum(rng.choice(settings.gaps, size=len(rows)))
+
+            if prefix not in OPEN_WIDTH_PREFIXES:
+                fits = numbers < 10 ** settings.width
+                if not fits.all():
+                    if self._overflow_prefix is None:
+                        raise ValueError(f"Code numbers for prefix {prefix} exhausted")
+                    prefixes[rows[~fits]] = self._overflow_prefix
+                    rows, numbers = rows[fits], numbers[fits]
+                    if not len(rows):
+                        continue
+
+            counters[prefix] = int(numbers[-1])
+            codes[rows] = [f"{prefix}{n:0{settings.width}d}" for n in numbers]
+
+        return codes, prefixes
+
+    def _generate_chunk(self, chunk_index: int, size: int, counters: Dict[str, int]) -> pd.DataFrame:
+        """Generate one chunk of rows."""
+        rng = np.random.default_rng([self.seed, chunk_index])
+        profile = self.profile
+
+        # Extra rows for older versions of multi-version codes
+        n_duplicates = int(rng.binomial(size, self.duplicate_share / (1 + self.duplicate_share)))
+        n_codes = size - n_duplicates
+
+        codes, prefixes = self._allocate_codes(rng, n_codes, counters)
+        template_index = np.empty(n_codes, dtype=np.int64)
+        for prefix in self._prefix_names:
+            rows = np.flatnonzero(prefixes == prefix)
+            pool = self._template_rows[prefix]
+            if len(pool) == 0:
+                pool = np.arange(len(self._templates))
+            template_index[rows] = rng.choice(pool, size=len(rows))
+
+        chunk = self._templates.iloc[template_index].reset_index(drop=True)
+        chunk['kode'] = codes
+
+        # Replacement targets: active codes in the chunk, or (for chains) other replaced codes
+        expired = chunk['gyldig_til'].notna().to_numpy()
+        replaced = expired & (rng.random(n_codes) < profile.replacement_share)
+        chunk['erstattes_av'] = None
+
+        active_rows = np.flatnonzero(~expired)
+        replaced_rows = np.flatnonzero(replaced)
+        if len(replaced_rows) and len(active_rows):
+            code_prefix = chunk['kode'].str.extract(CODE_PATTERN)[0].to_numpy()
+            target_prefixes = list(profile.target_prefix_shares)
+            target_weights = np.array([profile.target_prefix_shares[p] for p in target_prefixes])
+            wanted = np.array(target_prefixes, dtype=object)[
+                rng.choice(len(target_prefixes), size=len(replaced_rows), p=target_weights / target_weights.sum())
+            ] if target_prefixes else code_prefix[replaced_rows]
+
+            targets = np.empty(len(replaced_rows), dtype=object)
+            for prefix in sorted(set(wanted)):
+                rows = np.flatnonzero(wanted == prefix)
+                pool = active_rows[code_prefix[active_rows] == prefix]
+                if len(pool) == 0:
+                    pool = active_rows
+                targets[rows] = chunk['kode'].to_numpy()[rng.choice(pool, size=len(rows))]
+
+            # Chains: point to a replaced code later in the chunk, which keeps chains acyclic
+            chained = np.flatnonzero(rng.random(len(replaced_rows)) < profile.chain_share)
+            chained = chained[chained < len(replaced_rows) - 1]
+            if len(chained):
+                later = chained + 1 + (rng.random(len(chained)) * (len(replaced_rows) - 1 - chained)).astype(np.int64)
+                targets[chained] = chunk['kode'].to_numpy()[replaced_rows[later]]
+
+            chunk.loc[replaced_rows, 'erstattes_av'] = targets
+
+        if n_duplicates:
+            chunk = self._add_versions(rng, chunk, n_duplicates)
+
+        if self.defect_rate > 0:
+            self._inject_defects(rng, chunk)
+
+        return chunk[profile.columns]
+
+    def _add_versions(self, rng: np.random.Generator, chunk: pd.DataFrame, n_duplicates: int) -> pd.DataFrame:
+        """Add older, self-replaced versions for some active codes (placed after the current version)."""
+        active_rows = np.flatnonzero(chunk['gyldig_til'].isna().to_numpy())
+        if not len(active_rows):
+            return chunk
+
+        chosen = np.sort(rng.choice(active_rows, size=min(n_duplicates, len(active_rows)), replace=False))
+        old = chunk.iloc[chosen].copy()
+
+        new_start = pd.to_datetime(old['gyldig_fra'], errors='coerce')
+        gap_days = rng.choice(self.profile.version_gap_days, size=len(old))
+        old['gyldig_fra'] = (new_start - pd.to_timedelta(gap_days, unit='D')).dt.strftime('%Y-%m-%d %H:%M:%S')
+        # Older version stays valid a while after the new one starts, as in the real data
+        old['gyldig_til'] = (new_start + pd.to_timedelta(gap_days, unit='D')).dt.strftime('%Y-%m-%d 23:59:00')
+        old['erstattes_av'] = old['kode']
+        old['endringsdato'] = None
+
+        # Interleave: each old version directly follows its current version
+        order = np.concatenate([np.arange(len(chunk)), chosen + 0.5])
+        combined = pd.concat([chunk, old], ignore_index=True)
+        return combined.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+
+    def _inject_defects(self, rng: np.random.Generator, chunk: pd.DataFrame) -> None:
+        """Add whitespace defects to a share of the non-null text cells."""
+        for col in self.profile.text_columns:
+            values = chunk[col]
+            hit = np.flatnonzero(values.notna().to_numpy() & (rng.random(len(chunk)) < self.defect_rate))
+            if not len(hit):
+                continue
+            kinds = rng.integers(len(WHITESPACE_DEFECTS), size=len(hit))
+            chunk.loc[hit, col] = [WHITESPACE_DEFECTS[k](str(v)) for k, v in zip(kinds, values.iloc[hit])]
+
+    def iter_chunks(self, n_rows: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        Generate rows in chunks.
+
+        Args:
+            n_rows: Total number of rows
+            chunk_size: Rows per chunk
+
+        Yields:
+            pd.DataFrame: Chunks in the NLK CSV schema
+        """
+        counters = {p: settings.start - 1 for p, settings in self.profile.prefixes.items()}
+
+        for chunk_index in range(math.ceil(n_rows / chunk_size)):
+            size = min(chunk_size, n_rows - chunk_index * chunk_size)
+            yield self._generate_chunk(chunk_index, size, counters)
+
+    def write_csv(self, output_path: str, n_rows: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+        """Stream generated rows to a CSV file in the processing CSV format."""
+        output_file = Path(output_path)
+        written = 0
+
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            for i, chunk in enumerate(self.iter_chunks(n_rows, chunk_size)):
+                chunk.to_csv(f, index=False, header=(i == 0), lineterminator='\n')
+                written += len(chunk)
+                logger.info(f"Wrote {written:,}/{n_rows:,} rows")
+
+        return str(output_file)
+
+    def write_xlsx(self, output_path: str, n_rows: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+        """
+        Stream generated rows to an XLSX workbook (requires openpyxl).
+
+        Rows beyond the Excel sheet limit continue on additional sheets,
+        each with its own header row.
+        """
+        from openpyxl import Workbook
+
+        output_file = Path(output_path)
+        workbook = Workbook(write_only=True)
+        sheet = None
+        sheet_rows = EXCEL_MAX_ROWS
+        written = 0
+
+        for chunk in self.iter_chunks(n_rows, chunk_size):
+            for row in chunk.itertuples(index=False, name=None):
+                if sheet_rows >= EXCEL_MAX_ROWS:
+                    sheet = workbook.create_sheet(f"Sheet{len(workbook.worksheets) + 1}")
+                    sheet.append(self.profile.columns)
+                    sheet_rows = 0
+                sheet.append([None if pd.isna(v) else v for v in row])
+                sheet_rows += 1
+            written += len(chunk)
+            logger.info(f"Wrote {written:,}/{n_rows:,} rows")
+
+        workbook.save(output_file)
+        return str(output_file)
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic NLK dataset for load testing")
+    parser.add_argument("rows", type=int, help="Number of rows to generate")
+    parser.add_argument("output_file", help="Output file (.csv or .xlsx)")
+    parser.add_argument("--source", default=DEFAULT_CSV, help="Real NLK CSV to learn distributions from")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows generated per chunk (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--defect-rate", type=float,
+                        help="Share of text cells with whitespace defects (default: learned from source)")
+    parser.add_argument("--duplicate-share", type=float,
+                        help="Share of codes with two versions (default: learned from source)")
+
+    args = parser.parse_args()
+
+    if not Path(args.source).exists():
+        print(f"❌ Source CSV file not found: {args.source}")
+        return 1
+
+    source_df = pd.read_csv(args.source, encoding='utf-8', dtype=str)
+    profile = learn_profile(source_df)
+
+    print("🧪 Synthetic NLK Dataset Generator")
+    print(f"   Learned from: {args.source} ({len(source_df):,} rows)")
+    print(f"   Prefixes: " + ", ".join(f"{p} {s.share:.1%}" for p, s in profile.prefixes.items()))
+    print(f"   Replacement share: {profile.replacement_share:.1%}, chains: {profile.chain_share:.1%}")
+    print(f"   Multi-version codes: {profile.duplicate_share:.2%}, whitespace defects: {profile.defect_rate:.2%}")
+
+    generator = NLKSyntheticGenerator(profile, seed=args.seed, defect_rate=args.defect_rate,
+                                      duplicate_share=args.duplicate_share)
+
+    if args.output_file.lower().endswith('.xlsx'):
+        output = generator.write_xlsx(args.output_file, args.rows, args.chunk_size)
+    else:
+        output = generator.write_csv(args.output_file, args.rows, args.chunk_size)
+
+    print(f"✅ Wrote {args.rows:,} rows to: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
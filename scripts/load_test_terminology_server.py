@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Load Test for the NLK Terminology Server
+
+Sends $lookup or $validate-code requests for random NLK codes over a number
+of keep-alive connections, then reports client-side latency percentiles,
+throughput and the server's own latency histogram from /metrics.
+
+Usage:
+  python nlk_terminology_server.py &
+  python load_test_terminology_server.py --requests 20000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+
+NLK_SYSTEM_URL = "http://hl7.no/fhir/ig/nlk-test/CodeSystem/norsk-laboratoriekodeverk"
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                   host: str, target: str) -> Tuple[int, bytes]:
+    """Send one GET request on an open connection and read the response."""
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith('content-length:'):
+            length = int(line.split(':', 1)[1])
+
+    body = await reader.readexactly(length)
+    return status, body
+
+
+async def _worker(host: str, port: int, targets: List[str], latencies: List[float]) -> int:
+    """Send requests sequentially over one connection; return the error count."""
+    reader, writer = await asyncio.open_connection(host, port)
+    errors = 0
+
+    try:
+        for target in targets:
+            started = time.perf_counter()
+            status, _ = await _request(reader, writer, host, target)
+            latencies.append(time.perf_counter() - started)
+            if status >= 500:
+                errors += 1
+    finally:
+        writer.close()
+
+    return errors
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+async def run_load_test(host: str, port: int, codes: List[str], total_requests: int,
+                        concurrency: int, endpoint: str, seed: int = 0) -> dict:
+    """Run the load test and return client- and server-side statistics."""
+    rng = random.Random(seed)
+    operation = '$lookup' if endpoint == 'lookup' else '$validate-code'
+    system_param = 'system' if endpoint == 'lookup' else 'url'
+
+    targets = [
+        f"/CodeSystem/{operation}?{system_param}={quote(NLK_SYSTEM_URL, safe='')}&code={quote(rng.choice(codes))}"
+        for _ in range(total_requests)
+    ]
+
+    latencies: List[float] = []
+    per_worker = [targets[i::concurrency] for i in range(concurrency)]
+
+    started = time.perf_counter()
+    errors = await asyncio.gather(*(_worker(host, port, chunk, latencies) for chunk in per_worker))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, body = await _request(reader, writer, host, '/metrics')
+    finally:
+        writer.close()
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'elapsed_s': elapsed,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'client_p50_ms': _percentile(latencies, 50) * 1000,
+        'client_p99_ms': _percentile(latencies, 99) * 1000,
+        'client_max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        'server': json.loads(body).get('endpoints', {}).get(f"/CodeSystem/{operation}", {})
+    }
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Load test the NLK terminology server")
+    parser.add_argument(
+        "--csv-file",
+        default="../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_processing.csv",
+        help="CSV file to draw codes from"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Server host (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Server port (default: 8080)")
+    parser.add_argument("--requests", type=int, default=10000, help="Total requests (default: 10000)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel connections (default: 4)")
+    parser.add_argument("--endpoint", choices=['lookup', 'validate'], default='lookup',
+                        help="Operation to exercise (default: lookup)")
+    parser.add_argument("--unknown-ratio", type=float, default=0.05,
+                        help="Share of requests for unknown codes (default: 0.05)")
+    parser.add_argument("--target-p99-ms", type=float, default=1.0,
+                        help="Fail if server-side p99 exceeds this (default: 1.0)")
+
+    args = parser.parse_args()
+
+    if not Path(args.csv_file).exists():
+        print(f"❌ CSV file not found: {args.csv_file}")
+        return 1
+
+    codes = pd.read_csv(args.csv_file, usecols=['kode'], dtype=str)['kode'].dropna().unique().tolist()
+    unknown_count = int(len(codes) * args.unknown_ratio)
+    codes += [f"XXX{i:05d}" for i in range(unknown_count)]
+
+    print(f"🚀 Load testing http://{args.host}:{args.port} ({args.endpoint})")
+    print(f"   Requests: {args.requests:,}, connections: {args.concurrency}, codes: {len(codes):,}")
+
+    stats = asyncio.run(run_load_test(
+        args.host, args.port, codes, args.requests, args.concurrency, args.endpoint
+    ))
+
+    server = stats['server']
+    print(f"\n📊 Results:")
+    print(f"   Throughput: {stats['throughput_rps']:,.0f} requests/s")
+    print(f"   Errors: {stats['errors']}")
+    print(f"   Client latency: p50 {stats['client_p50_ms']:.3f} ms, "
+          f"p99 {stats['client_p99_ms']:.3f} ms, max {stats['client_max_ms']:.3f} ms")
+
+    if server:
+        print(f"   Server latency: p50 <= {server['p50_us']:.0f} µs, "
+              f"p99 <= {server['p99_us']:.0f} µs, max {server['max_us']:.0f} µs")
+
+        if server['p99_us'] / 1000 > args.target_p99_ms:
+            print(f"❌ Server p99 exceeds target of {args.target_p99_ms} ms")
+            return 1
+        print(f"✅ Server p99 within target of {args.target_p99_ms} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+High-Throughput Batch Validation of NLK Codes
+
+Classifies large batches of (code, observation date) pairs against the NLK
+codebook as valid, unknown, retired or not yet valid, with the replacement
+code for retired codes. Classification uses the same rules as
+NLKCodeIndex.classify but is vectorized: codes are mapped to version ranges
+through a hash index in one call, and validity intervals are compared as
+NumPy datetime arrays.
+
+NDJSON input files (one {"code": ..., "date": ...} object per line) are
+split into byte ranges and validated in parallel worker processes.
+
+Usage:
+  python nlk_batch_validation.py observations.ndjson [--output results.csv] [--workers 4]
+  python nlk_batch_validation.py --benchmark 1000000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_code_index import STATUS_NOT_YET_VALID, STATUS_RETIRED, STATUS_UNKNOWN, STATUS_VALID
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_processing.csv"
+
+# Status codes used in result arrays, in STATUSES order
+VALID, UNKNOWN, RETIRED, NOT_YET_VALID = range(4)
+STATUSES = (STATUS_VALID, STATUS_UNKNOWN, STATUS_RETIRED, STATUS_NOT_YET_VALID)
+
+_MIN_DATE = np.datetime64('0001-01-01T00:00:00', 's')
+_MAX_DATE = np.datetime64('9999-12-31T23:59:59', 's')
+
+
+def _to_datetime64(dates: Any, size: int) -> np.ndarray:
+    """
+    Convert observation dates to datetime64[s], using now for missing dates.
+
+    Raises:
+        ValueError: If a date is present but not a valid ISO 8601 date/dateTime
+    """
+    now = np.datetime64(pd.Timestamp.now().floor('s'), 's')
+    if dates is None:
+        return np.full(size, now)
+
+    series = pd.Series(dates, copy=False)
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        # ISO strings; time zone offsets are ignored as in the source data
+        text = series.astype('string').str.strip()
+        missing = (text.isna() | (text == '')).to_numpy()
+        series = pd.to_datetime(
+            text.str.slice(0, 19).str.replace(' ', 'T', regex=False),
+            errors='coerce', format='ISO8601'
+        )
+        invalid = np.flatnonzero(series.isna().to_numpy() & ~missing)
+        if len(invalid):
+            raise ValueError(f"Invalid date: {text.iloc[invalid[0]]!r} "
+                             f"({len(invalid):,} invalid date(s) in batch)")
+    elif getattr(series.dt, 'tz', None) is not None:
+        series = series.dt.tz_localize(None)
+
+    values = series.to_numpy(dtype='datetime64[s]')
+    return np.where(np.isnat(values), now, values)
+
+
+class NLKBatchValidator:
+    """Vectorized code validator built from the processed NLK codebook."""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Initialize from codebook data.
+
+        Args:
+            df: DataFrame with kode, gyldig_fra, gyldig_til and erstattes_av columns
+        """
+        df = df[['kode', 'gyldig_fra', 'gyldig_til', 'erstattes_av']].copy()
+        df = df[df['kode'].notna()]
+        df['kode'] = df['kode'].astype(str).str.strip()
+
+        valid_from = pd.to_datetime(df['gyldig_fra'], errors='coerce').to_numpy(dtype='datetime64[s]')
+        valid_to = pd.to_datetime(df['gyldig_til'], errors='coerce').to_numpy(dtype='datetime64[s]')
+        df['_from'] = np.where(np.isnat(valid_from), _MIN_DATE, valid_from)
+        df['_to'] = np.where(np.isnat(valid_to), _MAX_DATE, valid_to)
+
+        df = df.sort_values(['kode', '_from'], kind='stable').reset_index(drop=True)
+
+        self.valid_from = df['_from'].to_numpy(dtype='datetime64[s]')
+        self.valid_to = df['_to'].to_numpy(dtype='datetime64[s]')
+        self.replaced_by = df['erstattes_av'].astype(object).where(df['erstattes_av'].notna(), None).to_numpy()
+
+        # Hash index: distinct code -> first version row and version count
+        codes = df['kode'].to_numpy(dtype=object)
+        unique_codes, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+        self.code_index = pd.Index(unique_codes)
+        self.starts = starts.astype(np.int64)
+        self.counts = counts.astype(np.int64)
+        self.max_versions = int(counts.max()) if len(counts) else 0
+        self.codes: FrozenSet[str] = frozenset(unique_codes)
+
+        logger.info(f"Batch validator ready: {len(self.codes):,} codes, {len(df):,} versions")
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> 'NLKBatchValidator':
+        """Build the validator from a processed NLK CSV file."""
+        df = pd.read_csv(csv_path, encoding='utf-8', dtype=str,
+                         usecols=['kode', 'gyldig_fra', 'gyldig_til', 'erstattes_av'])
+        return cls(df)
+
+    def is_known(self, code: str) -> bool:
+        """Check whether a code exists in the codebook (any version)."""
+        return code in self.codes
+
+    def validate_batch(self, codes: Sequence[str], dates: Any = None) -> Dict[str, np.ndarray]:
+        """
+        Classify (code, date) pairs.
+
+        Args:
+            codes: Array-like of codes
+            dates: Array-like of observation dates (datetime or ISO strings),
+                   or None to validate at the current time; missing
+                   entries are also validated at the current time
+
+        Returns:
+            dict: 'status' (int8 codes, see STATUSES) and 'replaced_by'
+                  (replacement code for retired codes, else None)
+
+        Raises:
+            ValueError: If a date is not a valid ISO 8601 date/dateTime
+        """
+        codes = np.asarray(codes, dtype=object)
+        n = len(codes)
+        obs = _to_datetime64(dates, n)
+
+        code_pos = self.code_index.get_indexer(codes)
+        known = code_pos >= 0
+        start = np.where(known, self.starts[code_pos], 0)
+        count = np.where(known, self.counts[code_pos], 0)
+
+        status = np.full(n, UNKNOWN, dtype=np.int8)
+        status[known] = NOT_YET_VALID
+        expired_row = np.full(n, -1, dtype=np.int64)
+
+        # Most codes have a single version; loop over version slots, not rows
+        for slot in range(self.max_versions):
+            has_slot = slot < count
+            if not has_slot.any():
+                break
+            row = np.where(has_slot, start + slot, 0)
+
+            valid = has_slot & (self.valid_from[row] <= obs) & (obs <= self.valid_to[row])
+            status[valid] = VALID
+
+            expired = has_slot & (self.valid_to[row] < obs) & (status != VALID)
+            expired_row[expired] = row[expired]
+
+        retired = (status == NOT_YET_VALID) & (expired_row >= 0)
+        status[retired] = RETIRED
+
+        replaced_by = np.full(n, None, dtype=object)
+        replaced_by[retired] = self.replaced_by[expired_row[retired]]
+
+        return {'status': status, 'replaced_by': replaced_by}
+
+    def validate_frame(self, df: pd.DataFrame, code_column: str = 'code',
+                       date_column: Optional[str] = 'date') -> pd.DataFrame:
+        """Classify a DataFrame of observations, returning it with status columns added."""
+        dates = df[date_column] if date_column and date_column in df.columns else None
+        result = self.validate_batch(df[code_column].to_numpy(dtype=object), dates)
+
+        out = df.copy()
+        out['status'] = pd.Categorical.from_codes(result['status'], categories=list(STATUSES))
+        out['replaced_by'] = result['replaced_by']
+        return out
+
+
+def summarize(status: np.ndarray) -> Dict[str, int]:
+    """Count classifications in a status array."""
+    counts = np.bincount(status, minlength=len(STATUSES))
+    return {name: int(counts[i]) for i, name in enumerate(STATUSES)}
+
+
+# ----------------------------------------------------------------------
+# Parallel NDJSON validation
+# ----------------------------------------------------------------------
+
+_worker_validator: Optional[NLKBatchValidator] = None
+
+
+def _init_worker(validator: NLKBatchValidator) -> None:
+    """Process pool initializer: keep one validator per worker."""
+    global _worker_validator
+    _worker_validator = validator
+
+
+def _byte_ranges(path: Path, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into byte ranges aligned to line boundaries."""
+    size = path.stat().st_size
+    boundaries = [0]
+
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(max(boundaries[-1], size * i // parts))
+            f.readline()
+            boundaries.append(min(f.tell(), size))
+
+    boundaries.append(size)
+    return [(a, b) for a, b in zip(boundaries, boundaries[1:]) if b > a]
+
+
+def _iter_ndjson_chunks(path: Path, start: int, end: int, chunk_size: int) -> Iterable[pd.DataFrame]:
+    """Read (code, date) pairs from a byte range of an NDJSON file in chunks."""
+    codes: List[Optional[str]] = []
+    dates: List[Optional[str]] = []
+
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            record = json.loads(line)
+            codes.append(record.get('code'))
+            dates.append(record.get('date'))
+
+            if len(codes) >= chunk_size:
+                yield pd.DataFrame({'code': codes, 'date': dates})
+                codes, dates = [], []
+
+    if codes:
+        yield pd.DataFrame({'code': codes, 'date': dates})
+
+
+def _validate_range(path: str, start: int, end: int, chunk_size: int,
+                    output_path: Optional[str]) -> Dict[str, int]:
+    """Worker: validate one byte range, optionally writing results to a part file."""
+    totals = dict.fromkeys(STATUSES, 0)
+    first = True
+
+    for chunk in _iter_ndjson_chunks(Path(path), start, end, chunk_size):
+        result = _worker_validator.validate_frame(chunk)
+
+        for name, count in summarize(result['status'].cat.codes.to_numpy()).items():
+            totals[name] += count
+
+        if output_path:
+            result.to_csv(output_path, mode='w' if first else 'a', header=first, index=False)
+            first = False
+
+    return totals
+
+
+def validate_ndjson_file(validator: NLKBatchValidator, path: str, output_path: Optional[str] = None,
+                         workers: int = 1, chunk_size: int = 100000) -> Dict[str, int]:
+    """
+    Validate an NDJSON file of {"code", "date"} objects, in parallel for large files.
+
+    Args:
+        validator: Batch validator to use (sent once to each worker)
+        path: NDJSON input file
+        output_path: Optional CSV file for per-line results (code, date, status, replaced_by)
+        workers: Number of worker processes
+        chunk_size: Lines per vectorized batch
+
+    Returns:
+        dict: Counts per classification
+    """
+    input_path = Path(path)
+    ranges = _byte_ranges(input_path, max(1, workers))
+    part_paths = [f"{output_path}.part{i}" if output_path else None for i in range(len(ranges))]
+
+    if workers <= 1:
+        _init_worker(validator)
+        results = [_validate_range(path, start, end, chunk_size, part)
+                   for (start, end), part in zip(ranges, part_paths)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(validator,)) as executor:
+            futures = [executor.submit(_validate_range, path, start, end, chunk_size, part)
+                       for (start, end), part in zip(ranges, part_paths)]
+            results = [future.result() for future in futures]
+
+    if output_path:
+        # Concatenate part files in input order, keeping the first header only
+        with open(output_path, 'wb') as out:
+            for i, part in enumerate(part_paths):
+                if not Path(part).exists():
+                    continue
+                with open(part, 'rb') as f:
+                    header = f.readline()
+                    if i == 0 or out.tell() == 0:
+                        out.write(header)
+                    out.write(f.read())
+                os.remove(part)
+
+    totals = dict.fromkeys(STATUSES, 0)
+    for result in results:
+        for name, count in result.items():
+            totals[name] += count
+    return totals
+
+
+def run_benchmark(validator: NLKBatchValidator, n: int, seed: int = 0) -> Dict[str, float]:
+    """Measure batch validation throughput on n random (code, date) pairs."""
+    rng = np.random.default_rng(seed)
+    known = np.array(sorted(validator.codes), dtype=object)
+    unknown = np.array([f"XXX{i:05d}" for i in range(1000)], dtype=object)
+
+    codes = np.where(rng.random(n) < 0.95, known[rng.integers(0, len(known), n)],
+                     unknown[rng.integers(0, len(unknown), n)])
+    base = np.datetime64('2010-01-01T00:00:00', 's')
+    dates = base + rng.integers(0, 16 * 365 * 86400, n).astype('timedelta64[s]')
+
+    started = time.perf_counter()
+    result = validator.validate_batch(codes, dates)
+    elapsed = time.perf_counter() - started
+
+    return {'codes': n, 'seconds': elapsed, 'codes_per_second': n / elapsed if elapsed else float('inf'),
+            **summarize(result['status'])}
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Batch-validate NLK codes with observation dates")
+    parser.add_argument("input_file", nargs="?", help="NDJSON file of {\"code\": ..., \"date\": ...} objects")
+    parser.add_argument("--csv-file", default=DEFAULT_CSV, help="Processed NLK CSV file")
+    parser.add_argument("--output", help="CSV file for per-line results")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for NDJSON input (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Lines per batch (default: 100000)")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="Measure throughput on N random (code, date) pairs")
+
+    args = parser.parse_args()
+
+    if not args.input_file and not args.benchmark:
+        parser.error("an input file or --benchmark is required")
+
+    if not Path(args.csv_file).exists():
+        print(f"❌ CSV file not found: {args.csv_file}")
+        return 1
+
+    validator = NLKBatchValidator.from_csv(args.csv_file)
+
+    if args.benchmark:
+        stats = run_benchmark(validator, args.benchmark)
+        print(f"⚡ Validated {stats['codes']:,} codes in {stats['seconds']:.3f} s "
+              f"({stats['codes_per_second']:,.0f} codes/s)")
+        for name in STATUSES:
+            print(f"   {name}: {stats[name]:,}")
+        return 0
+
+    if not Path(args.input_file).exists():
+        print(f"❌ Input file not found: {args.input_file}")
+        return 1
+
+    started = time.perf_counter()
+    try:
+        totals = validate_ndjson_file(validator, args.input_file, args.output,
+                                      workers=args.workers, chunk_size=args.chunk_size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - started
+    total = sum(totals.values())
+
+    print(f"📊 Validated {total:,} codes in {elapsed:.2f} s ({total / elapsed if elapsed else 0:,.0f} codes/s)")
+    for name in STATUSES:
+        print(f"   {name}: {totals[name]:,}")
+    if args.output:
+        print(f"💾 Results written to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
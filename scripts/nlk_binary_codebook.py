@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Compact Memory-Mappable NLK Codebook
+
+Writes the processed NLK CSV to a compact binary file that worker processes
+open via mmap instead of loading the CSV into pandas. All processes opening
+the same file share one read-only, page-cached copy, and opening it takes
+milliseconds.
+
+File layout (all integers little-endian, sections 8-byte aligned):
+
+  magic  b'NLKB'                    4 bytes
+  header length                     uint32
+  header                            JSON: version, row count, columns, sections
+  codes                             n_rows fixed-width byte strings, sorted
+  string offsets                    (n_strings + 1) uint64 offsets into the pool
+  column string ids                 n_columns x n_rows uint32, column-major
+  string pool                       UTF-8 bytes of all distinct values
+
+Every distinct value (units, domains, dates, ...) is stored once in the
+string pool; string id 0 is the empty string, used for missing values.
+Rows are sorted by code (then valid-from date) so codes are found by binary
+search on the fixed-width code array.
+
+Usage:
+  python nlk_binary_codebook.py build [csv_file] [output_file]
+  python nlk_binary_codebook.py lookup <codebook_file> <code> [...]
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NLKB'
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+DEFAULT_CSV = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_processing.csv"
+DEFAULT_OUTPUT = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean.nlkb"
+
+
+def _pad(length: int) -> bytes:
+    """Padding needed to align a length to ALIGNMENT."""
+    return b'\0' * (-length % ALIGNMENT)
+
+
+def write_binary_codebook(df: pd.DataFrame, output_path: str) -> str:
+    """
+    Write a DataFrame in the NLK CSV schema to a binary codebook file.
+
+    Args:
+        df: Codebook data; all columns are stored as strings
+        output_path: Output file path
+
+    Returns:
+        str: Path of the written file
+    """
+    if 'kode' not in df.columns:
+        raise ValueError("Codebook data must contain a 'kode' column")
+
+    df = df.fillna('').astype(str)
+    sort_columns = ['kode'] + (['gyldig_fra'] if 'gyldig_fra' in df.columns else [])
+    df = df.sort_values(sort_columns, kind='stable').reset_index(drop=True)
+
+    columns = list(df.columns)
+    n_rows = len(df)
+
+    # Intern all values in one string pool, with '' as string id 0
+    all_values = np.concatenate([np.array([''], dtype=object)] +
+                                [df[col].to_numpy(dtype=object) for col in columns])
+    string_ids, strings = pd.factorize(all_values)
+    column_ids = string_ids[1:].astype(np.uint32).reshape(len(columns), n_rows)
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    pool = b''.join(encoded)
+
+    code_bytes = df['kode'].str.encode('utf-8')
+    code_width = max(1, int(code_bytes.str.len().max())) if n_rows else 1
+    codes = np.array(code_bytes.tolist(), dtype=f'S{code_width}')
+
+    sections = [
+        ('codes', codes.tobytes(), f'S{code_width}', n_rows),
+        ('string_offsets', offsets.tobytes(), '<u8', len(offsets)),
+        ('column_ids', column_ids.astype('<u4').tobytes(), '<u4', column_ids.size),
+        ('string_pool', pool, 'u1', len(pool)),
+    ]
+
+    # Header size depends on section offsets, so lay out sections relative to the data start
+    layout = {}
+    position = 0
+    for name, data, dtype, count in sections:
+        layout[name] = {'offset': position, 'dtype': dtype, 'count': count}
+        position += len(data) + len(_pad(len(data)))
+
+    header = {
+        'version': FORMAT_VERSION,
+        'rows': n_rows,
+        'strings': len(encoded),
+        'columns': columns,
+        'code_width': code_width,
+        'sections': layout,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    preamble = MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes
+    preamble += _pad(len(preamble))
+
+    output_file = Path(output_path)
+    with open(output_file, 'wb') as f:
+        f.write(preamble)
+        for _, data, _, _ in sections:
+            f.write(data)
+            f.write(_pad(len(data)))
+
+    logger.info(f"Wrote binary codebook: {output_file} ({n_rows:,} rows, {len(encoded):,} distinct strings, "
+                f"{output_file.stat().st_size / 1024**2:.2f} MB)")
+    return str(output_file)
+
+
+def build_from_csv(csv_path: str, output_path: str) -> str:
+    """Build a binary codebook from a processed NLK CSV file."""
+    logger.info(f"Loading CSV data from: {csv_path}")
+    df = pd.read_csv(csv_path, encoding='utf-8', dtype=str, keep_default_na=False)
+    return write_binary_codebook(df, output_path)
+
+
+class NLKBinaryCodebook:
+    """Read-only, memory-mapped view of a binary codebook with a dict-like API."""
+
+    def __init__(self, path: str):
+        """
+        Open a binary codebook file.
+
+        Args:
+            path: Path written by write_binary_codebook
+        """
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:4] != MAGIC:
+            self.close()
+            raise ValueError(f"Not an NLK binary codebook: {self.path}")
+
+        header_length = struct.unpack_from('<I', self._mmap, 4)[0]
+        header = json.loads(self._mmap[8:8 + header_length].decode('utf-8'))
+
+        if header['version'] != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported codebook format version: {header['version']}")
+
+        data_start = 8 + header_length
+        data_start += -data_start % ALIGNMENT
+
+        self.columns: List[str] = header['columns']
+        self.n_rows: int = header['rows']
+        self._column_index = {col: i for i, col in enumerate(self.columns)}
+
+        sections = {}
+        for name, section in header['sections'].items():
+            sections[name] = np.frombuffer(self._mmap, dtype=section['dtype'], count=section['count'],
+                                           offset=data_start + section['offset'])
+
+        self._codes = sections['codes']
+        self._offsets = sections['string_offsets']
+        self._column_ids = sections['column_ids'].reshape(len(self.columns), self.n_rows)
+        self._pool_offset = data_start + header['sections']['string_pool']['offset']
+        self._n_codes: Optional[int] = None
+
+    def close(self) -> None:
+        """Release the memory map and file handle."""
+        # Drop numpy views before closing the map they point into
+        for attr in ('_codes', '_offsets', '_column_ids'):
+            self.__dict__.pop(attr, None)
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'NLKBinaryCodebook':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _string(self, string_id: int) -> Optional[str]:
+        """Decode a string from the pool (None for the empty string)."""
+        if string_id == 0:
+            return None
+        start = self._pool_offset + int(self._offsets[string_id])
+        end = self._pool_offset + int(self._offsets[string_id + 1])
+        return self._mmap[start:end].decode('utf-8')
+
+    def _row(self, row: int) -> Dict[str, Optional[str]]:
+        """Decode one row as a column -> value dict."""
+        return {col: self._string(int(self._column_ids[i, row])) for i, col in enumerate(self.columns)}
+
+    def _row_range(self, code: str) -> range:
+        """Rows holding versions of a code, found by binary search."""
+        key = code.encode('utf-8')
+        if len(key) > self._codes.dtype.itemsize:
+            return range(0)
+        start = int(np.searchsorted(self._codes, key, side='left'))
+        end = int(np.searchsorted(self._codes, key, side='right'))
+        return range(start, end)
+
+    def get_versions(self, code: str) -> List[Dict[str, Optional[str]]]:
+        """Get all versions (rows) of a code, ordered by valid-from date."""
+        return [self._row(row) for row in self._row_range(code)]
+
+    def get_value(self, code: str, column: str) -> Optional[str]:
+        """Get one column of the latest version of a code without decoding the whole row."""
+        rows = self._row_range(code)
+        if not rows:
+            raise KeyError(code)
+        return self._string(int(self._column_ids[self._column_index[column], rows[-1]]))
+
+    def get(self, code: str, default: Any = None) -> Any:
+        """Get the latest version of a code, or default if unknown."""
+        rows = self._row_range(code)
+        return self._row(rows[-1]) if rows else default
+
+    def __getitem__(self, code: str) -> Dict[str, Optional[str]]:
+        rows = self._row_range(code)
+        if not rows:
+            raise KeyError(code)
+        return self._row(rows[-1])
+
+    def __contains__(self, code: str) -> bool:
+        return len(self._row_range(code)) > 0
+
+    def __len__(self) -> int:
+        if self._n_codes is None:
+            self._n_codes = len(np.unique(self._codes))
+        return self._n_codes
+
+    def keys(self) -> List[str]:
+        """Distinct codes in sorted order."""
+        return [code.decode('utf-8') for code in np.unique(self._codes)]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Build or query a memory-mappable NLK codebook")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build a codebook from the processed CSV")
+    build_parser.add_argument("csv_file", nargs="?", default=DEFAULT_CSV, help="Processed NLK CSV file")
+    build_parser.add_argument("output_file", nargs="?", default=DEFAULT_OUTPUT, help="Output codebook file")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Look up codes in a codebook")
+    lookup_parser.add_argument("codebook_file", help="Codebook file")
+    lookup_parser.add_argument("codes", nargs="+", help="Codes to look up")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not Path(args.csv_file).exists():
+            print(f"❌ CSV file not found: {args.csv_file}")
+            return 1
+        output_file = build_from_csv(args.csv_file, args.output_file)
+        print(f"✅ Binary codebook written to: {output_file}")
+        return 0
+
+    with NLKBinaryCodebook(args.codebook_file) as codebook:
+        for code in args.codes:
+            entry = codebook.get(code)
+            if entry is None:
+                print(f"❌ {code}: unknown code")
+            else:
+                print(json.dumps(entry, ensure_ascii=False, indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
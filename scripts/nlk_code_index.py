@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+In-memory NLK Code Index
+
+Hash index on `kode` built from the processed NLK CSV, with validity-date
+aware lookups. Codes may have several versions (rows) with different
+validity periods; lookups return the version valid at a given date and
+classify codes as valid, unknown, retired or not yet valid.
+
+Dates are kept as ISO 8601 strings ('YYYY-MM-DDTHH:MM:SS'), which compare
+correctly as plain strings and keep single lookups in the microsecond range.
+"""
+
+import logging
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from process_nlk_csv import NDJSON_PROPERTIES, NLKDataProcessor
+
+logger = logging.getLogger(__name__)
+
+# Canonical URLs used for the NLK CodeSystems in this IG
+NLK_SYSTEM_URL = "http://hl7.no/fhir/ig/nlk-test/CodeSystem/norsk-laboratoriekodeverk"
+NLK_SYSTEM_URLS = frozenset({
+    NLK_SYSTEM_URL,
+    "http://hl7.no/fhir/ig/nlk-test/CodeSystem/norsk-laboratoriekodeverk-detailed",
+    "http://hl7.no/fhir/ig/nlk-test/CodeSystem/norsk-laboratoriekodeverk-medical-genetics",
+    "http://ehelse.no/fhir/CodeSystem/norsk-laboratoriekodeverk",
+})
+
+# Code classifications
+STATUS_VALID = 'valid'
+STATUS_UNKNOWN = 'unknown'
+STATUS_RETIRED = 'retired'
+STATUS_NOT_YET_VALID = 'not-yet-valid'
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+def normalize_date(value: Any = None) -> str:
+    """
+    Normalize a date/dateTime to a comparable 'YYYY-MM-DDTHH:MM:SS' string.
+
+    Accepts None (now), datetime/Timestamp objects and ISO strings such as
+    '2024-01-31' (midnight), '2024-01-31 12:00:00' or
+    '2024-01-31T12:00:00+01:00' (the time zone offset is ignored, as in the
+    source data).
+
+    Raises:
+        ValueError: If the value is not a valid ISO 8601 date/dateTime
+    """
+    if value is None:
+        return datetime.now().strftime(ISO_FORMAT)
+    if isinstance(value, datetime):
+        return value.strftime(ISO_FORMAT)
+    try:
+        return datetime.fromisoformat(str(value).strip()).strftime(ISO_FORMAT)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r}") from None
+
+
+@dataclass
+class CodeVersion:
+    """One version (CSV row) of an NLK code."""
+    code: str
+    display: Optional[str]
+    valid_from: Optional[str]
+    valid_to: Optional[str]
+    replaced_by: Optional[str] = None
+    definition: Optional[str] = None
+    properties: Dict[str, str] = field(default_factory=dict)
+
+    def is_valid_at(self, date: str) -> bool:
+        """Check whether this version is valid at a normalized date."""
+        if self.valid_from is not None and date < self.valid_from:
+            return False
+        if self.valid_to is not None and date > self.valid_to:
+            return False
+        return True
+
+
+class NLKCodeIndex:
+    """Hash index of NLK code versions keyed by `kode`."""
+
+    def __init__(self, versions_by_code: Dict[str, List[CodeVersion]]):
+        """
+        Initialize with code versions.
+
+        Args:
+            versions_by_code: Code -> versions, sorted by valid_from
+        """
+        self.versions_by_code = versions_by_code
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'NLKCodeIndex':
+        """Build the index from a DataFrame in the NLK CSV schema."""
+        df = df.copy()
+
+        for col in ['gyldig_fra', 'gyldig_til', 'endringsdato']:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime(ISO_FORMAT)
+
+        df = df.astype(object).where(df.notna(), None)
+
+        string_properties = [
+            (col, prop_code) for col, prop_code, value_type in NDJSON_PROPERTIES
+            if value_type == 'valueString' and col in df.columns
+        ]
+
+        versions_by_code: Dict[str, List[CodeVersion]] = {}
+
+        for record in df.to_dict('records'):
+            if record.get('kode') is None:
+                continue
+
+            code = str(record['kode']).strip()
+            properties = {
+                prop_code: str(record[col]).strip()
+                for col, prop_code in string_properties
+                if record[col] is not None and str(record[col]).strip()
+            }
+
+            versions_by_code.setdefault(code, []).append(CodeVersion(
+                code=code,
+                display=record.get('norsk_bruksnavn'),
+                valid_from=record.get('gyldig_fra'),
+                valid_to=record.get('gyldig_til'),
+                replaced_by=record.get('erstattes_av'),
+                definition=record.get('kodedefinisjon'),
+                properties=properties
+            ))
+
+        for versions in versions_by_code.values():
+            versions.sort(key=lambda version: version.valid_from or '')
+
+        logger.info(f"Indexed {len(versions_by_code):,} codes ({len(df):,} versions)")
+        return cls(versions_by_code)
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> 'NLKCodeIndex':
+        """Build the index from a processed NLK CSV file."""
+        return cls.from_dataframe(NLKDataProcessor(csv_path).df)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.versions_by_code
+
+    def __len__(self) -> int:
+        return len(self.versions_by_code)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.versions_by_code)
+
+    def classify(self, code: str, date: Any = None) -> Tuple[str, Optional[CodeVersion]]:
+        """
+        Classify a code at a date.
+
+        Args:
+            code: NLK code
+            date: Date to check validity at (default: now)
+
+        Returns:
+            tuple: (status, version) where version is the valid version, the
+                   next version for not-yet-valid codes or the most recently
+                   expired version for retired codes (None if unknown)
+
+        Raises:
+            ValueError: If the date is not a valid ISO 8601 date/dateTime
+        """
+        date = normalize_date(date)
+        versions = self.versions_by_code.get(code)
+        if not versions:
+            return STATUS_UNKNOWN, None
+
+        expired = None
+
+        for version in versions:
+            if version.is_valid_at(date):
+                return STATUS_VALID, version
+            if version.valid_from is not None and date < version.valid_from:
+                # Versions are sorted, so this is the next version to become valid
+                if expired is None:
+                    return STATUS_NOT_YET_VALID, version
+                break
+            expired = version
+
+        return STATUS_RETIRED, expired
+
+    def lookup(self, code: str, date: Any = None) -> Optional[CodeVersion]:
+        """Get the version of a code valid at a date, or its closest version if none is."""
+        return self.classify(code, date)[1]
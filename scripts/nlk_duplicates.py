@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+NLK Duplicate Detection
+
+Finds duplicate rows with 64-bit row fingerprints instead of comparing the
+rows themselves. Every column is hashed once (vectorized, pandas'
+hash_array) and the column hashes are combined into three fingerprints:
+
+  - all columns            -> exact duplicates
+  - the key columns        -> key duplicates (e.g. several versions of one kode)
+  - the remaining columns  -> same content under different keys (one row per key)
+
+Only the hashes (24 bytes per row) are kept, so CSV files can be scanned in
+chunks with small memory. Groups are found by sorting the hashes:
+
+    finder = DuplicateFinder(['kode'])
+    for chunk in pd.read_csv(path, dtype=str, chunksize=100000):
+        finder.add(chunk)
+    result = finder.finish()
+    for group in result.key_groups:
+        group.rows  # row positions in input order
+
+Two different rows share a 64-bit hash with negligible probability
+(about n^2 / 2^65, i.e. ~3e-6 for ten million rows).
+
+Usage:
+  python nlk_duplicates.py [csv_file] [--key kode] [--ignore gyldig_fra ...]
+                           [--chunk-size N] [--output groups.csv]
+"""
+
+import argparse
+import logging
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_full.csv"
+DEFAULT_CHUNK_SIZE = 100000
+
+DUPLICATE_KINDS = ('exact', 'key', 'content')
+
+
+@dataclass
+class DuplicateGroup:
+    """Rows sharing a fingerprint."""
+    kind: str            # 'exact', 'key' or 'content'
+    rows: np.ndarray     # row positions in input order, ascending
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+
+@dataclass
+class DuplicateResult:
+    """Duplicate groups of one input, per kind."""
+    total_rows: int = 0
+    key_columns: List[str] = field(default_factory=list)
+    content_columns: List[str] = field(default_factory=list)
+    exact_groups: List[DuplicateGroup] = field(default_factory=list)
+    key_groups: List[DuplicateGroup] = field(default_factory=list)
+    content_groups: List[DuplicateGroup] = field(default_factory=list)
+
+    def groups(self, kind: str) -> List[DuplicateGroup]:
+        """Groups of one kind ('exact', 'key' or 'content')."""
+        return getattr(self, f"{kind}_groups")
+
+    def repeated_rows(self, kind: str) -> np.ndarray:
+        """
+        Rows that repeat an earlier row of their group, ascending.
+
+        These are the rows pandas' duplicated() marks (keep='first').
+        """
+        groups = self.groups(kind)
+        if not groups:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([group.rows[1:] for group in groups]))
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per group member: kind, group id, row."""
+        records = [
+            (kind, group_id, int(row))
+            for kind in DUPLICATE_KINDS
+            for group_id, group in enumerate(self.groups(kind))
+            for row in group.rows
+        ]
+        return pd.DataFrame(records, columns=['kind', 'group', 'row'])
+
+
+def column_hashes(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Hash every value of each column to uint64 (missing values hash alike)."""
+    return {col: pd.util.hash_array(df[col].to_numpy(dtype=object)) for col in df.columns}
+
+
+def combine_hashes(hashes: Dict[str, np.ndarray], columns: Sequence[str], rows: int) -> np.ndarray:
+    """
+    Combine per-column hashes into one 64-bit fingerprint per row.
+
+    The combination depends on column order, so ('a', 'b') and ('b', 'a')
+    values in two columns do not collide.
+
+    Args:
+        hashes: Per-column hashes from column_hashes
+        columns: Columns to include
+        rows: Number of rows
+
+    Returns:
+        np.ndarray: uint64 fingerprint per row
+    """
+    combined = np.full(rows, 0x345678, dtype=np.uint64)
+    multiplier = np.uint64(1000003)
+    with np.errstate(over='ignore'):
+        for col in columns:
+            combined = (combined * multiplier) ^ hashes[col]
+    return combined
+
+
+def fingerprint_rows(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Hash each row (or a subset of its columns) to a 64-bit fingerprint.
+
+    Args:
+        df: Rows to hash
+        columns: Columns to include (default: all)
+
+    Returns:
+        np.ndarray: uint64 fingerprint per row
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    return combine_hashes(column_hashes(df[columns]), columns, len(df))
+
+
+def _hash_runs(hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sort hashes and return (order, run starts, run lengths) of equal-hash runs."""
+    order = np.argsort(hashes, kind='stable')
+    sorted_hashes = hashes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_hashes[1:] != sorted_hashes[:-1]])
+    lengths = np.diff(np.r_[starts, len(hashes)])
+    return order, starts, lengths
+
+
+def group_by_hash(hashes: np.ndarray, kind: str) -> List[DuplicateGroup]:
+    """
+    Group row positions with equal hashes.
+
+    Args:
+        hashes: Fingerprint per row
+        kind: Kind recorded on the groups
+
+    Returns:
+        list: Groups of two or more rows, ordered by their first row
+    """
+    if len(hashes) == 0:
+        return []
+    order, starts, lengths = _hash_runs(hashes)
+    # The stable sort keeps rows ascending within a run
+    return sorted((DuplicateGroup(kind, order[start:start + length])
+                   for start, length in zip(starts, lengths) if length > 1),
+                  key=lambda group: group.rows[0])
+
+
+class DuplicateFinder:
+    """Accumulates row fingerprints chunk by chunk and groups them at the end."""
+
+    def __init__(self, key_columns: Sequence[str], content_columns: Optional[Sequence[str]] = None,
+                 ignore_columns: Sequence[str] = ()):
+        """
+        Args:
+            key_columns: Columns identifying a record (e.g. ['kode'])
+            content_columns: Columns compared for "same content, different key"
+                (default: all columns except the key and ignored columns)
+            ignore_columns: Columns left out of the default content columns
+                (e.g. validity dates that differ between otherwise equal rows)
+        """
+        self.key_columns = list(key_columns)
+        self.content_columns = list(content_columns) if content_columns is not None else None
+        self.ignore_columns = list(ignore_columns)
+        self.total_rows = 0
+        self._row_hashes: List[np.ndarray] = []
+        self._key_hashes: List[np.ndarray] = []
+        self._content_hashes: List[np.ndarray] = []
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Fingerprint the next rows; positions continue from the previous chunk."""
+        if self.content_columns is None:
+            excluded = set(self.key_columns) | set(self.ignore_columns)
+            self.content_columns = [c for c in chunk.columns if c not in excluded]
+
+        # Each column is hashed once; the three fingerprints only combine them
+        hashes = column_hashes(chunk)
+        self._row_hashes.append(combine_hashes(hashes, chunk.columns, len(chunk)))
+        self._key_hashes.append(combine_hashes(hashes, self.key_columns, len(chunk)))
+        self._content_hashes.append(combine_hashes(hashes, self.content_columns, len(chunk)))
+        self.total_rows += len(chunk)
+
+    def finish(self) -> DuplicateResult:
+        """Group the accumulated fingerprints."""
+        row_hashes = np.concatenate(self._row_hashes) if self._row_hashes else np.empty(0, dtype=np.uint64)
+        key_hashes = np.concatenate(self._key_hashes) if self._key_hashes else np.empty(0, dtype=np.uint64)
+        content_hashes = (np.concatenate(self._content_hashes) if self._content_hashes
+                          else np.empty(0, dtype=np.uint64))
+
+        result = DuplicateResult(
+            total_rows=self.total_rows,
+            key_columns=self.key_columns,
+            content_columns=self.content_columns or [],
+            exact_groups=group_by_hash(row_hashes, 'exact'),
+            key_groups=group_by_hash(key_hashes, 'key'),
+        )
+
+        # Same content, different key: keep the first row of each (content, key)
+        # pair, then group those rows by content. Every group member has a key
+        # no earlier member has; rows repeating a key are exact or key duplicates.
+        if len(content_hashes):
+            order = np.lexsort((np.arange(len(content_hashes)), key_hashes, content_hashes))
+            content_sorted, key_sorted = content_hashes[order], key_hashes[order]
+            first_of_pair = np.r_[True, (content_sorted[1:] != content_sorted[:-1]) |
+                                        (key_sorted[1:] != key_sorted[:-1])]
+            kept = np.sort(order[first_of_pair])
+            result.content_groups = [DuplicateGroup('content', kept[group.rows])
+                                     for group in group_by_hash(content_hashes[kept], 'content')]
+
+        return result
+
+
+def find_duplicates(df: pd.DataFrame, key_columns: Sequence[str],
+                    content_columns: Optional[Sequence[str]] = None,
+                    ignore_columns: Sequence[str] = ()) -> DuplicateResult:
+    """
+    Find exact, key and same-content duplicates in a DataFrame.
+
+    Args:
+        df: Data to check
+        key_columns: Columns identifying a record
+        content_columns: Columns compared across different keys (default: all others)
+        ignore_columns: Columns left out of the default content columns
+
+    Returns:
+        DuplicateResult: Groups with row positions into df
+    """
+    finder = DuplicateFinder(key_columns, content_columns, ignore_columns)
+    finder.add(df)
+    return finder.finish()
+
+
+def find_duplicates_in_csv(csv_path: str, key_columns: Sequence[str],
+                           content_columns: Optional[Sequence[str]] = None,
+                           ignore_columns: Sequence[str] = (),
+                           chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           encoding: str = 'utf-8-sig') -> DuplicateResult:
+    """
+    Find duplicates in a CSV file, reading it in chunks.
+
+    Args:
+        csv_path: CSV file
+        key_columns: Columns identifying a record
+        content_columns: Columns compared across different keys (default: all others)
+        ignore_columns: Columns left out of the default content columns
+        chunk_size: Rows read per chunk
+        encoding: File encoding
+
+    Returns:
+        DuplicateResult: Groups with 0-based data row positions in the file
+    """
+    finder = DuplicateFinder(key_columns, content_columns, ignore_columns)
+    for chunk in pd.read_csv(csv_path, dtype=str, encoding=encoding, chunksize=chunk_size):
+        finder.add(chunk)
+        logger.info(f"Fingerprinted {finder.total_rows:,} rows")
+    return finder.finish()
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Find duplicate rows in an NLK CSV file by fingerprint")
+    parser.add_argument("csv_file", nargs="?", default=DEFAULT_CSV, help="NLK CSV file")
+    parser.add_argument("--key", nargs="+", default=['kode'], help="Key columns (default: kode)")
+    parser.add_argument("--ignore", nargs="*", default=[],
+                        help="Columns ignored when comparing content across keys (e.g. gyldig_fra gyldig_til)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows read per chunk (default: {DEFAULT_CHUNK_SIZE:,})")
+    parser.add_argument("--output", help="Write group members (kind, group, row) to this CSV file")
+
+    args = parser.parse_args()
+
+    if not Path(args.csv_file).exists():
+        print(f"❌ CSV file not found: {args.csv_file}")
+        return 1
+
+    result = find_duplicates_in_csv(args.csv_file, args.key, ignore_columns=args.ignore,
+                                     chunk_size=args.chunk_size)
+
+    print(f"\n🔍 Duplicate groups in {result.total_rows:,} rows (key: {', '.join(result.key_columns)}):")
+    labels = {'exact': 'Exact duplicates', 'key': 'Key duplicates', 'content': 'Same content, different key'}
+    for kind in DUPLICATE_KINDS:
+        groups = result.groups(kind)
+        print(f"   {labels[kind]:<30} {len(groups):>8,} groups, {len(result.repeated_rows(kind)):>10,} repeated rows")
+        for group in groups[:5]:
+            print(f"      rows {group.rows.tolist()}")
+
+    if args.output:
+        result.to_frame().to_csv(args.output, index=False, encoding='utf-8')
+        print(f"\n💾 Group members written to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
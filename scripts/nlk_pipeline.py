@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+In-Process NLK Pipeline API
+
+Runs the CSV -> cleaned -> deduplicated -> FSH chain on in-memory DataFrames.
+The source is parsed once into the canonical NLK frame and handed from stage
+to stage; intermediate CSVs (_full_cleaned.csv, _full_deduplicated.csv) are
+only written when materialization is requested.
+
+Canonical frame:
+  - The NLK columns in NLK_COLUMNS order, followed by any extra columns
+  - Every value a str (dates as 'YYYY-MM-DD HH:MM:SS' text), missing values NaN
+  - The strings in NA_VALUES (including 'nan' from str() round-trips) are missing
+
+Stages that need other types convert on their own copy (e.g. the FSH
+populator parses the date columns), so every stage accepts and returns
+frames under this one convention.
+
+Usage:
+  python nlk_pipeline.py input.csv|input.xlsx [--materialize DIR] [--fsh-output out.fsh]
+
+Programmatic usage:
+  result = NLKPipeline(materialize_dir="csv_output").run("..._full.csv", fsh_output="out.fsh")
+  result.deduplicated, result.fsh, result.report
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fix_fsh_duplicates import select_active_versions
+from populate_detailed_fsh import SYNTAX_MODES, SYNTAX_SINGLE_LINE, NLKDetailedFSHPopulator
+from validate_csv_quality import CSVQualityValidator, ValidationReport
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+NLK_COLUMNS = [
+    'kode', 'gyldig_fra', 'gyldig_til', 'erstattes_av', 'endringsdato', 'norsk_bruksnavn',
+    'kodedefinisjon', 'komponent', 'komponent_spesifikasjon', 'system', 'system_spesifikasjon',
+    'egenskapsart', 'egenskapsart_spesifikasjon', 'enhet', 'primært_fagområde',
+    'sekundært_fagområde', 'gruppering',
+]
+DATE_COLUMNS = ['gyldig_fra', 'gyldig_til', 'endringsdato']
+NA_VALUES = ['', 'nan', 'NaN', 'None', 'NULL', 'null', 'N/A', 'n/a', 'NA', 'na']
+
+
+def canonicalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a frame to the canonical NLK schema and null convention.
+
+    Args:
+        df: NLK data from any stage or reader
+
+    Returns:
+        pd.DataFrame: New frame with str values and NaN for missing values
+
+    Raises:
+        ValueError: If NLK columns are missing
+    """
+    missing = [col for col in NLK_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing NLK columns: {missing}")
+
+    columns = NLK_COLUMNS + [col for col in df.columns if col not in NLK_COLUMNS]
+    result = df[columns].astype(object)
+
+    for col in columns:
+        values = result[col]
+        null_mask = values.isna()
+        non_str = ~null_mask & ~values.map(type).eq(str)
+        if non_str.any():
+            values = values.where(~non_str, values[non_str].astype(str))
+        result[col] = values.mask(null_mask | values.isin(NA_VALUES), np.nan)
+
+    return result.reset_index(drop=True)
+
+
+def read_nlk_csv(csv_path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Parse an NLK CSV file (with or without BOM) into the canonical frame.
+
+    Args:
+        csv_path: Path to an NLK CSV file
+
+    Returns:
+        pd.DataFrame: Canonical NLK frame
+    """
+    df = pd.read_csv(csv_path, encoding='utf-8-sig', dtype=str,
+                     na_values=NA_VALUES, keep_default_na=False)
+    return canonicalize(df)
+
+
+def read_nlk_source(source: Union[str, Path]) -> pd.DataFrame:
+    """Read an NLK CSV or Excel (.xlsx/.xls) file into the canonical frame."""
+    if Path(source).suffix.lower() in ('.xlsx', '.xls'):
+        from convert_excel_to_csv import read_nlk_excel
+        return canonicalize(read_nlk_excel(str(source)))
+    return read_nlk_csv(source)
+
+
+def write_nlk_csv(df: pd.DataFrame, csv_path: Union[str, Path]) -> Path:
+    """Write a canonical frame as UTF-8 CSV with empty fields for missing values."""
+    csv_path = Path(csv_path)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(csv_path, index=False, encoding='utf-8')
+    return csv_path
+
+
+def validate_and_clean(df: pd.DataFrame, source_name: str = '<dataframe>') -> Tuple[pd.DataFrame, CSVQualityValidator]:
+    """
+    Run the CSV quality checks on a frame and apply automatic cleaning.
+
+    Args:
+        df: Canonical NLK frame
+        source_name: Name shown as the file in the quality report
+
+    Returns:
+        tuple: (cleaned canonical frame, validator holding the report)
+    """
+    validator = CSVQualityValidator.from_dataframe(df, source_name)
+    validator.run_full_validation()
+    return canonicalize(validator.clean_data()), validator
+
+
+def deduplicate(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep one active version per code (see fix_fsh_duplicates.select_active_versions)."""
+    return canonicalize(select_active_versions(df))
+
+
+def render_codesystem_fsh(df: pd.DataFrame, source_name: str = '<dataframe>',
+                          syntax_mode: str = SYNTAX_SINGLE_LINE) -> str:
+    """
+    Render the detailed NLK CodeSystem FSH from a frame.
+
+    The default single-line property syntax is SUSHI-compliant, so no
+    fix_fsh_property_syntax.py pass is needed.
+
+    Args:
+        df: Canonical, deduplicated NLK frame
+        source_name: File name recorded in the FSH header
+        syntax_mode: Concept property syntax, 'multiline' or 'single-line'
+
+    Returns:
+        str: FSH content
+
+    Raises:
+        ValueError: If the frame cannot be rendered
+    """
+    populator = NLKDetailedFSHPopulator(source_name, syntax_mode=syntax_mode, df=df)
+    fsh = populator.render_populated_fsh()
+    if fsh is None:
+        raise ValueError("Could not render FSH CodeSystem from frame")
+    return fsh
+
+
+@dataclass
+class PipelineResult:
+    """Frames and artifacts produced by NLKPipeline.run."""
+    source: pd.DataFrame
+    cleaned: pd.DataFrame
+    deduplicated: pd.DataFrame
+    fsh: Optional[str]
+    validator: CSVQualityValidator
+    materialized: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def report(self) -> ValidationReport:
+        return self.validator.report
+
+
+class NLKPipeline:
+    """Runs the NLK stages on in-memory frames with optional file output."""
+
+    def __init__(self, materialize_dir: Optional[str] = None, base_name: Optional[str] = None,
+                 syntax_mode: str = SYNTAX_SINGLE_LINE, stop_on_critical: bool = True,
+                 quiet: bool = True):
+        """
+        Configure the pipeline.
+
+        Args:
+            materialize_dir: Write intermediate CSVs and the quality report here (None: keep in memory)
+            base_name: Prefix of materialized files (default: derived from the source file name)
+            syntax_mode: FSH concept property syntax, 'multiline' or 'single-line'
+            stop_on_critical: Raise RuntimeError if validation finds critical issues
+            quiet: Suppress the per-stage console output of the underlying scripts
+        """
+        if syntax_mode not in SYNTAX_MODES:
+            raise ValueError(f"Unsupported syntax mode: {syntax_mode}")
+
+        self.materialize_dir = Path(materialize_dir) if materialize_dir else None
+        self.base_name = base_name
+        self.syntax_mode = syntax_mode
+        self.stop_on_critical = stop_on_critical
+        self.quiet = quiet
+
+    def _run_stage(self, name: str, timings: Dict[str, float], func, *args):
+        started = time.perf_counter()
+        if self.quiet:
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                result = func(*args)
+        else:
+            result = func(*args)
+        timings[name] = round(time.perf_counter() - started, 4)
+        return result
+
+    def run(self, source: Union[str, Path, pd.DataFrame], fsh_output: Optional[str] = None,
+            render_fsh: bool = True) -> PipelineResult:
+        """
+        Run all stages.
+
+        Args:
+            source: NLK CSV/Excel path or an already loaded frame
+            fsh_output: Write the FSH CodeSystem to this file
+            render_fsh: Render the FSH CodeSystem (implied by fsh_output)
+
+        Returns:
+            PipelineResult: Frames of every stage, FSH content, report and written files
+        """
+        timings: Dict[str, float] = {}
+
+        if isinstance(source, pd.DataFrame):
+            source_name = '<dataframe>'
+            source_df = self._run_stage('load', timings, canonicalize, source)
+        else:
+            source_name = Path(source).name
+            source_df = self._run_stage('load', timings, read_nlk_source, source)
+        base_name = self.base_name or self._default_base_name(source)
+
+        cleaned, validator = self._run_stage('validate_clean', timings, validate_and_clean, source_df, source_name)
+        critical = validator.report.get_issues_by_severity('critical')
+        if critical and self.stop_on_critical:
+            raise RuntimeError(f"{len(critical)} critical data quality issues: "
+                               f"{'; '.join(issue.description for issue in critical[:3])}")
+
+        deduplicated = self._run_stage('deduplicate', timings, deduplicate, cleaned)
+
+        fsh = None
+        if render_fsh or fsh_output:
+            fsh_source = f"{base_name}_full_deduplicated.csv"
+            fsh = self._run_stage('render_fsh', timings, render_codesystem_fsh,
+                                  deduplicated, fsh_source, self.syntax_mode)
+
+        materialized: Dict[str, str] = {}
+        if self.materialize_dir is not None:
+            out = self.materialize_dir
+            materialized['cleaned_csv'] = str(write_nlk_csv(cleaned, out / f"{base_name}_full_cleaned.csv"))
+            materialized['deduplicated_csv'] = str(write_nlk_csv(deduplicated, out / f"{base_name}_full_deduplicated.csv"))
+            report_path = out / f"{base_name}_full_quality_report.txt"
+            validator.generate_report(str(report_path))
+            materialized['quality_report'] = str(report_path)
+
+        if fsh_output:
+            Path(fsh_output).parent.mkdir(parents=True, exist_ok=True)
+            with open(fsh_output, 'w', encoding='utf-8') as f:
+                f.write(fsh)
+            materialized['fsh'] = str(fsh_output)
+
+        return PipelineResult(
+            source=source_df,
+            cleaned=cleaned,
+            deduplicated=deduplicated,
+            fsh=fsh,
+            validator=validator,
+            materialized=materialized,
+            timings=timings,
+        )
+
+    @staticmethod
+    def _default_base_name(source: Union[str, Path, pd.DataFrame]) -> str:
+        if isinstance(source, pd.DataFrame):
+            return 'nlk'
+        stem = Path(source).stem.replace(' ', '_').lower()
+        return stem[:-len('_full')] if stem.endswith('_full') else stem
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Run the NLK CSV -> FSH pipeline in memory")
+    parser.add_argument("source", help="NLK CSV or Excel file")
+    parser.add_argument("--materialize", metavar="DIR", help="Write intermediate CSVs and the quality report to DIR")
+    parser.add_argument("--fsh-output", help="Write the FSH CodeSystem to this file")
+    parser.add_argument("--multiline", action="store_true",
+                        help="Use multi-line property syntax (needs fix_fsh_property_syntax.py)")
+    parser.add_argument("--verbose", action="store_true", help="Show the stage scripts' console output")
+
+    args = parser.parse_args()
+
+    if not Path(args.source).exists():
+        print(f"❌ Source file not found: {args.source}")
+        return 1
+
+    pipeline = NLKPipeline(
+        materialize_dir=args.materialize,
+        syntax_mode='multiline' if args.multiline else SYNTAX_SINGLE_LINE,
+        quiet=not args.verbose,
+    )
+
+    print("🔗 NLK In-Process Pipeline")
+    try:
+        result = pipeline.run(args.source, fsh_output=args.fsh_output, render_fsh=bool(args.fsh_output))
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"\n📊 Rows: {len(result.source):,} source, {len(result.cleaned):,} cleaned, "
+          f"{len(result.deduplicated):,} deduplicated")
+    print(f"   Quality issues: {len(result.report.issues)}")
+    for stage, seconds in result.timings.items():
+        print(f"   {stage:<16} {seconds:>8.3f} s")
+
+    if result.materialized:
+        print(f"\n💾 Files written:")
+        for name, path in result.materialized.items():
+            print(f"   {name}: {path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
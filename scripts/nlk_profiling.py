@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Shared --profile Instrumentation for the NLK Scripts
+
+Scripts mark their stages and checks with timed spans:
+
+    from nlk_profiling import profiled_main, span
+
+    with span('validate_duplicates', rows=len(df)):
+        ...
+
+    @profiled_main
+    def main():
+        ...
+
+Spans cost a single flag check unless profiling is enabled. Running any
+instrumented script with --profile enables it for that run:
+
+  --profile [TRACE.json]     Record spans and write a JSON trace; the path must
+                             end in .json (default: <script>_profile.json)
+  --profile-cprofile FILE    Also write a cProfile dump (view with snakeviz or pstats)
+  --profile-top N            Number of tracemalloc top allocators in the trace (default: 15)
+  --profile-no-tracemalloc   Skip tracemalloc (its overhead can double wall times)
+
+For every span the trace records wall and CPU time, rows and rows/sec,
+RSS at start/end and the peak RSS and peak traced Python allocation within
+the span (nested spans included). The profile options are removed from
+sys.argv before the script parses its own arguments.
+"""
+
+import cProfile
+import functools
+import json
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_TOP_ALLOCATORS = 15
+
+
+# ----------------------------------------------------------------------
+# Memory measurement
+# ----------------------------------------------------------------------
+
+def _proc_status_mb(field: str) -> Optional[float]:
+    """Read a memory field (kB) from /proc/self/status in MB, if available."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            match = re.search(rf'^{field}:\s+(\d+) kB', f.read(), re.MULTILINE)
+        return int(match.group(1)) / 1024 if match else None
+    except OSError:
+        return None
+
+
+def reset_peak_rss() -> bool:
+    """Reset the process high-water RSS to the current RSS (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size in MB."""
+    return _proc_status_mb('VmRSS')
+
+
+def peak_rss_mb() -> float:
+    """High-water resident set size in MB."""
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None:
+        return peak
+
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return max_rss / 1024**2 if sys.platform == 'darwin' else max_rss / 1024
+
+
+# ----------------------------------------------------------------------
+# Spans
+# ----------------------------------------------------------------------
+
+class _OpenSpan:
+    """Bookkeeping for a span that has not finished yet."""
+    __slots__ = ('record', 'started', 'cpu_started', 'peak_rss', 'peak_traced')
+
+    def __init__(self, record: Dict[str, Any]):
+        self.record = record
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.peak_rss = 0.0
+        self.peak_traced = 0
+
+
+class Profiler:
+    """Collects nested timed spans with memory high-water marks."""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans: List[Dict[str, Any]] = []
+        self._stack: List[_OpenSpan] = []
+        self._started = 0.0
+        self._use_tracemalloc = False
+        self._rss_resettable = False
+
+    def start(self, use_tracemalloc: bool = True) -> None:
+        """Enable span recording from now on."""
+        self.enabled = True
+        self.spans = []
+        self._stack = []
+        self._started = time.perf_counter()
+        self._use_tracemalloc = use_tracemalloc
+        if use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._rss_resettable = reset_peak_rss()
+
+    def stop(self) -> None:
+        """Stop recording (open spans are closed by their context managers)."""
+        self.enabled = False
+
+    def _memory_peaks(self) -> Tuple[float, int]:
+        """Peak RSS (MB) and peak traced allocation (bytes) since the last reset."""
+        traced = tracemalloc.get_traced_memory()[1] if self._use_tracemalloc else 0
+        return peak_rss_mb(), traced
+
+    def _reset_peaks(self) -> None:
+        if self._rss_resettable:
+            reset_peak_rss()
+        if self._use_tracemalloc:
+            tracemalloc.reset_peak()
+
+    def _fold_peaks_into(self, open_span: _OpenSpan) -> None:
+        rss, traced = self._memory_peaks()
+        open_span.peak_rss = max(open_span.peak_rss, rss)
+        open_span.peak_traced = max(open_span.peak_traced, traced)
+
+    @contextmanager
+    def span(self, name: str, rows: Optional[int] = None, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block as a named span.
+
+        Args:
+            name: Stage or check name
+            rows: Rows processed, for rows/sec (can also be set on the yielded record)
+            attributes: Extra JSON-serializable values stored with the span
+
+        Yields:
+            dict: The span record (empty and discarded when profiling is disabled)
+        """
+        if not self.enabled:
+            yield {}
+            return
+
+        # Peaks so far belong to the parent; each span measures from a reset
+        if self._stack:
+            self._fold_peaks_into(self._stack[-1])
+        self._reset_peaks()
+
+        record: Dict[str, Any] = {
+            'name': name,
+            'parent': self._stack[-1].record['name'] if self._stack else None,
+            'depth': len(self._stack),
+            'start_s': round(time.perf_counter() - self._started, 6),
+            'rows': rows,
+            'rss_start_mb': _round(current_rss_mb()),
+        }
+        if attributes:
+            record['attributes'] = attributes
+        open_span = _OpenSpan(record)
+        self._stack.append(open_span)
+
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - open_span.started
+            self._fold_peaks_into(open_span)
+            self._stack.pop()
+
+            record['wall_s'] = round(wall, 6)
+            record['cpu_s'] = round(time.process_time() - open_span.cpu_started, 6)
+            record['rows_per_s'] = round(record['rows'] / wall, 1) if record['rows'] and wall > 0 else None
+            record['rss_end_mb'] = _round(current_rss_mb())
+            record['peak_rss_mb'] = _round(open_span.peak_rss)
+            if self._use_tracemalloc:
+                record['peak_traced_mb'] = _round(open_span.peak_traced / 1024**2)
+            self.spans.append(record)
+
+            # The parent's peak includes this span's peak
+            if self._stack:
+                parent = self._stack[-1]
+                parent.peak_rss = max(parent.peak_rss, open_span.peak_rss)
+                parent.peak_traced = max(parent.peak_traced, open_span.peak_traced)
+            self._reset_peaks()
+
+    def top_allocators(self, limit: int = DEFAULT_TOP_ALLOCATORS) -> List[Dict[str, Any]]:
+        """Source lines holding the most traced memory right now."""
+        if not self._use_tracemalloc or not tracemalloc.is_tracing():
+            return []
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ])
+        return [
+            {
+                'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                'size_kb': round(stat.size / 1024, 1),
+                'count': stat.count,
+            }
+            for stat in snapshot.statistics('lineno')[:limit]
+        ]
+
+
+def _round(value: Optional[float], digits: int = 1) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+PROFILER = Profiler()
+
+
+def span(name: str, rows: Optional[int] = None, **attributes: Any):
+    """Time a block as a named span of the process-wide profiler."""
+    return PROFILER.span(name, rows=rows, **attributes)
+
+
+def is_profiling() -> bool:
+    """Whether --profile is active in this process."""
+    return PROFILER.enabled
+
+
+# ----------------------------------------------------------------------
+# Command-line integration
+# ----------------------------------------------------------------------
+
+def _parse_top(value: str) -> int:
+    """Parse the --profile-top value."""
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"--profile-top: invalid int value: {value!r}") from None
+
+
+def extract_profile_args(argv: List[str]) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+    """
+    Remove --profile options from an argument list.
+
+    Args:
+        argv: Arguments without the program name
+
+    Returns:
+        tuple: (remaining arguments, profile options or None if --profile is absent)
+
+    Raises:
+        ValueError: If --profile-top is not an integer
+    """
+    remaining: List[str] = []
+    options: Dict[str, Any] = {'trace': None, 'cprofile': None, 'top': DEFAULT_TOP_ALLOCATORS,
+                               'tracemalloc': True}
+    enabled = False
+    i = 0
+
+    while i < len(argv):
+        arg = argv[i]
+        value = argv[i + 1] if i + 1 < len(argv) else None
+
+        if arg.startswith('--profile='):
+            enabled, options['trace'] = True, arg.split('=', 1)[1]
+        elif arg == '--profile':
+            enabled = True
+            # Optional trace path: the next argument if it names a .json file
+            if value is not None and value.endswith('.json') and not value.startswith('-'):
+                options['trace'] = value
+                i += 1
+        elif arg in ('--profile-cprofile', '--profile-top') and value is not None:
+            key = 'cprofile' if arg == '--profile-cprofile' else 'top'
+            options[key] = value if key == 'cprofile' else _parse_top(value)
+            enabled = enabled or key == 'cprofile'
+            i += 1
+        elif arg.startswith('--profile-cprofile='):
+            enabled, options['cprofile'] = True, arg.split('=', 1)[1]
+        elif arg.startswith('--profile-top='):
+            options['top'] = _parse_top(arg.split('=', 1)[1])
+        elif arg == '--profile-no-tracemalloc':
+            options['tracemalloc'] = False
+        else:
+            remaining.append(arg)
+        i += 1
+
+    return remaining, options if enabled else None
+
+
+def write_trace(path: str, script: str, argv: List[str], total_wall_s: float,
+                options: Dict[str, Any], exit_status: Any = None) -> None:
+    """Write the recorded spans and allocator statistics as a JSON trace."""
+    trace = {
+        'script': script,
+        'argv': argv,
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pid': os.getpid(),
+        'total_wall_s': round(total_wall_s, 6),
+        'peak_rss_mb': _round(max([s['peak_rss_mb'] for s in PROFILER.spans if s.get('peak_rss_mb')] +
+                                  [peak_rss_mb()])),
+        'exit_status': exit_status if isinstance(exit_status, (int, bool, type(None))) else str(exit_status),
+        'spans': sorted(PROFILER.spans, key=lambda s: s['start_s']),
+        'tracemalloc_top': PROFILER.top_allocators(options['top']),
+        'cprofile': options['cprofile'],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(trace, f, ensure_ascii=False, indent=2)
+
+
+def profiled_main(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorate a script's main() with --profile support.
+
+    Without --profile in sys.argv the wrapped main runs unprofiled; the
+    other profile options are still removed from sys.argv.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            remaining, options = extract_profile_args(sys.argv[1:])
+        except ValueError as e:
+            # Same form and exit status as an argparse usage error
+            print(f"{Path(sys.argv[0]).name}: error: {e}", file=sys.stderr)
+            raise SystemExit(2)
+
+        sys.argv = [sys.argv[0]] + remaining
+        if options is None:
+            return func(*args, **kwargs)
+
+        script = Path(sys.argv[0]).stem or func.__module__
+        trace_path = options['trace'] or f"{script}_profile.json"
+
+        profiler = cProfile.Profile() if options['cprofile'] else None
+        PROFILER.start(use_tracemalloc=options['tracemalloc'])
+        started = time.perf_counter()
+        result = None
+        try:
+            with span(script):
+                if profiler is not None:
+                    result = profiler.runcall(func, *args, **kwargs)
+                else:
+                    result = func(*args, **kwargs)
+            return result
+        except SystemExit as e:
+            result = e.code
+            raise
+        finally:
+            total = time.perf_counter() - started
+            PROFILER.stop()
+            if profiler is not None:
+                profiler.dump_stats(options['cprofile'])
+            write_trace(trace_path, script, remaining, total, options, result)
+            print(f"⏱️  Profile trace written to: {trace_path}", file=sys.stderr)
+
+    return wrapper
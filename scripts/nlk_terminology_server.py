@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Local NLK Terminology Lookup Server
+
+A small asyncio HTTP server answering FHIR-style terminology operations
+against an in-memory hash index of the processed NLK CSV, so consuming jobs
+no longer have to load the CSV themselves. No external services or packages
+beyond pandas (for the initial load) are required.
+
+Endpoints:
+  GET  /CodeSystem/$lookup?system=...&code=...[&date=...]
+  GET  /CodeSystem/$validate-code?url=...&code=...[&display=...][&date=...]
+  POST /CodeSystem/$batch-validate   {"items": [{"code": "...", "date": "..."}, ...]}
+  GET  /metrics                      request latency histograms per endpoint
+
+Usage:
+  python nlk_terminology_server.py [csv_file] [--host 127.0.0.1] [--port 8080]
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import sys
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_code_index import (
+    NLK_SYSTEM_URL, NLK_SYSTEM_URLS, STATUS_VALID, NLKCodeIndex, CodeVersion
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CODESYSTEM_NAME = "Norsk Laboratoriekodeverk"
+CODESYSTEM_VERSION = "7280.77"
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class LatencyHistogram:
+    """Fixed-bucket request latency histogram (microsecond resolution)."""
+
+    # Bucket upper bounds in microseconds
+    BUCKETS_US = (10, 25, 50, 75, 100, 150, 200, 300, 500, 750, 1000,
+                  2000, 5000, 10000, 50000, 100000, 1000000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_US) + 1)
+        self.total = 0
+        self.sum_us = 0.0
+        self.max_us = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record one request duration."""
+        micros = seconds * 1e6
+        self.counts[bisect.bisect_left(self.BUCKETS_US, micros)] += 1
+        self.total += 1
+        self.sum_us += micros
+        self.max_us = max(self.max_us, micros)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bucket bound (microseconds) containing the q-th percentile."""
+        if self.total == 0:
+            return None
+
+        target = q / 100 * self.total
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return float(self.BUCKETS_US[i]) if i < len(self.BUCKETS_US) else self.max_us
+        return self.max_us
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the histogram for the /metrics endpoint."""
+        buckets = {f"le_{bound}us": count for bound, count in zip(self.BUCKETS_US, self.counts)}
+        buckets['le_inf'] = self.counts[-1]
+
+        return {
+            'count': self.total,
+            'mean_us': round(self.sum_us / self.total, 1) if self.total else None,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'max_us': round(self.max_us, 1),
+            'buckets': buckets
+        }
+
+
+def _operation_outcome(severity: str, code: str, diagnostics: str) -> Dict[str, Any]:
+    """Build a FHIR OperationOutcome with a single issue."""
+    return {
+        'resourceType': 'OperationOutcome',
+        'issue': [{'severity': severity, 'code': code, 'diagnostics': diagnostics}]
+    }
+
+
+class NLKTerminologyServer:
+    """Asyncio HTTP server for NLK $lookup / $validate-code operations."""
+
+    def __init__(self, index: NLKCodeIndex, host: str = '127.0.0.1', port: int = 8080):
+        """
+        Initialize the server.
+
+        Args:
+            index: Code index to answer requests from
+            host: Interface to bind
+            port: TCP port to bind
+        """
+        self.index = index
+        self.host = host
+        self.port = port
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.routes = {
+            ('GET', '/CodeSystem/$lookup'): self.handle_lookup,
+            ('GET', '/CodeSystem/$validate-code'): self.handle_validate_code,
+            ('POST', '/CodeSystem/$batch-validate'): self.handle_batch_validate,
+            ('GET', '/metrics'): self.handle_metrics,
+        }
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    def _check_system(self, system: Optional[str]) -> Optional[str]:
+        """Return an error message if a system URL is given and is not NLK."""
+        if system and system not in NLK_SYSTEM_URLS:
+            return f"Unknown code system: {system}"
+        return None
+
+    def _version_parameters(self, version: CodeVersion) -> List[Dict[str, Any]]:
+        """Build $lookup output parameters for a code version."""
+        parameters = [
+            {'name': 'name', 'valueString': CODESYSTEM_NAME},
+            {'name': 'version', 'valueString': CODESYSTEM_VERSION},
+            {'name': 'display', 'valueString': version.display or version.code},
+        ]
+
+        if version.definition:
+            parameters.append({'name': 'definition', 'valueString': version.definition})
+
+        dated_properties = [('validFrom', version.valid_from), ('validTo', version.valid_to)]
+        for prop_code, value in dated_properties:
+            if value:
+                parameters.append({'name': 'property', 'part': [
+                    {'name': 'code', 'valueCode': prop_code},
+                    {'name': 'value', 'valueDateTime': value}
+                ]})
+
+        if version.replaced_by:
+            parameters.append({'name': 'property', 'part': [
+                {'name': 'code', 'valueCode': 'replacedBy'},
+                {'name': 'value', 'valueCode': version.replaced_by}
+            ]})
+
+        for prop_code, value in version.properties.items():
+            parameters.append({'name': 'property', 'part': [
+                {'name': 'code', 'valueCode': prop_code},
+                {'name': 'value', 'valueString': value}
+            ]})
+
+        return parameters
+
+    def handle_lookup(self, query: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """CodeSystem/$lookup: display and properties of a code."""
+        code = query.get('code')
+        if not code:
+            return 400, _operation_outcome('error', 'required', "Parameter 'code' is required")
+
+        error = self._check_system(query.get('system'))
+        if error:
+            return 404, _operation_outcome('error', 'not-found', error)
+
+        try:
+            status, version = self.index.classify(code, query.get('date'))
+        except ValueError as e:
+            return 400, _operation_outcome('error', 'invalid', str(e))
+        if version is None:
+            return 404, _operation_outcome('error', 'not-found', f"Unknown code: {code}")
+
+        parameters = self._version_parameters(version)
+        parameters.append({'name': 'property', 'part': [
+            {'name': 'code', 'valueCode': 'status'},
+            {'name': 'value', 'valueCode': status}
+        ]})
+
+        return 200, {'resourceType': 'Parameters', 'parameter': parameters}
+
+    def _validate(self, code: Optional[str], date: Optional[str]) -> Dict[str, Any]:
+        """Validate one code at a date."""
+        status, version = self.index.classify(code, date)
+
+        result = {'code': code, 'status': status, 'valid': status == STATUS_VALID}
+        if version is not None:
+            result['display'] = version.display
+            if version.replaced_by:
+                result['replacedBy'] = version.replaced_by
+        return result
+
+    def handle_validate_code(self, query: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """CodeSystem/$validate-code: is a code valid (at a date)."""
+        code = query.get('code')
+        if not code:
+            return 400, _operation_outcome('error', 'required', "Parameter 'code' is required")
+
+        error = self._check_system(query.get('url') or query.get('system'))
+        if error:
+            return 200, {'resourceType': 'Parameters', 'parameter': [
+                {'name': 'result', 'valueBoolean': False},
+                {'name': 'message', 'valueString': error}
+            ]}
+
+        try:
+            result = self._validate(code, query.get('date'))
+        except ValueError as e:
+            return 400, _operation_outcome('error', 'invalid', str(e))
+        parameters = [{'name': 'result', 'valueBoolean': result['valid']}]
+
+        if 'display' in result:
+            parameters.append({'name': 'display', 'valueString': result['display']})
+
+        display = query.get('display')
+        if result['valid'] and display and display != result.get('display'):
+            parameters[0]['valueBoolean'] = False
+            parameters.append({'name': 'message', 'valueString':
+                               f"Display '{display}' does not match '{result.get('display')}'"})
+        elif not result['valid']:
+            message = f"Code '{code}' is {result['status']}"
+            if 'replacedBy' in result:
+                message += f" (replaced by {result['replacedBy']})"
+            parameters.append({'name': 'message', 'valueString': message})
+
+        return 200, {'resourceType': 'Parameters', 'parameter': parameters}
+
+    def handle_batch_validate(self, query: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Validate many codes in one request."""
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError as e:
+            return 400, _operation_outcome('error', 'invalid', f"Invalid JSON body: {e}")
+
+        items = payload.get('items') if isinstance(payload, dict) else payload
+        if not isinstance(items, list):
+            return 400, _operation_outcome('error', 'invalid', "Body must contain an 'items' array")
+
+        default_date = query.get('date')
+        results = []
+        for i, item in enumerate(items):
+            if isinstance(item, str):
+                code, date = item, default_date
+            elif isinstance(item, dict) and isinstance(item.get('code'), str):
+                code, date = item['code'], item.get('date', default_date)
+            else:
+                return 400, _operation_outcome(
+                    'error', 'invalid', f"items[{i}] must be a code string or an object with a 'code' string")
+
+            try:
+                results.append(self._validate(code, date))
+            except ValueError as e:
+                return 400, _operation_outcome('error', 'invalid', f"items[{i}]: {e}")
+
+        return 200, {'results': results}
+
+    def handle_metrics(self, query: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Latency histograms per endpoint."""
+        return 200, {
+            'codes_indexed': len(self.index),
+            'endpoints': {path: histogram.to_dict() for path, histogram in self.histograms.items()}
+        }
+
+    # ------------------------------------------------------------------
+    # HTTP handling
+    # ------------------------------------------------------------------
+
+    def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Route one request and record its latency."""
+        started = time.perf_counter()
+
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                return 405, _operation_outcome('error', 'not-supported', f"Method {method} not allowed")
+            return 404, _operation_outcome('error', 'not-found', f"Unknown endpoint: {url.path}")
+
+        try:
+            status, payload = handler(dict(parse_qsl(url.query)), body)
+        except Exception as e:
+            logger.exception(f"Error handling {method} {target}")
+            status, payload = 500, _operation_outcome('fatal', 'exception', str(e))
+
+        if url.path != '/metrics':
+            self.histograms.setdefault(url.path, LatencyHistogram()).record(time.perf_counter() - started)
+
+        return status, payload
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one (keep-alive) connection."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                # The body is not read when rejected, so the connection cannot be reused
+                body_rejected = True
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    status, payload = 400, _operation_outcome('error', 'invalid', "Invalid Content-Length header")
+                elif length > MAX_BODY_BYTES:
+                    status, payload = 413, _operation_outcome('error', 'too-costly', "Request body too large")
+                else:
+                    body_rejected = False
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = self.dispatch(method.upper(), target, body)
+
+                keep_alive = (headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                              and not body_rejected)
+                content = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                content_type = 'application/json' if 'resourceType' not in payload else 'application/fhir+json'
+
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}; charset=utf-8\r\n"
+                    f"Content-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode('latin-1') + content
+                )
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """Run the server until cancelled."""
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        logger.info(f"Serving {len(self.index):,} NLK codes on http://{self.host}:{self.port}")
+        logger.info(f"System URL: {NLK_SYSTEM_URL}")
+
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Local NLK terminology lookup server")
+    parser.add_argument(
+        "csv_file", nargs="?",
+        default="../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_processing.csv",
+        help="Path to the processed NLK CSV file"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to bind (default: 8080)")
+
+    args = parser.parse_args()
+
+    if not Path(args.csv_file).exists():
+        print(f"❌ CSV file not found: {args.csv_file}")
+        return 1
+
+    index = NLKCodeIndex.from_csv(args.csv_file)
+    server = NLKTerminologyServer(index, args.host, args.port)
+
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
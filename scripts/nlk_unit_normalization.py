@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+NLK Unit Normalization
+
+Parses the units in the `enhet` column (e.g. 'µmol/L', 'x 10E9/L',
+'nmol/min/mg protein') into a canonical unit, a scale factor and a
+dimension, so results reported in different units for the same component
+can be compared:
+
+    value_in_canonical_unit = value * scale
+
+Canonical units are built from base units: mol, g, L, s, m, kat, Pa, osmol,
+ohm and the arbitrary units IU, p.d.e. and arb.enh. Enzyme units (U) are
+converted to katal (1 U = 1 µmol/min). Qualifiers such as 'protein' or 'Hb'
+are kept as annotations ({protein}), so 'U/g Hb' is not compared with 'U/g'.
+Temperature (°C) is passed through unscaled. Fractions keep the base unit
+that cancels (g/kg -> g/g, mmol/mol -> mol/mol), so mass, substance and
+volume fractions are distinct dimensions; '%' and bare powers of ten are
+unspecified ratios ('1').
+
+The normalization table is computed once from the distinct units; conversion
+of (code, value) arrays is a vectorized lookup and multiply:
+
+    normalizer = NLKUnitNormalizer.from_csv(csv_file)
+    result = normalizer.to_canonical(codes, values)
+    result['value'], result['unit'], result['dimension']
+
+Usage:
+  python nlk_unit_normalization.py [csv_file] [--output unit_table.csv]
+"""
+
+import argparse
+import logging
+import math
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_processing.csv"
+
+# Atomic units: symbol -> (scale to base unit, base unit)
+ATOMIC_UNITS: Dict[str, Tuple[float, str]] = {
+    'mol': (1.0, 'mol'),
+    'osmol': (1.0, 'osmol'),
+    'g': (1.0, 'g'),
+    'L': (1.0, 'L'),
+    'l': (1.0, 'L'),
+    'm': (1.0, 'm'),
+    's': (1.0, 's'),
+    'min': (60.0, 's'),
+    'minutt': (60.0, 's'),
+    't': (3600.0, 's'),   # time (hour)
+    'h': (3600.0, 's'),
+    'd': (86400.0, 's'),
+    'kat': (1.0, 'kat'),
+    'U': (1e-6 / 60, 'kat'),  # µmol/min
+    'Pa': (1.0, 'Pa'),
+    'ohm': (1.0, 'ohm'),
+    'IU': (1.0, 'IU'),
+    'p.d.e.': (1.0, 'p.d.e.'),
+    'arb.enh.': (1.0, 'arb.enh.'),
+    '°C': (1.0, '°C'),
+}
+
+# Units that do not take SI prefixes
+UNPREFIXED = {'min', 'minutt', 't', 'h', 'd', 'IU', 'U', 'p.d.e.', 'arb.enh.', '°C', 'ohm'}
+
+PREFIXES = {
+    'f': 1e-15, 'p': 1e-12, 'n': 1e-9, 'µ': 1e-6, 'μ': 1e-6, 'u': 1e-6,
+    'm': 1e-3, 'c': 1e-2, 'd': 1e-1, 'k': 1e3,
+}
+
+# Names for common dimensions (canonical unit without scale)
+DIMENSION_NAMES = {
+    '1': 'ratio',
+    'mol/mol': 'substance fraction',
+    'g/g': 'mass fraction',
+    'L/L': 'volume fraction',
+    'mol/L': 'substance concentration',
+    'g/L': 'mass concentration',
+    'kat/L': 'catalytic concentration',
+    'IU/L': 'arbitrary concentration',
+    '/L': 'number concentration',
+    'mol/s': 'substance rate',
+    'mol/g': 'substance content',
+    'osmol/g': 'osmolality',
+    'osmol/L': 'osmolarity',
+    'L/s': 'volume rate',
+    'g/mol': 'mass ratio to substance',
+    's': 'time',
+    'Pa': 'pressure',
+    'm': 'length',
+    'L': 'volume',
+    'g': 'mass',
+    'mol': 'amount of substance',
+}
+
+_POWER_OF_TEN = re.compile(r'^x\s*10E([+-]?\d+)\s*(.*)$')
+_FACTOR = re.compile(r'^(?P<number>\d+(?:[.,]\d+)?)?(?P<symbol>[^\d\s]+?)(?P<exponent>\d)?$')
+
+
+class UnitParseError(ValueError):
+    """Raised for unit strings that cannot be parsed."""
+
+
+def _parse_factor(token: str) -> Tuple[float, str, int]:
+    """Parse one unit factor such as 'mg', 'm2' or '1,73m2' into (scale, base, exponent)."""
+    match = _FACTOR.match(token)
+    if not match:
+        raise UnitParseError(f"Unrecognized unit: {token}")
+
+    number = float(match.group('number').replace(',', '.')) if match.group('number') else 1.0
+    symbol = match.group('symbol')
+    exponent = int(match.group('exponent') or 1)
+
+    if symbol in ATOMIC_UNITS:
+        scale, base = ATOMIC_UNITS[symbol]
+    elif symbol[0] in PREFIXES and symbol[1:] in ATOMIC_UNITS and symbol[1:] not in UNPREFIXED:
+        unit_scale, base = ATOMIC_UNITS[symbol[1:]]
+        scale = PREFIXES[symbol[0]] * unit_scale
+    else:
+        raise UnitParseError(f"Unrecognized unit: {token}")
+
+    return number * scale ** exponent, base, exponent
+
+
+def _format_unit(exponents: Dict[str, int], fractions: Sequence[str] = ()) -> str:
+    """
+    Format base unit exponents as a unit string, numerator first.
+
+    Bases in fractions cancelled out (e.g. mmol/mol) and are written as
+    base/base, so mass, substance and volume fractions stay distinct.
+    """
+    def term(base: str, exponent: int) -> str:
+        return base if exponent == 1 else f"{base}{exponent}"
+
+    fractions = sorted(fractions)
+    numerator = '.'.join([term(b, e) for b, e in sorted(exponents.items()) if e > 0] + fractions)
+    denominator = ''.join([f"/{b}" for b in fractions] +
+                          [f"/{term(b, -e)}" for b, e in sorted(exponents.items()) if e < 0])
+
+    if not numerator and not denominator:
+        return '1'
+    return numerator + denominator
+
+
+def parse_unit(unit: str) -> Tuple[str, float, str]:
+    """
+    Parse a unit string.
+
+    Args:
+        unit: Unit as written in the `enhet` column
+
+    Returns:
+        tuple: (canonical unit, scale factor, dimension)
+
+    Raises:
+        UnitParseError: If the unit cannot be parsed
+    """
+    text = unit.strip()
+    if not text:
+        raise UnitParseError("Empty unit")
+
+    scale = 1.0
+    exponents: Dict[str, int] = {}
+    annotations: List[str] = []
+
+    match = _POWER_OF_TEN.match(text)
+    if match:
+        scale = 10.0 ** int(match.group(1))
+        text = match.group(2).strip()
+
+    if text == '%':
+        return '1', scale * 0.01, DIMENSION_NAMES['1']
+
+    for position, term in enumerate(text.split('/')):
+        sign = 1 if position == 0 else -1
+        term = term.strip()
+        if not term:
+            if position == 0:
+                continue  # count per volume, e.g. '/L'
+            raise UnitParseError(f"Empty denominator in unit: {unit}")
+
+        # 'µg x t' is a product; trailing words are qualifiers ('mg protein')
+        factors = [f.strip() for f in term.split(' x ')]
+        for factor in factors:
+            tokens = factor.split()
+            factor_scale, base, exponent = _parse_factor(tokens[0])
+            annotations.extend(tokens[1:])
+            scale *= factor_scale ** sign
+            exponents[base] = exponents.get(base, 0) + sign * exponent
+
+    fractions = [base for base, exp in exponents.items() if exp == 0]
+    exponents = {base: exp for base, exp in exponents.items() if exp != 0}
+    canonical = _format_unit(exponents, fractions)
+    dimension = DIMENSION_NAMES.get(canonical, canonical)
+
+    if annotations:
+        canonical += ''.join(f"{{{a}}}" for a in annotations)
+        dimension += ''.join(f"{{{a}}}" for a in annotations)
+
+    return canonical, scale, dimension
+
+
+def build_unit_table(units: Sequence[Any]) -> pd.DataFrame:
+    """
+    Build the normalization table for distinct unit strings.
+
+    Args:
+        units: Unit strings (duplicates and missing values are ignored)
+
+    Returns:
+        pd.DataFrame: One row per unit with canonical_unit, scale, dimension,
+                      and error (None for parseable units)
+    """
+    rows = []
+    for unit in sorted(pd.Series(units, dtype=object).dropna().astype(str).unique()):
+        try:
+            canonical, scale, dimension = parse_unit(unit)
+            rows.append({'unit': unit, 'canonical_unit': canonical, 'scale': scale,
+                         'dimension': dimension, 'error': None})
+        except UnitParseError as e:
+            rows.append({'unit': unit, 'canonical_unit': None, 'scale': math.nan,
+                         'dimension': None, 'error': str(e)})
+
+    return pd.DataFrame(rows, columns=['unit', 'canonical_unit', 'scale', 'dimension', 'error'])
+
+
+class NLKUnitNormalizer:
+    """Vectorized conversion of results to canonical units."""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Initialize from codebook data.
+
+        Args:
+            df: DataFrame with kode and enhet columns; the last version of each code is used
+        """
+        codes = df[['kode', 'enhet']].dropna(subset=['kode']).drop_duplicates('kode', keep='last')
+
+        self.unit_table = build_unit_table(codes['enhet'])
+        unit_index = pd.Index(self.unit_table['unit'])
+
+        # Per-unit arrays; the extra last slot is used for codes without a usable unit
+        self.scales = np.append(self.unit_table['scale'].to_numpy(dtype=np.float64), np.nan)
+        self.canonical_units = np.append(self.unit_table['canonical_unit'].to_numpy(dtype=object), None)
+        self.dimensions = np.append(self.unit_table['dimension'].to_numpy(dtype=object), None)
+        self._unit_index = unit_index
+
+        unit_ids = unit_index.get_indexer(codes['enhet'].astype(object))
+        self.code_index = pd.Index(codes['kode'].astype(str).str.strip())
+        self.code_unit_ids = np.where(unit_ids >= 0, unit_ids, len(unit_index))
+        self.code_units = codes['enhet'].to_numpy(dtype=object)
+
+        logger.info(f"Unit table ready: {len(self.unit_table):,} units, "
+                    f"{self.unit_table['error'].notna().sum()} unparseable")
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> 'NLKUnitNormalizer':
+        """Build the normalizer from a processed NLK CSV file."""
+        df = pd.read_csv(csv_path, encoding='utf-8', dtype=str, usecols=['kode', 'enhet'])
+        return cls(df)
+
+    @property
+    def unparseable_units(self) -> pd.DataFrame:
+        """Units that could not be parsed, with the parse error."""
+        return self.unit_table[self.unit_table['error'].notna()].reset_index(drop=True)
+
+    def _code_unit_ids(self, codes: Sequence[str]) -> np.ndarray:
+        """Unit id per code, with the no-unit slot for unknown codes."""
+        positions = self.code_index.get_indexer(np.asarray(codes, dtype=object))
+        return np.where(positions >= 0, self.code_unit_ids[positions], len(self._unit_index))
+
+    def to_canonical(self, codes: Sequence[str], values: Sequence[float]) -> Dict[str, np.ndarray]:
+        """
+        Convert (code, value) pairs to the canonical unit of each code's unit.
+
+        Args:
+            codes: Array-like of NLK codes
+            values: Array-like of numeric results in the code's unit (`enhet`)
+
+        Returns:
+            dict: 'value' (float64, NaN for unknown codes or unparseable units),
+                  'unit' (canonical unit) and 'dimension', one entry per pair
+        """
+        unit_ids = self._code_unit_ids(codes)
+        values = np.asarray(values, dtype=np.float64)
+        return {
+            'value': values * self.scales[unit_ids],
+            'unit': self.canonical_units[unit_ids],
+            'dimension': self.dimensions[unit_ids],
+        }
+
+    def convert(self, values: Sequence[float], from_units: Any, to_unit: str) -> np.ndarray:
+        """
+        Convert values between units of the same dimension.
+
+        Args:
+            values: Array-like of numeric values
+            from_units: Unit of each value, or one unit for all values
+            to_unit: Target unit
+
+        Returns:
+            np.ndarray: Converted values; NaN where the source unit is unparseable
+                        or has a different dimension than the target
+        """
+        target_canonical, target_scale, _ = parse_unit(to_unit)
+        values = np.asarray(values, dtype=np.float64)
+
+        if isinstance(from_units, str):
+            from_units = np.full(len(values), from_units, dtype=object)
+
+        # Parse each distinct source unit once
+        unit_codes, distinct = pd.factorize(pd.Series(from_units, dtype=object))
+        factors = np.full(len(distinct) + 1, np.nan)
+        for i, unit in enumerate(distinct):
+            try:
+                canonical, scale, _ = parse_unit(str(unit))
+            except UnitParseError:
+                continue
+            if canonical == target_canonical:
+                factors[i] = scale / target_scale
+
+        return values * factors[np.where(unit_codes >= 0, unit_codes, len(distinct))]
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Build the NLK unit normalization table")
+    parser.add_argument("csv_file", nargs="?", default=DEFAULT_CSV, help="Processed NLK CSV file")
+    parser.add_argument("--output", help="Write the unit table to this CSV file")
+
+    args = parser.parse_args()
+
+    if not Path(args.csv_file).exists():
+        print(f"❌ CSV file not found: {args.csv_file}")
+        return 1
+
+    normalizer = NLKUnitNormalizer.from_csv(args.csv_file)
+    table = normalizer.unit_table
+
+    print(f"\n📏 Unit Normalization Table ({len(table)} units):")
+    for _, row in table.iterrows():
+        if pd.isna(row['error']):
+            print(f"   {row['unit']:<24} x {row['scale']:<12.6g} {row['canonical_unit']:<20} ({row['dimension']})")
+
+    unparseable = normalizer.unparseable_units
+    if len(unparseable):
+        print(f"\n⚠️  Unparseable units ({len(unparseable)}):")
+        for _, row in unparseable.iterrows():
+            print(f"   {row['unit']}: {row['error']}")
+
+    if args.output:
+        table.to_csv(args.output, index=False, encoding='utf-8')
+        print(f"\n💾 Unit table written to: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+NLK ValueSet Expansion Engine
+
+Expands FHIR-style ValueSet filters over the NLK CodeSystem, e.g. all
+currently valid "Medisinsk genetikk" codes with system "Plasma":
+
+    expander = NLKValueSetExpander(NLKCodeIndex.from_csv(csv_file))
+    expander.expand([
+        {'property': 'primaryDomain', 'op': '=', 'value': 'Medisinsk genetikk'},
+        {'property': 'system', 'op': '=', 'value': 'Plasma'},
+        {'property': 'status', 'op': '=', 'value': 'valid'},
+    ], count=50)
+
+Property filters are evaluated as set intersections over precomputed
+per-value code sets (exact, case-sensitive values). Status filters are
+evaluated at the expansion's as-of date. Expansions are cached in a
+size-bounded LRU keyed by filters and as-of date, which is cleared when
+the data is reloaded.
+"""
+
+import json
+import logging
+import re
+import sys
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_code_index import (NLK_SYSTEM_URL, NLK_SYSTEM_URLS, STATUS_NOT_YET_VALID, STATUS_RETIRED,
+                            STATUS_UNKNOWN, STATUS_VALID, NLKCodeIndex, normalize_date)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Concept properties that can be filtered on
+FILTER_PROPERTIES = ('primaryDomain', 'secondaryDomain', 'grouping', 'system', 'unit',
+                     'component', 'propertyType')
+SUPPORTED_OPS = ('=', 'in', 'not-in', 'exists', 'regex')
+STATUS_VALUES = (STATUS_VALID, STATUS_UNKNOWN, STATUS_RETIRED, STATUS_NOT_YET_VALID)
+
+
+class LRUCache:
+    """Size-bounded least-recently-used cache."""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self.entries: 'OrderedDict[Any, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get a cached value and mark it as recently used."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Any, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class NLKValueSetExpander:
+    """Evaluates ValueSet filters over an NLK code index."""
+
+    def __init__(self, index: NLKCodeIndex, cache_size: int = 128):
+        """
+        Initialize the expander.
+
+        Args:
+            index: Code index to expand against
+            cache_size: Maximum number of cached expansions
+        """
+        self.cache = LRUCache(cache_size)
+        self.reload(index)
+
+    def reload(self, index: NLKCodeIndex) -> None:
+        """Rebuild the per-value code sets from an index and invalidate the cache."""
+        self.index = index
+        self.all_codes: FrozenSet[str] = frozenset(index)
+
+        value_sets: Dict[str, Dict[str, Set[str]]] = {prop: {} for prop in FILTER_PROPERTIES}
+        for code, versions in index.versions_by_code.items():
+            for version in versions:
+                for prop, value in version.properties.items():
+                    if prop in value_sets:
+                        value_sets[prop].setdefault(value, set()).add(code)
+
+        self.value_sets: Dict[str, Dict[str, FrozenSet[str]]] = {
+            prop: {value: frozenset(codes) for value, codes in values.items()}
+            for prop, values in value_sets.items()
+        }
+        self.cache.clear()
+
+        logger.info(f"Precomputed value sets for {len(self.all_codes):,} codes")
+
+    def _normalize_filters(self, filters: List[Dict[str, str]]) -> Tuple[Tuple[str, str, str], ...]:
+        """Validate filters and convert them to a hashable, order-independent key."""
+        normalized = []
+
+        for filter_def in filters:
+            prop = filter_def.get('property')
+            op = filter_def.get('op', '=')
+            value = str(filter_def.get('value', ''))
+
+            if prop != 'status' and prop not in FILTER_PROPERTIES:
+                raise ValueError(f"Unsupported filter property: {prop}")
+            if op not in SUPPORTED_OPS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if prop == 'status' and op not in ('=', 'in', 'not-in'):
+                raise ValueError(f"Unsupported operator for status filter: {op}")
+
+            if op in ('in', 'not-in'):
+                value = ','.join(sorted(v.strip() for v in value.split(',')))
+
+            if prop == 'status':
+                unknown = [v for v in value.split(',') if v not in STATUS_VALUES]
+                if unknown:
+                    raise ValueError(f"Unsupported status value(s): {', '.join(unknown)} "
+                                     f"(expected one of {', '.join(STATUS_VALUES)})")
+
+            if op == 'regex':
+                try:
+                    re.compile(value)
+                except re.error as e:
+                    raise ValueError(f"Invalid regex filter: {e}") from e
+
+            normalized.append((prop, op, value))
+
+        return tuple(sorted(normalized))
+
+    def _property_codes(self, prop: str, op: str, value: str) -> FrozenSet[str]:
+        """Codes matching one property filter."""
+        values = self.value_sets[prop]
+
+        if op == '=':
+            return values.get(value, frozenset())
+
+        if op in ('in', 'not-in'):
+            matched = frozenset().union(*(values.get(v, frozenset()) for v in value.split(',')))
+            return matched if op == 'in' else self.all_codes - matched
+
+        if op == 'exists':
+            present = frozenset().union(*values.values())
+            return present if value.lower() != 'false' else self.all_codes - present
+
+        pattern = re.compile(value)
+        return frozenset().union(*(codes for v, codes in values.items() if pattern.fullmatch(v)))
+
+    def _filter_status(self, codes: FrozenSet[str], op: str, value: str, date: str) -> FrozenSet[str]:
+        """Codes whose status at a date matches a status filter."""
+        statuses = set(value.split(','))
+        keep = op != 'not-in'
+        return frozenset(
+            code for code in codes
+            if (self.index.classify(code, date)[0] in statuses) == keep
+        )
+
+    @staticmethod
+    def as_of_date(date: Any = None) -> str:
+        """Normalize an as-of date; the default is the start of today, so expansions cache per day."""
+        return normalize_date(date if date is not None else datetime.now().strftime('%Y-%m-%d'))
+
+    def evaluate(self, filters: List[Dict[str, str]], date: Any = None) -> Tuple[str, ...]:
+        """
+        Evaluate filters at an as-of date, returning matching codes in sorted order.
+
+        Args:
+            filters: FHIR-style filters ({'property', 'op', 'value'}), combined with AND
+            date: As-of date for status filters (default: today)
+        """
+        key_filters = self._normalize_filters(filters)
+        as_of = self.as_of_date(date)
+        key = (key_filters, as_of)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        property_filters = [f for f in key_filters if f[0] != 'status']
+        status_filters = [f for f in key_filters if f[0] == 'status']
+
+        # Intersect smallest sets first
+        matches = sorted((self._property_codes(*f) for f in property_filters), key=len)
+        codes = self.all_codes
+        for matched in matches:
+            codes = codes & matched
+            if not codes:
+                break
+
+        for _, op, value in status_filters:
+            codes = self._filter_status(codes, op, value, as_of)
+
+        result = tuple(sorted(codes))
+        self.cache.put(key, result)
+        return result
+
+    def expand(self, filters: List[Dict[str, str]], date: Any = None,
+               offset: int = 0, count: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Expand filters into a FHIR ValueSet resource with a paged expansion.
+
+        Args:
+            filters: FHIR-style filters, combined with AND
+            date: As-of date for status filters and displays (default: today)
+            offset: Index of the first code to return
+            count: Maximum number of codes to return (default: all)
+        """
+        # One as-of date for the status filters and the displayed versions
+        as_of = self.as_of_date(date)
+        codes = self.evaluate(filters, as_of)
+        page = codes[offset:offset + count if count is not None else None]
+
+        contains = []
+        for code in page:
+            version = self.index.lookup(code, as_of)
+            contains.append({
+                'system': NLK_SYSTEM_URL,
+                'code': code,
+                'display': version.display if version and version.display else code
+            })
+
+        parameters = [{'name': 'offset', 'valueInteger': offset}]
+        if count is not None:
+            parameters.append({'name': 'count', 'valueInteger': count})
+        if date is not None:
+            parameters.append({'name': 'date', 'valueDateTime': as_of})
+
+        return {
+            'resourceType': 'ValueSet',
+            'status': 'active',
+            'compose': {'include': [{'system': NLK_SYSTEM_URL, 'filter': filters}]},
+            'expansion': {
+                'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+                'total': len(codes),
+                'offset': offset,
+                'parameter': parameters,
+                'contains': contains
+            }
+        }
+
+    def expand_valueset(self, valueset: Dict[str, Any], date: Any = None,
+                        offset: int = 0, count: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Expand a FHIR ValueSet resource whose compose includes NLK filters.
+
+        Includes are combined with OR, filters within an include with AND.
+        """
+        as_of = self.as_of_date(date)
+        codes: Set[str] = set()
+
+        for include in valueset.get('compose', {}).get('include', []):
+            system = include.get('system')
+            if system and system not in NLK_SYSTEM_URLS:
+                raise ValueError(f"Unsupported code system: {system}")
+
+            if include.get('concept'):
+                codes.update(c['code'] for c in include['concept'] if c['code'] in self.index)
+            else:
+                codes.update(self.evaluate(include.get('filter', []), as_of))
+
+        for exclude in valueset.get('compose', {}).get('exclude', []):
+            if exclude.get('concept'):
+                codes.difference_update(c['code'] for c in exclude['concept'])
+            else:
+                codes.difference_update(self.evaluate(exclude.get('filter', []), as_of))
+
+        ordered = sorted(codes)
+        page = ordered[offset:offset + count if count is not None else None]
+
+        expanded = dict(valueset)
+        expanded['expansion'] = {
+            'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+            'total': len(ordered),
+            'offset': offset,
+            'contains': [
+                {'system': NLK_SYSTEM_URL, 'code': code,
+                 'display': (self.index.lookup(code, as_of).display or code)}
+                for code in page
+            ]
+        }
+        return expanded
+
+
+def main():
+    """Expand a filter from the command line, e.g. primaryDomain='Medisinsk genetikk'."""
+    if len(sys.argv) < 2:
+        print("Usage: python nlk_valueset_expansion.py <property>=<value> [...] [--date=YYYY-MM-DD] [--count=N]")
+        print("Example: python nlk_valueset_expansion.py 'primaryDomain=Medisinsk genetikk' status=valid")
+        return 1
+
+    csv_file = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_processing.csv"
+    if not Path(csv_file).exists():
+        print(f"❌ CSV file not found: {csv_file}")
+        return 1
+
+    filters = []
+    date = None
+    count = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--date='):
+            date = arg.split('=', 1)[1]
+        elif arg.startswith('--count='):
+            count = int(arg.split('=', 1)[1])
+        else:
+            prop, value = arg.split('=', 1)
+            filters.append({'property': prop, 'op': '=', 'value': value})
+
+    expander = NLKValueSetExpander(NLKCodeIndex.from_csv(csv_file))
+    try:
+        expansion = expander.expand(filters, date=date, count=count)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(json.dumps(expansion, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
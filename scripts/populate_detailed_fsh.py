@@ -11,37 +11,98 @@ import pandas as pd
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, Optional
 import sys
 import os
 
 # Add scripts directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from generate_enhanced_fsh import (SYNTAX_MODES, SYNTAX_MULTILINE, SYNTAX_SINGLE_LINE,
+                                    FSHConceptPropertiesMixin)
+from nlk_profiling import profiled_main, span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
-class NLKDetailedFSHPopulator:
+class NLKDetailedFSHPopulator(FSHConceptPropertiesMixin):
     """Populates the existing NLK detailed FSH CodeSystem with complete metadata."""
     
-    def __init__(self, csv_path: str):
-        """Initialize with path to cleaned CSV file."""
+    TEMPORAL_PROPERTIES = [
+        ('gyldig_fra', 'validFrom', 'valueDateTime'),
+        ('gyldig_til', 'validTo', 'valueDateTime'),
+        ('erstattes_av', 'replacedBy', 'valueCode'),
+        ('endringsdato', 'changeDate', 'valueDateTime'),
+    ]
+    # kodedefinisjon is emitted as the concept definition, not as a property
+    LAB_PROPERTIES = [
+        ('komponent', 'component'),
+        ('komponent_spesifikasjon', 'componentSpec'),
+        ('system', 'system'),
+        ('system_spesifikasjon', 'systemSpec'),
+        ('egenskapsart', 'propertyType'),
+        ('egenskapsart_spesifikasjon', 'propertySpec'),
+        ('enhet', 'unit'),
+        ('primært_fagområde', 'primaryDomain'),
+        ('sekundært_fagområde', 'secondaryDomain'),
+        ('gruppering', 'grouping')
+    ]
+    
+    def __init__(self, csv_path: str, syntax_mode: str = SYNTAX_MULTILINE,
+                 df: Optional[pd.DataFrame] = None):
+        """
+        Initialize with path to cleaned CSV file.
+        
+        Args:
+            csv_path: Path to cleaned CSV file (only named in the header if df is given)
+            syntax_mode: Concept property syntax, 'multiline' or 'single-line'
+            df: Already loaded data to use instead of reading csv_path
+        """
+        if syntax_mode not in SYNTAX_MODES:
+            raise ValueError(f"Unsupported syntax mode: {syntax_mode}")
+        
         self.csv_path = Path(csv_path)
+        self.syntax_mode = syntax_mode
         self.df: Optional[pd.DataFrame] = None
+        self._source_df = df
+        
+        # FHIR CodeSystem property definitions
+        self.properties = {
+            'validFrom': {'type': 'dateTime', 'description': 'Valid from date'},
+            'validTo': {'type': 'dateTime', 'description': 'Valid to date'},
+            'replacedBy': {'type': 'code', 'description': 'Code that replaces this code'},
+            'changeDate': {'type': 'dateTime', 'description': 'Date of last change'},
+            'codeDefinition': {'type': 'string', 'description': 'Technical code definition'},
+            'component': {'type': 'string', 'description': 'Component being measured'},
+            'componentSpec': {'type': 'string', 'description': 'Component specification'},
+            'system': {'type': 'string', 'description': 'System/specimen type'},
+            'systemSpec': {'type': 'string', 'description': 'System specification'},
+            'propertyType': {'type': 'string', 'description': 'Type of property measured'},
+            'propertySpec': {'type': 'string', 'description': 'Property specification'},
+            'unit': {'type': 'string', 'description': 'Unit of measurement'},
+            'primaryDomain': {'type': 'string', 'description': 'Primary medical domain'},
+            'secondaryDomain': {'type': 'string', 'description': 'Secondary medical domain'},
+            'grouping': {'type': 'string', 'description': 'Grouping category'}
+        }
     
     def load_data(self) -> bool:
         """Load and validate CSV data."""
         try:
-            logger.info(f"Loading CSV data from: {self.csv_path}")
-            
-            self.df = pd.read_csv(
-                self.csv_path,
-                encoding='utf-8',
-                parse_dates=['gyldig_fra', 'gyldig_til', 'endringsdato'],
-                date_format='ISO8601'
-            )
+            if self._source_df is not None:
+                self.df = self._source_df.copy()
+                for col in ['gyldig_fra', 'gyldig_til', 'endringsdato']:
+                    self.df[col] = pd.to_datetime(self.df[col], format='ISO8601')
+            else:
+                logger.info(f"Loading CSV data from: {self.csv_path}")
+                
+                self.df = pd.read_csv(
+                    self.csv_path,
+                    encoding='utf-8',
+                    parse_dates=['gyldig_fra', 'gyldig_til', 'endringsdato'],
+                    date_format='ISO8601'
+                )
             
             logger.info(f"Loaded {len(self.df)} records with {len(self.df.columns)} columns")
             
@@ -59,41 +120,46 @@ class NLKDetailedFSHPopulator:
             logger.error(f"Error loading CSV data: {e}")
             return False
     
-    def _escape_fsh_string(self, text: str) -> str:
-        """Escape text for safe use in FSH strings."""
-        if pd.isna(text) or text == '':
-            return '""'
-        
-        # Convert to string and clean
-        text = str(text).strip()
-        
-        # Escape quotes and backslashes
-        text = text.replace('\\', '\\\\').replace('"', '\\"')
+    def _generate_property_definitions(self) -> str:
+        """Generate FSH property definitions for the CodeSystem header."""
+        definitions = ''
         
-        # Handle newlines
-        text = text.replace('\n', '\\n').replace('\r', '\\r')
+        for i, (prop_code, prop_def) in enumerate(self.properties.items()):
+            index = '0' if i == 0 else '+'
+            definitions += f'* ^property[{index}].code = #{prop_code}\n'
+            definitions += f'* ^property[=].description = "{prop_def["description"]}"\n'
+            definitions += f'* ^property[=].type = #{prop_def["type"]}\n\n'
         
-        return f'"{text}"'
+        return definitions
     
-    def _format_datetime(self, dt: pd.Timestamp) -> str:
-        """Format datetime for FHIR."""
-        if pd.isna(dt):
-            return None
-        return dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
-    
-    def _get_concept_status(self, row: pd.Series) -> str:
-        """Determine concept status based on validity dates."""
-        now = pd.Timestamp.now()
-        
-        # Check if expired
-        if not pd.isna(row['gyldig_til']) and row['gyldig_til'] < now:
-            return 'retired'
-        
-        # Check if not yet effective
-        if not pd.isna(row['gyldig_fra']) and row['gyldig_fra'] > now:
-            return 'draft'
-        
-        return 'active'
+    def get_codesystem_metadata(self) -> Dict[str, Any]:
+        """
+        Get CodeSystem metadata as FHIR R4 JSON elements (without concepts).
+        
+        Mirrors the FSH header written by generate_populated_fsh.
+        """
+        return {
+            'resourceType': 'CodeSystem',
+            'id': 'norsk-laboratoriekodeverk-detailed',
+            'url': 'http://hl7.no/fhir/ig/nlk-test/CodeSystem/norsk-laboratoriekodeverk-detailed',
+            'version': '7280.77',
+            'name': 'NorskLaboratoriekodeverkDetailed',
+            'title': 'Norsk Laboratoriekodeverk',
+            'status': 'active',
+            'experimental': True,
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'publisher': 'Espen',
+            'contact': [{'name': 'Espen'}],
+            'description': 'Norwegian Laboratory Codebook - a comprehensive terminology for laboratory medicine in Norway with complete metadata properties',
+            'jurisdiction': [{'coding': [{'system': 'urn:iso:std:iso:3166', 'code': 'NO', 'display': 'Norway'}]}],
+            'caseSensitive': True,
+            'content': 'complete',
+            'count': len(self.df) if self.df is not None else 0,
+            'property': [
+                {'code': prop_code, 'description': prop_def['description'], 'type': prop_def['type']}
+                for prop_code, prop_def in self.properties.items()
+            ]
+        }
     
     def generate_populated_concept(self, row: pd.Series) -> str:
         """Generate populated FSH concept with all available properties."""
@@ -109,75 +175,53 @@ class NLKDetailedFSHPopulator:
         if not pd.isna(definition) and definition.strip():
             concept += f'\n  * ^definition = {self._escape_fsh_string(definition)}'
         
-        # Build properties list
-        properties = []
-        
-        # Temporal properties from CSV columns
-        if not pd.isna(row['gyldig_fra']):
-            valid_from = self._format_datetime(row['gyldig_fra'])
-            properties.append(f'    * code = #validFrom\n    * valueDateTime = "{valid_from}"')
-        
-        if not pd.isna(row['gyldig_til']):
-            valid_to = self._format_datetime(row['gyldig_til'])
-            properties.append(f'    * code = #validTo\n    * valueDateTime = "{valid_to}"')
-        
-        if not pd.isna(row['erstattes_av']):
-            properties.append(f'    * code = #replacedBy\n    * valueCode = #{row["erstattes_av"]}')
-        
-        if not pd.isna(row['endringsdato']):
-            change_date = self._format_datetime(row['endringsdato'])
-            properties.append(f'    * code = #changeDate\n    * valueDateTime = "{change_date}"')
-        
-        # Laboratory-specific properties
-        lab_properties = [
-            ('kodedefinisjon', 'codeDefinition'),
-            ('komponent', 'component'),
-            ('komponent_spesifikasjon', 'componentSpec'),
-            ('system', 'system'),
-            ('system_spesifikasjon', 'systemSpec'),
-            ('egenskapsart', 'propertyType'),
-            ('egenskapsart_spesifikasjon', 'propertySpec'),
-            ('enhet', 'unit'),
-            ('primært_fagområde', 'primaryDomain'),
-            ('sekundært_fagområde', 'secondaryDomain'),
-            ('gruppering', 'grouping')
-        ]
-        
-        for csv_col, fsh_prop in lab_properties:
-            if csv_col in row and not pd.isna(row[csv_col]) and str(row[csv_col]).strip():
-                # Skip kodedefinisjon if already used as definition
-                if csv_col == 'kodedefinisjon' and not pd.isna(definition) and definition.strip():
-                    continue
-                    
-                value = self._escape_fsh_string(str(row[csv_col]).strip())
-                properties.append(f'    * code = #{fsh_prop}\n    * valueString = {value}')
-        
         # Add all properties to concept
-        if properties:
-            for prop in properties:
-                concept += '\n  * ^property[+]\n' + prop
+        for prop_code, value_type, value in self._get_concept_properties(row):
+            concept += '\n' + self._format_fsh_property(prop_code, value_type, value)
         
         return concept
     
     def generate_populated_fsh(self, output_file: str) -> None:
         """Generate the populated FSH CodeSystem."""
         
-        if not self.load_data():
-            logger.error("Failed to load data")
+        fsh_content = self.render_populated_fsh()
+        if fsh_content is None:
             return
         
+        # Write to file
+        output_path = Path(output_file)
+        with span('write_fsh'):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(fsh_content)
+        
+        logger.info(f"Populated FSH CodeSystem written to: {output_path}")
+    
+    def render_populated_fsh(self) -> Optional[str]:
+        """
+        Render the populated FSH CodeSystem as a string.
+        
+        Returns:
+            str: FSH content, or None if the data could not be loaded
+        """
+        with span('load_data'):
+            loaded = self.load_data()
+        if not loaded:
+            logger.error("Failed to load data")
+            return None
+        
         logger.info("Generating populated FSH CodeSystem...")
         
         # Count active/retired concepts
         active_count = 0
         retired_count = 0
         
-        for _, row in self.df.iterrows():
-            status = self._get_concept_status(row)
-            if status == 'active':
-                active_count += 1
-            elif status == 'retired':
-                retired_count += 1
+        with span('concept_status_counts', rows=len(self.df)):
+            for _, row in self.df.iterrows():
+                status = self._get_concept_status(row)
+                if status == 'active':
+                    active_count += 1
+                elif status == 'retired':
+                    retired_count += 1
         
         total_count = len(self.df)
         
@@ -206,67 +250,7 @@ Description: "Norwegian Laboratory Codebook - a comprehensive terminology for la
 * ^count = {total_count}
 
 // Properties for additional metadata
-* ^property[0].code = #validFrom
-* ^property[=].description = "Valid from date"
-* ^property[=].type = #dateTime
-
-* ^property[+].code = #validTo
-* ^property[=].description = "Valid to date"
-* ^property[=].type = #dateTime
-
-* ^property[+].code = #replacedBy
-* ^property[=].description = "Code that replaces this code"
-* ^property[=].type = #code
-
-* ^property[+].code = #changeDate
-* ^property[=].description = "Date of last change"
-* ^property[=].type = #dateTime
-
-* ^property[+].code = #codeDefinition
-* ^property[=].description = "Technical code definition"
-* ^property[=].type = #string
-
-* ^property[+].code = #component
-* ^property[=].description = "Component being measured"
-* ^property[=].type = #string
-
-* ^property[+].code = #componentSpec
-* ^property[=].description = "Component specification"
-* ^property[=].type = #string
-
-* ^property[+].code = #system
-* ^property[=].description = "System/specimen type"
-* ^property[=].type = #string
-
-* ^property[+].code = #systemSpec
-* ^property[=].description = "System specification"
-* ^property[=].type = #string
-
-* ^property[+].code = #propertyType
-* ^property[=].description = "Type of property measured"
-* ^property[=].type = #string
-
-* ^property[+].code = #propertySpec
-* ^property[=].description = "Property specification"
-* ^property[=].type = #string
-
-* ^property[+].code = #unit
-* ^property[=].description = "Unit of measurement"
-* ^property[=].type = #string
-
-* ^property[+].code = #primaryDomain
-* ^property[=].description = "Primary medical domain"
-* ^property[=].type = #string
-
-* ^property[+].code = #secondaryDomain
-* ^property[=].description = "Secondary medical domain"
-* ^property[=].type = #string
-
-* ^property[+].code = #grouping
-* ^property[=].description = "Grouping category"
-* ^property[=].type = #string
-
-// Concepts with complete properties
+{self._generate_property_definitions()}// Concepts with complete properties
 '''
         
         # Process concepts in order
@@ -275,25 +259,20 @@ Description: "Norwegian Laboratory Codebook - a comprehensive terminology for la
         
         logger.info(f"Processing {len(concepts_df)} concepts...")
         
-        for _, row in concepts_df.iterrows():
-            try:
-                concept_fsh = self.generate_populated_concept(row)
-                fsh_content += concept_fsh + "\n"
-                concept_count += 1
+        with span('generate_concepts', rows=len(concepts_df)):
+            for _, row in concepts_df.iterrows():
+                try:
+                    concept_fsh = self.generate_populated_concept(row)
+                    fsh_content += concept_fsh + "\n"
+                    concept_count += 1
                 
-                if concept_count % 500 == 0:
-                    logger.info(f"Processed {concept_count:,} concepts...")
+                    if concept_count % 500 == 0:
+                        logger.info(f"Processed {concept_count:,} concepts...")
                     
-            except Exception as e:
-                logger.warning(f"Error processing concept {row.get('kode', 'unknown')}: {e}")
-                continue
-        
-        # Write to file
-        output_path = Path(output_file)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(fsh_content)
+                except Exception as e:
+                    logger.warning(f"Error processing concept {row.get('kode', 'unknown')}: {e}")
+                    continue
         
-        logger.info(f"Populated FSH CodeSystem written to: {output_path}")
         logger.info(f"Total concepts processed: {concept_count:,}")
         
         # Generate statistics
@@ -309,14 +288,22 @@ Description: "Norwegian Laboratory Codebook - a comprehensive terminology for la
             if col in self.df.columns:
                 completeness = (1 - self.df[col].isna().sum() / total_count) * 100
                 logger.info(f"   {col}: {completeness:.1f}%")
+        
+        return fsh_content
 
 
+@profiled_main
 def main():
     """Main function to populate the detailed NLK CodeSystem."""
     
+    # Emit SUSHI-compliant single-line properties directly if requested,
+    # making the fix_fsh_property_syntax.py pass unnecessary
+    syntax_mode = SYNTAX_SINGLE_LINE if '--single-line' in sys.argv[1:] else SYNTAX_MULTILINE
+    args = [arg for arg in sys.argv[1:] if arg != '--single-line']
+    
     # Path to deduplicated CSV file (use command line arg if provided)
-    if len(sys.argv) > 1:
-        csv_file = sys.argv[1]
+    if len(args) > 0:
+        csv_file = args[0]
     else:
         csv_file = "../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_full_deduplicated.csv"
     
@@ -329,13 +316,13 @@ def main():
     print("=" * 80)
     
     # Output file (use command line arg if provided)
-    if len(sys.argv) > 2:
-        output_file = sys.argv[2]
+    if len(args) > 1:
+        output_file = args[1]
     else:
         output_file = "nlk-detailed-populated.fsh"
     
     # Generate populated CodeSystem
-    populator = NLKDetailedFSHPopulator(csv_file)
+    populator = NLKDetailedFSHPopulator(csv_file, syntax_mode=syntax_mode)
     populator.generate_populated_fsh(output_file)
     
     print("\n✅ FSH CodeSystem population completed!")
@@ -7,13 +7,224 @@ Optimized for working with the converted CSV dataset
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import gzip
+import json
 import logging
-from typing import Optional, List, Dict, Any
+import os
+import sqlite3
+import sys
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator, TextIO, Tuple, Union
+
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_profiling import profiled_main, span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# CSV column -> (FHIR concept property code, value type) for NDJSON export,
+# using the same property codes as the detailed FSH CodeSystem
+NDJSON_PROPERTIES = [
+    ('gyldig_fra', 'validFrom', 'valueDateTime'),
+    ('gyldig_til', 'validTo', 'valueDateTime'),
+    ('erstattes_av', 'replacedBy', 'valueCode'),
+    ('endringsdato', 'changeDate', 'valueDateTime'),
+    ('komponent', 'component', 'valueString'),
+    ('komponent_spesifikasjon', 'componentSpec', 'valueString'),
+    ('system', 'system', 'valueString'),
+    ('system_spesifikasjon', 'systemSpec', 'valueString'),
+    ('egenskapsart', 'propertyType', 'valueString'),
+    ('egenskapsart_spesifikasjon', 'propertySpec', 'valueString'),
+    ('enhet', 'unit', 'valueString'),
+    ('primært_fagområde', 'primaryDomain', 'valueString'),
+    ('sekundært_fagområde', 'secondaryDomain', 'valueString'),
+    ('gruppering', 'grouping', 'valueString'),
+]
+
+NDJSON_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S+00:00'
+
+# SQLite export schema: one row per code version, domains normalized
+SQLITE_SCHEMA = """
+CREATE TABLE metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE domains (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE concepts (
+    id INTEGER PRIMARY KEY,
+    kode TEXT NOT NULL,
+    gyldig_fra TEXT,
+    gyldig_til TEXT,
+    erstattes_av TEXT,
+    endringsdato TEXT,
+    norsk_bruksnavn TEXT,
+    kodedefinisjon TEXT,
+    komponent TEXT,
+    komponent_spesifikasjon TEXT,
+    system TEXT,
+    system_spesifikasjon TEXT,
+    egenskapsart TEXT,
+    egenskapsart_spesifikasjon TEXT,
+    enhet TEXT,
+    primary_domain_id INTEGER REFERENCES domains(id),
+    secondary_domain_id INTEGER REFERENCES domains(id),
+    gruppering TEXT
+);
+CREATE TABLE replacements (
+    kode TEXT NOT NULL,
+    erstattes_av TEXT NOT NULL,
+    gyldig_til TEXT,
+    PRIMARY KEY (kode, erstattes_av)
+) WITHOUT ROWID;
+CREATE VIEW concept_view AS
+SELECT c.*, p.name AS primært_fagområde, s.name AS sekundært_fagområde
+FROM concepts c
+LEFT JOIN domains p ON p.id = c.primary_domain_id
+LEFT JOIN domains s ON s.id = c.secondary_domain_id;
+"""
+
+# Indexes are created after the bulk insert, which is faster than maintaining them row by row
+SQLITE_INDEXES = """
+CREATE INDEX idx_concepts_kode ON concepts(kode);
+CREATE INDEX idx_concepts_validity ON concepts(gyldig_fra, gyldig_til);
+CREATE INDEX idx_concepts_primary_domain ON concepts(primary_domain_id);
+CREATE INDEX idx_concepts_secondary_domain ON concepts(secondary_domain_id);
+CREATE INDEX idx_replacements_target ON replacements(erstattes_av);
+"""
+
+SQLITE_FTS = """
+CREATE VIRTUAL TABLE concept_fts USING fts5(
+    norsk_bruksnavn, kodedefinisjon, komponent,
+    content='concepts', content_rowid='id', tokenize='unicode61 remove_diacritics 0'
+);
+INSERT INTO concept_fts(concept_fts) VALUES ('rebuild');
+"""
+
+SQLITE_CONCEPT_COLUMNS = [
+    'kode', 'gyldig_fra', 'gyldig_til', 'erstattes_av', 'endringsdato',
+    'norsk_bruksnavn', 'kodedefinisjon', 'komponent', 'komponent_spesifikasjon',
+    'system', 'system_spesifikasjon', 'egenskapsart', 'egenskapsart_spesifikasjon',
+    'enhet', 'gruppering'
+]
+
+# Categorical columns with bitmap facet indexes
+FACET_COLUMNS = [
+    'primært_fagområde', 'sekundært_fagområde', 'gruppering',
+    'system', 'enhet', 'egenskapsart'
+]
+
+# Number of set bits per byte value, for counting rows in packed bitmaps
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16)
+
+
+def _open_ndjson(path: Path, mode: str, compression: Optional[str] = None) -> TextIO:
+    """Open an NDJSON file as text, using gzip for 'gzip' compression or a .gz suffix."""
+    if compression == 'gzip' or (compression is None and path.suffix == '.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _ndjson_lines(chunk: pd.DataFrame) -> Iterator[str]:
+    """Yield one NDJSON concept line per row of a DataFrame chunk."""
+    chunk = chunk.copy()
+    
+    # Format dates column-wise rather than per cell
+    for col, _, value_type in NDJSON_PROPERTIES:
+        if value_type == 'valueDateTime' and col in chunk.columns:
+            chunk[col] = pd.to_datetime(chunk[col], errors='coerce').dt.strftime(NDJSON_DATETIME_FORMAT)
+    
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    
+    for record in chunk.to_dict('records'):
+        concept = {'code': str(record['kode']).strip()}
+        
+        display = record.get('norsk_bruksnavn')
+        if display is not None:
+            concept['display'] = str(display).strip()
+        
+        definition = record.get('kodedefinisjon')
+        if definition is not None and str(definition).strip():
+            concept['definition'] = str(definition).strip()
+        
+        properties = []
+        for col, prop_code, value_type in NDJSON_PROPERTIES:
+            value = record.get(col)
+            if value is not None and str(value).strip():
+                properties.append({'code': prop_code, value_type: str(value).strip()})
+        
+        if properties:
+            concept['property'] = properties
+        
+        yield json.dumps(concept, ensure_ascii=False) + '\n'
+
+
+def iter_ndjson_concepts(path: str, start_line: int = 0, end_line: Optional[int] = None,
+                         compression: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream concepts from an NDJSON export one line at a time.
+    
+    Args:
+        path: NDJSON file path (.gz files are decompressed on the fly)
+        start_line: First line to read (0-based), for parallel loads by line range
+        end_line: Line to stop before (default: end of file)
+        compression: 'gzip' to force decompression (default: inferred from suffix)
+    """
+    with _open_ndjson(Path(path), 'r', compression) as f:
+        for line in islice(f, start_line, end_line):
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_ndjson_chunks(path: str, chunk_size: int = 10000, start_line: int = 0,
+                       end_line: Optional[int] = None,
+                       compression: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream an NDJSON export back as DataFrame chunks in the CSV column schema.
+    
+    Args:
+        path: NDJSON file path (.gz files are decompressed on the fly)
+        chunk_size: Number of concepts per DataFrame chunk
+        start_line: First line to read (0-based)
+        end_line: Line to stop before (default: end of file)
+        compression: 'gzip' to force decompression (default: inferred from suffix)
+    """
+    property_columns = {prop_code: col for col, prop_code, _ in NDJSON_PROPERTIES}
+    columns = ['kode', 'norsk_bruksnavn', 'kodedefinisjon'] + [col for col, _, _ in NDJSON_PROPERTIES]
+    date_columns = [col for col, _, value_type in NDJSON_PROPERTIES if value_type == 'valueDateTime']
+    
+    def to_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+        frame = pd.DataFrame(rows, columns=columns)
+        for col in date_columns:
+            frame[col] = pd.to_datetime(frame[col], errors='coerce', utc=True).dt.tz_localize(None)
+        return frame
+    
+    rows = []
+    for concept in iter_ndjson_concepts(path, start_line, end_line, compression):
+        row = {
+            'kode': concept.get('code'),
+            'norsk_bruksnavn': concept.get('display'),
+            'kodedefinisjon': concept.get('definition'),
+        }
+        for prop in concept.get('property', []):
+            col = property_columns.get(prop['code'])
+            if col:
+                row[col] = next(v for k, v in prop.items() if k.startswith('value'))
+        rows.append(row)
+        
+        if len(rows) >= chunk_size:
+            yield to_frame(rows)
+            rows = []
+    
+    if rows:
+        yield to_frame(rows)
+
+
 class NLKDataProcessor:
     """
     High-performance processor for Norwegian Laboratory Codebook CSV data
@@ -29,6 +240,8 @@ class NLKDataProcessor:
         """
         self.csv_path = Path(csv_path)
         self.df: Optional[pd.DataFrame] = None
+        self._facet_index: Optional[Dict[str, Dict[str, np.ndarray]]] = None
+        self._facet_keys: Dict[str, Dict[str, List[str]]] = {}
         self._load_data()
     
     def _load_data(self) -> None:
@@ -37,26 +250,155 @@ class NLKDataProcessor:
             logger.info(f"Loading CSV data from: {self.csv_path}")
             
             # Load with optimized settings for large datasets
-            self.df = pd.read_csv(
-                self.csv_path,
-                encoding='utf-8',
-                low_memory=False,  # Read entire file for consistent dtypes
-                na_values=['', 'None', 'null'],  # Treat these as NaN
-                keep_default_na=True
-            )
+            with span('read_csv') as read_span:
+                self.df = pd.read_csv(
+                    self.csv_path,
+                    encoding='utf-8',
+                    low_memory=False,  # Read entire file for consistent dtypes
+                    na_values=['', 'None', 'null'],  # Treat these as NaN
+                    keep_default_na=True
+                )
+                read_span['rows'] = len(self.df)
             
             # Convert date columns
-            date_columns = ['gyldig_fra', 'gyldig_til', 'endringsdato']
-            for col in date_columns:
-                if col in self.df.columns:
-                    self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
+            with span('parse_dates', rows=len(self.df)):
+                date_columns = ['gyldig_fra', 'gyldig_til', 'endringsdato']
+                for col in date_columns:
+                    if col in self.df.columns:
+                        self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
             
             logger.info(f"Loaded {len(self.df):,} records with {len(self.df.columns)} columns")
             
+            # Facet indexes are rebuilt lazily for the new data
+            self._facet_index = None
+            
         except Exception as e:
             logger.error(f"Error loading CSV data: {str(e)}")
             raise
     
+    def _build_facet_index(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Build packed row bitmaps per distinct value of each facet column"""
+        if self.df is None:
+            raise ValueError("Data not loaded")
+        
+        n_rows = len(self.df)
+        facet_index = {}
+        self._facet_keys = {}
+        
+        with span('build_facet_index', rows=n_rows):
+            for col in FACET_COLUMNS:
+                if col not in self.df.columns:
+                    continue
+                
+                values = self.df[col].astype('string').str.strip()
+                codes, uniques = pd.factorize(values, use_na_sentinel=True)
+                
+                bitmaps = {}
+                for i, value in enumerate(uniques):
+                    if not value:
+                        continue
+                    bitmaps[value] = np.packbits(codes == i)
+                
+                facet_index[col] = bitmaps
+                
+                # Spellings differing only in case (e.g. 'System' and 'SYSTEM') share a key
+                keys: Dict[str, List[str]] = {}
+                for value in bitmaps:
+                    keys.setdefault(value.casefold(), []).append(value)
+                self._facet_keys[col] = keys
+        
+        self._n_rows = n_rows
+        self._facet_index = facet_index
+        logger.info(f"Built facet indexes for {len(facet_index)} columns")
+        return facet_index
+    
+    def _get_facet_index(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Get the facet indexes, building them on first use"""
+        if self._facet_index is None:
+            return self._build_facet_index()
+        return self._facet_index
+    
+    def facet_bitmap(self, column: str, values: Union[str, List[str]]) -> np.ndarray:
+        """
+        Get a packed row bitmap for rows whose column equals any of the values
+        
+        Matching is exact (after trimming) but case-insensitive. Combine
+        bitmaps with & (AND) and | (OR).
+        
+        Args:
+            column: Facet column (one of FACET_COLUMNS)
+            values: Value or list of values (combined with OR)
+        """
+        facet_index = self._get_facet_index()
+        
+        if column not in facet_index:
+            raise ValueError(f"No facet index for column: {column}")
+        
+        if isinstance(values, str):
+            values = [values]
+        
+        bitmap = np.zeros((self._n_rows + 7) // 8, dtype=np.uint8)
+        for value in values:
+            for key in self._facet_keys[column].get(str(value).strip().casefold(), ()):
+                bitmap |= facet_index[column][key]
+        
+        return bitmap
+    
+    def rows_for_bitmap(self, bitmap: np.ndarray) -> pd.DataFrame:
+        """Get the rows selected by a packed row bitmap"""
+        positions = np.flatnonzero(np.unpackbits(bitmap, count=self._n_rows))
+        return self.df.iloc[positions].copy()
+    
+    def facet_counts(self, bitmap: Optional[np.ndarray] = None,
+                     facets: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Count rows per facet value, optionally within a selection bitmap
+        
+        Args:
+            bitmap: Selection bitmap (default: all rows)
+            facets: Facet columns to count (default: all indexed columns)
+        """
+        facet_index = self._get_facet_index()
+        
+        counts = {}
+        for col in facets or list(facet_index):
+            value_counts = {}
+            for value, value_bitmap in facet_index[col].items():
+                selected = value_bitmap if bitmap is None else value_bitmap & bitmap
+                count = int(_POPCOUNT[selected].sum())
+                if count:
+                    value_counts[value] = count
+            counts[col] = dict(sorted(value_counts.items(), key=lambda item: -item[1]))
+        
+        return counts
+    
+    def faceted_filter(self, filters: Dict[str, Union[str, List[str]]],
+                       facets: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Dict[str, Dict[str, int]]]:
+        """
+        Filter rows on several facet columns and count facet values in the result
+        
+        Values within a column are combined with OR, columns with AND, e.g.
+        {'primært_fagområde': 'Medisinsk genetikk', 'system': ['Plasma', 'Serum']}.
+        
+        Args:
+            filters: Column -> value or list of values
+            facets: Facet columns to count in the result (default: all)
+        
+        Returns:
+            tuple: (matching rows, facet counts)
+        """
+        facet_index = self._get_facet_index()
+        
+        bitmap = np.full((self._n_rows + 7) // 8, 0xFF, dtype=np.uint8)
+        if self._n_rows % 8:
+            # Clear padding bits past the last row
+            bitmap[-1] = np.uint8(0xFF << (8 - self._n_rows % 8) & 0xFF)
+        
+        for column, values in filters.items():
+            bitmap &= self.facet_bitmap(column, values)
+        
+        return self.rows_for_bitmap(bitmap), self.facet_counts(bitmap, facets)
+    
     def get_active_codes(self) -> pd.DataFrame:
         """Get all currently active laboratory codes"""
         if self.df is None:
@@ -91,18 +433,21 @@ class NLKDataProcessor:
         """
         Get codes by medical domain (fagområde)
         
+        Matches the primary or secondary domain exactly (case-insensitive)
+        using the facet bitmap indexes.
+        
         Args:
             domain: Medical domain name (e.g., 'Medisinsk biokjemi')
         """
         if self.df is None:
             raise ValueError("Data not loaded")
         
-        domain_mask = (
-            self.df['primært_fagområde'].str.contains(domain, case=False, na=False) |
-            self.df['sekundært_fagområde'].str.contains(domain, case=False, na=False)
+        domain_bitmap = (
+            self.facet_bitmap('primært_fagområde', domain) |
+            self.facet_bitmap('sekundært_fagområde', domain)
         )
         
-        return self.df[domain_mask].copy()
+        return self.rows_for_bitmap(domain_bitmap)
     
     def search_codes(self, search_term: str, columns: List[str] = None) -> pd.DataFrame:
         """
@@ -162,29 +507,134 @@ class NLKDataProcessor:
         return domain_stats
     
     def export_filtered_data(self, filtered_df: pd.DataFrame, 
-                           output_path: str, format: str = 'csv') -> str:
+                           output_path: str, format: str = 'csv',
+                           chunk_size: int = 10000,
+                           compression: Optional[str] = None) -> str:
         """
         Export filtered data to file
         
         Args:
             filtered_df: Filtered DataFrame to export
             output_path: Output file path
-            format: Export format ('csv', 'excel', 'json')
+            format: Export format ('csv', 'excel', 'json', 'ndjson')
+            chunk_size: Rows per write for streaming formats (ndjson)
+            compression: 'gzip' for compressed ndjson (default: inferred from .gz suffix)
         """
         output_file = Path(output_path)
         
-        if format.lower() == 'csv':
+        if format.lower() == 'ndjson':
+            # One FHIR-style concept per line, written chunk by chunk
+            with _open_ndjson(output_file, 'w', compression) as f:
+                for start in range(0, len(filtered_df), chunk_size):
+                    chunk = filtered_df.iloc[start:start + chunk_size]
+                    f.writelines(_ndjson_lines(chunk))
+        elif format.lower() == 'csv':
             filtered_df.to_csv(output_file, index=False, encoding='utf-8')
         elif format.lower() == 'excel':
             filtered_df.to_excel(output_file, index=False, engine='openpyxl')
         elif format.lower() == 'json':
             filtered_df.to_json(output_file, orient='records', indent=2)
+        elif format.lower() == 'sqlite':
+            return self.export_sqlite(filtered_df, output_path)
         else:
             raise ValueError(f"Unsupported format: {format}")
         
         logger.info(f"Exported {len(filtered_df):,} records to {output_file}")
         return str(output_file)
     
+    def export_sqlite(self, filtered_df: pd.DataFrame, output_path: str) -> str:
+        """
+        Export data to a single-file SQLite database
+        
+        Creates a concept table (one row per code version) with normalized
+        domains, indexes on kode, validity dates and domains, an FTS5 table
+        over display name, definition and component, and a replacement edge
+        table from erstattes_av. All rows are bulk-inserted in one transaction.
+        
+        Args:
+            filtered_df: DataFrame to export
+            output_path: Output database path (overwritten if it exists)
+        """
+        output_file = Path(output_path)
+        if output_file.exists():
+            output_file.unlink()
+        
+        df = filtered_df.copy()
+        
+        # Dates as ISO strings, which sort and compare correctly in SQL
+        for col in ['gyldig_fra', 'gyldig_til', 'endringsdato']:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%dT%H:%M:%S')
+        
+        for col in SQLITE_CONCEPT_COLUMNS + ['primært_fagområde', 'sekundært_fagområde']:
+            if col not in df.columns:
+                df[col] = None
+        
+        df = df.astype(object).where(df.notna(), None)
+        
+        # Normalize domains to ids
+        domain_names = pd.concat([df['primært_fagområde'], df['sekundært_fagområde']]).dropna().unique()
+        domain_ids = {name: i for i, name in enumerate(sorted(domain_names), 1)}
+        
+        concept_rows = [
+            tuple(values) + (domain_ids.get(primary), domain_ids.get(secondary))
+            for values, primary, secondary in zip(
+                df[SQLITE_CONCEPT_COLUMNS].itertuples(index=False, name=None),
+                df['primært_fagområde'],
+                df['sekundært_fagområde']
+            )
+        ]
+        
+        replacement_rows = {
+            (kode, target): gyldig_til
+            for kode, target, gyldig_til in zip(df['kode'], df['erstattes_av'], df['gyldig_til'])
+            if kode is not None and target is not None
+        }
+        
+        concept_columns = SQLITE_CONCEPT_COLUMNS + ['primary_domain_id', 'secondary_domain_id']
+        placeholders = ', '.join('?' for _ in concept_columns)
+        
+        connection = sqlite3.connect(output_file)
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.executescript(SQLITE_SCHEMA)
+            
+            with connection:
+                connection.executemany(
+                    "INSERT INTO domains (id, name) VALUES (?, ?)",
+                    [(i, name) for name, i in domain_ids.items()]
+                )
+                connection.executemany(
+                    f"INSERT INTO concepts ({', '.join(concept_columns)}) VALUES ({placeholders})",
+                    concept_rows
+                )
+                connection.executemany(
+                    "INSERT INTO replacements (kode, erstattes_av, gyldig_til) VALUES (?, ?, ?)",
+                    [(kode, target, gyldig_til) for (kode, target), gyldig_til in replacement_rows.items()]
+                )
+                connection.executemany(
+                    "INSERT INTO metadata (key, value) VALUES (?, ?)",
+                    [('source', self.csv_path.name),
+                     ('generated', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')),
+                     ('concepts', str(len(concept_rows)))]
+                )
+            
+            connection.executescript(SQLITE_INDEXES)
+            
+            try:
+                connection.executescript(SQLITE_FTS)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"FTS5 not available, skipping full-text index: {e}")
+            
+            connection.execute("ANALYZE")
+            connection.commit()
+        finally:
+            connection.close()
+        
+        logger.info(f"Exported {len(concept_rows):,} records to SQLite database {output_file}")
+        return str(output_file)
+    
     def generate_fsh_codesystem(self, output_path: str = None) -> str:
         """
         Generate FSH CodeSystem definition from CSV data
@@ -247,6 +697,7 @@ Description: "Norwegian Laboratory Codebook - comprehensive terminology for labo
         logger.info(f"Generated FSH CodeSystem: {output_path}")
         return output_path
 
+@profiled_main
 def main():
     """Example usage of the NLK data processor"""
     
@@ -262,12 +713,14 @@ def main():
     print("=" * 60)
     
     # Load data
-    processor = NLKDataProcessor(csv_file)
+    with span('load_data'):
+        processor = NLKDataProcessor(csv_file)
     
     # Get basic statistics
     total_codes = len(processor.df)
-    active_codes = len(processor.get_active_codes())
-    historical_codes = len(processor.get_historical_codes())
+    with span('active_historical_codes', rows=total_codes):
+        active_codes = len(processor.get_active_codes())
+        historical_codes = len(processor.get_historical_codes())
     
     print(f"\n📊 Dataset Overview:")
     print(f"   Total codes: {total_codes:,}")
@@ -276,13 +729,15 @@ def main():
     
     # Domain statistics
     print(f"\n🧬 Medical Domain Breakdown:")
-    domain_stats = processor.get_domain_statistics()
+    with span('domain_statistics', rows=total_codes):
+        domain_stats = processor.get_domain_statistics()
     for domain, stats in domain_stats.items():
         print(f"   {domain}: {stats['total']:,} codes ({stats['percentage']:.1f}%)")
     
     # Generate FSH CodeSystem
     print(f"\n🍣 Generating FSH CodeSystem...")
-    fsh_file = processor.generate_fsh_codesystem("nlk_from_csv.fsh")
+    with span('generate_fsh_codesystem', rows=total_codes):
+        fsh_file = processor.generate_fsh_codesystem("nlk_from_csv.fsh")
     print(f"   Created: {fsh_file}")
     
     print(f"\n✅ Processing completed successfully!")
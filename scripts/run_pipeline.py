@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+NLK Pipeline Orchestrator
+
+Runs the conversion -> FSH chain as a DAG of stages with explicit inputs and
+outputs:
+
+  convert            Excel -> _full.csv / _processing.csv   (convert_excel_to_csv.py)
+  clean              _full.csv -> _full_cleaned.csv + cleaning log  (validate_csv_quality.py --clean)
+  deduplicate        _full_cleaned.csv -> _full_deduplicated.csv  (fix_fsh_duplicates.py)
+  populate           _full_deduplicated.csv -> populated FSH  (populate_detailed_fsh.py)
+  fix_syntax         populated FSH -> detailed CodeSystem FSH (fix_fsh_property_syntax.py)
+  validate_fsh       detailed FSH -> validation report        (validate_fsh.py)
+  extract_genetics   detailed FSH -> Medical Genetics FSH     (extract_medical_genetics.py)
+
+Each stage is fingerprinted from the content of its input files, the source
+code of the scripts it runs (including every scripts/ module they import,
+directly or indirectly) and its parameters. A stage is skipped when its
+fingerprint matches the last successful run and its outputs are unchanged,
+so after editing only populate_detailed_fsh.py just populate and the stages
+downstream of it run again. A regenerated file that is byte-identical does
+not trigger its downstream stages; note that populate stamps the generation
+time into its FSH header, so its output always differs. Stages whose inputs
+are ready run in parallel worker processes.
+
+State (fingerprints and output hashes) is kept in <build-dir>/pipeline_state.json,
+stage output in <build-dir>/logs/<stage>.log.
+
+Usage:
+  python run_pipeline.py [--force] [--dry-run] [--jobs 2] [--report pipeline_report.json]
+  python run_pipeline.py --input-csv ../nlk-test/resources/csv_output/norsk_laboratoriekodeverk_7280.77-clean_full.csv
+"""
+
+import argparse
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+# Add scripts directory to Python path
+SCRIPTS_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(str(SCRIPTS_DIR))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RESOURCES_DIR = "../nlk-test/resources"
+CODESYSTEMS_DIR = "../nlk-test/input/fsh/codesystems"
+DEFAULT_EXCEL = f"{RESOURCES_DIR}/Norsk Laboratoriekodeverk 7280.77-clean.xlsx"
+DEFAULT_BUILD_DIR = f"{RESOURCES_DIR}/build"
+STATE_FILE = "pipeline_state.json"
+HASH_BLOCK_SIZE = 1 << 20
+
+
+@dataclass
+class Stage:
+    """A pipeline stage: a function with named input and output files."""
+    name: str
+    func: Callable[[Dict[str, str], Dict[str, str], Dict[str, Any]], Dict[str, Any]]
+    inputs: Dict[str, str]
+    outputs: Dict[str, str]
+    scripts: List[str]  # entry scripts; the modules they import are found automatically
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+# ----------------------------------------------------------------------
+# Stage functions (run in worker processes)
+# ----------------------------------------------------------------------
+
+def run_convert(inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+    from convert_excel_to_csv import convert_excel_to_csv
+
+    result = convert_excel_to_csv(inputs['excel'], str(Path(outputs['full_csv']).parent))
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    return {'rows': result['statistics']['rows']}
+
+
+def run_clean(inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+    from validate_csv_quality import CSVQualityValidator
+
+    validator = CSVQualityValidator(inputs['full_csv'])
+    report = validator.run_full_validation()
+    validator.generate_report(outputs['quality_report'])
+
+    critical = report.get_issues_by_severity('critical')
+    if critical:
+        raise RuntimeError(f"{len(critical)} critical data quality issues, see {outputs['quality_report']}")
+
+    cleaned_df = validator.clean_data()
+    cleaned_df.to_csv(outputs['cleaned_csv'], index=False, encoding='utf-8')
+    validator.write_cleaning_log(outputs['cleaning_log'])
+    return {'rows': len(cleaned_df), 'issues': len(report.issues), 'cleaning_changes': report.cleaning_changes}
+
+
+def run_deduplicate(inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+    import pandas as pd
+    from fix_fsh_duplicates import select_active_versions
+
+    df = pd.read_csv(inputs['cleaned_csv'])
+    deduplicated = select_active_versions(df)
+    deduplicated.to_csv(outputs['deduplicated_csv'], index=False)
+
+    remaining = deduplicated.duplicated(subset=[deduplicated.columns[0]]).sum()
+    if remaining:
+        raise RuntimeError(f"{remaining} duplicate codes remain after deduplication")
+    return {'rows': len(deduplicated), 'removed': len(df) - len(deduplicated)}
+
+
+def run_populate(inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+    from populate_detailed_fsh import NLKDetailedFSHPopulator
+
+    populator = NLKDetailedFSHPopulator(inputs['deduplicated_csv'])
+    populator.generate_populated_fsh(outputs['populated_fsh'])
+    if populator.df is None:
+        raise RuntimeError("Failed to load deduplicated CSV")
+    return {'rows': len(populator.df)}
+
+
+def run_fix_syntax(inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+    from fix_fsh_property_syntax import fix_fsh_property_syntax_stream
+
+    with open(inputs['populated_fsh'], 'r', encoding='utf-8') as source, \
+            open(outputs['detailed_fsh'], 'w', encoding='utf-8') as target:
+        stats = fix_fsh_property_syntax_stream(source, target)
+
+    if stats.get('remaining'):
+        raise RuntimeError(f"{stats['remaining']} multi-line properties remain")
+    return stats
+
+
+def run_validate_fsh(inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+    from validate_fsh import FSHValidator
+
+    validator = FSHValidator(inputs['detailed_fsh'])
+    valid = validator.run_validation()
+
+    summary = {
+        'valid': valid,
+        'concepts': len(validator.concepts),
+        'errors': len([i for i in validator.issues if i['severity'] == 'ERROR']),
+        'warnings': len(validator.warnings),
+    }
+    with open(outputs['validation_report'], 'w', encoding='utf-8') as f:
+        json.dump({**summary, 'issues': validator.issues, 'warning_details': validator.warnings},
+                  f, ensure_ascii=False, indent=2)
+
+    if not valid:
+        raise RuntimeError(f"FSH validation failed with {summary['errors']} errors")
+    return summary
+
+
+def run_extract_genetics(inputs: Dict[str, str], outputs: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+    from extract_medical_genetics import extract_medical_genetics_codes
+
+    if not extract_medical_genetics_codes(inputs['detailed_fsh'], outputs['genetics_fsh']):
+        raise RuntimeError("Medical Genetics extraction failed")
+    return {}
+
+
+def define_stages(excel_path: str, csv_dir: str, codesystems_dir: str, build_dir: str,
+                  input_csv: Optional[str] = None) -> List[Stage]:
+    """
+    Declare the pipeline stages with their input and output files.
+
+    Args:
+        excel_path: Source Excel file
+        csv_dir: Directory for CSV outputs
+        codesystems_dir: Directory for CodeSystem FSH outputs
+        build_dir: Directory for intermediate files
+        input_csv: Start from an existing full CSV instead of converting the Excel file
+
+    Returns:
+        list: Pipeline stages
+    """
+    csv = Path(csv_dir)
+    build = Path(build_dir)
+    codesystems = Path(codesystems_dir)
+
+    if input_csv:
+        base_name = Path(input_csv).stem
+        base_name = base_name[:-len('_full')] if base_name.endswith('_full') else base_name
+        full_csv = input_csv
+    else:
+        base_name = Path(excel_path).stem.replace(' ', '_').lower()
+        full_csv = str(csv / f"{base_name}_full.csv")
+    cleaned_csv = str(csv / f"{base_name}_full_cleaned.csv")
+    deduplicated_csv = str(csv / f"{base_name}_full_deduplicated.csv")
+    populated_fsh = str(build / "nlk-detailed-populated.fsh")
+    detailed_fsh = str(codesystems / "nlk-test.codesystem-detailed.fsh")
+
+    stages = [] if input_csv else [
+        Stage('convert', run_convert,
+              inputs={'excel': excel_path},
+              outputs={'full_csv': full_csv, 'processing_csv': str(csv / f"{base_name}_processing.csv")},
+              scripts=['convert_excel_to_csv.py']),
+    ]
+    return stages + [
+        Stage('clean', run_clean,
+              inputs={'full_csv': full_csv},
+              outputs={'cleaned_csv': cleaned_csv,
+                       'quality_report': str(csv / f"{base_name}_full_quality_report.txt"),
+                       'cleaning_log': str(csv / f"{base_name}_full_cleaning_log.csv")},
+              scripts=['validate_csv_quality.py']),
+        Stage('deduplicate', run_deduplicate,
+              inputs={'cleaned_csv': cleaned_csv},
+              outputs={'deduplicated_csv': deduplicated_csv},
+              scripts=['fix_fsh_duplicates.py']),
+        Stage('populate', run_populate,
+              inputs={'deduplicated_csv': deduplicated_csv},
+              outputs={'populated_fsh': populated_fsh},
+              scripts=['populate_detailed_fsh.py']),
+        Stage('fix_syntax', run_fix_syntax,
+              inputs={'populated_fsh': populated_fsh},
+              outputs={'detailed_fsh': detailed_fsh},
+              scripts=['fix_fsh_property_syntax.py']),
+        Stage('validate_fsh', run_validate_fsh,
+              inputs={'detailed_fsh': detailed_fsh},
+              outputs={'validation_report': str(build / "fsh_validation_report.json")},
+              scripts=['validate_fsh.py']),
+        Stage('extract_genetics', run_extract_genetics,
+              inputs={'detailed_fsh': detailed_fsh},
+              outputs={'genetics_fsh': str(codesystems / "nlk-test.codesystem-medical-genetics.fsh")},
+              scripts=['extract_medical_genetics.py']),
+    ]
+
+
+def _run_stage(stage: Stage, log_path: str) -> Dict[str, Any]:
+    """Worker entry point: run a stage with its stdout captured in a log file."""
+    for path in stage.outputs.values():
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log, redirect_stdout(log):
+        # Send the worker's log records to the stage log as well
+        handlers = [h for h in logging.getLogger().handlers if isinstance(h, logging.StreamHandler)]
+        previous = [h.setStream(log) for h in handlers]
+        try:
+            stats = stage.func(stage.inputs, stage.outputs, stage.params)
+        finally:
+            for handler, stream in zip(handlers, previous):
+                handler.setStream(stream)
+    return {'wall_s': time.perf_counter() - started, 'stats': stats or {}}
+
+
+# ----------------------------------------------------------------------
+# Fingerprints and state
+# ----------------------------------------------------------------------
+
+class FileHasher:
+    """SHA-256 of file contents, cached by (size, mtime) across runs."""
+
+    def __init__(self, cache: Optional[Dict[str, List[Any]]] = None):
+        self.cache: Dict[str, List[Any]] = cache or {}
+
+    def hash(self, path: str) -> Optional[str]:
+        """Content hash of a file, or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        key = str(Path(path).resolve())
+        cached = self.cache.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+
+        self.cache[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _local_imports(script: str) -> List[str]:
+    """Scripts in SCRIPTS_DIR imported anywhere in a script (including inside functions)."""
+    try:
+        tree = ast.parse((SCRIPTS_DIR / script).read_text(encoding='utf-8'))
+    except (OSError, SyntaxError):
+        return []
+
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.add(node.module.split('.')[0])
+
+    return sorted(f"{module}.py" for module in modules if (SCRIPTS_DIR / f"{module}.py").exists())
+
+
+def script_dependencies(scripts: Iterable[str]) -> List[str]:
+    """
+    Scripts plus every SCRIPTS_DIR module they import, directly or indirectly.
+
+    Args:
+        scripts: Script file names relative to SCRIPTS_DIR
+
+    Returns:
+        list: Sorted script file names
+    """
+    seen: Set[str] = set()
+    pending = list(scripts)
+    while pending:
+        script = pending.pop()
+        if script not in seen:
+            seen.add(script)
+            pending.extend(_local_imports(script))
+    return sorted(seen)
+
+
+def stage_fingerprint(stage: Stage, hasher: FileHasher) -> Optional[str]:
+    """Fingerprint of a stage's inputs, code and parameters (None if an input is missing)."""
+    digest = hashlib.sha256()
+    digest.update(stage.name.encode('utf-8'))
+    digest.update(json.dumps(stage.params, sort_keys=True).encode('utf-8'))
+    digest.update(inspect.getsource(stage.func).encode('utf-8'))
+
+    for script in script_dependencies(stage.scripts):
+        digest.update(script.encode('utf-8'))
+        digest.update((hasher.hash(str(SCRIPTS_DIR / script)) or '').encode('utf-8'))
+
+    for name, path in sorted(stage.inputs.items()):
+        content_hash = hasher.hash(path)
+        if content_hash is None:
+            return None
+        digest.update(f"{name}={content_hash}".encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def load_state(path: Path) -> Dict[str, Any]:
+    """Load the pipeline state file (empty state if missing or unreadable)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'stages': {}, 'file_hashes': {}}
+
+
+def save_state(path: Path, state: Dict[str, Any]) -> None:
+    """Write the pipeline state file atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ----------------------------------------------------------------------
+# Scheduler
+# ----------------------------------------------------------------------
+
+class PipelineRunner:
+    """Runs stages in dependency order, skipping up-to-date stages."""
+
+    def __init__(self, stages: List[Stage], build_dir: str, jobs: int = 2,
+                 force: bool = False, dry_run: bool = False):
+        self.stages = {stage.name: stage for stage in stages}
+        self.build_dir = Path(build_dir)
+        self.jobs = jobs
+        self.force = force
+        self.dry_run = dry_run
+
+        self.state_path = self.build_dir / STATE_FILE
+        self.state = load_state(self.state_path)
+        self.hasher = FileHasher(self.state.get('file_hashes'))
+
+        # Dependencies from matching output paths to input paths
+        producers = {Path(path).resolve(): stage.name for stage in stages for path in stage.outputs.values()}
+        self.dependencies: Dict[str, Set[str]] = {
+            stage.name: {producers[Path(p).resolve()] for p in stage.inputs.values()
+                         if Path(p).resolve() in producers}
+            for stage in stages
+        }
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        """Raise ValueError if the stage dependencies contain a cycle."""
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Pipeline stages form a cycle: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def is_up_to_date(self, stage: Stage, fingerprint: Optional[str]) -> bool:
+        """Check whether a stage's recorded run matches its fingerprint and outputs."""
+        if self.force or fingerprint is None:
+            return False
+        recorded = self.state['stages'].get(stage.name)
+        if not recorded or recorded.get('fingerprint') != fingerprint:
+            return False
+        return all(self.hasher.hash(path) == recorded['outputs'].get(path)
+                   for path in stage.outputs.values())
+
+    def run(self) -> List[Dict[str, Any]]:
+        """
+        Run the pipeline.
+
+        Returns:
+            list: One result per stage (status ran|skipped|failed|blocked|would-run, timings)
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = set(self.stages)
+        running: Dict[Future, str] = {}
+        started_at: Dict[str, float] = {}
+        logs_dir = self.build_dir / "logs"
+        logs_dir.mkdir(parents=True, exist_ok=True)
+        pipeline_started = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            while pending or running:
+                # Schedule every stage whose dependencies have finished
+                for name in sorted(pending):
+                    deps = self.dependencies[name]
+                    if any(dep not in results for dep in deps):
+                        continue
+                    pending.discard(name)
+                    stage = self.stages[name]
+
+                    if any(results[dep]['status'] in ('failed', 'blocked') for dep in deps):
+                        results[name] = {'stage': name, 'status': 'blocked', 'wall_s': 0.0}
+                        print(f"   ⛔ {name:<18} blocked by failed dependency")
+                        continue
+
+                    if self.dry_run and any(results[dep]['status'] == 'would-run' for dep in deps):
+                        results[name] = {'stage': name, 'status': 'would-run', 'wall_s': 0.0}
+                        print(f"   ▶️  {name:<18} would run (after {', '.join(sorted(deps))})")
+                        continue
+
+                    fingerprint = stage_fingerprint(stage, self.hasher)
+                    if self.is_up_to_date(stage, fingerprint):
+                        results[name] = {'stage': name, 'status': 'skipped', 'wall_s': 0.0}
+                        print(f"   ⏭️  {name:<18} up to date")
+                        continue
+
+                    if self.dry_run:
+                        results[name] = {'stage': name, 'status': 'would-run', 'wall_s': 0.0}
+                        print(f"   ▶️  {name:<18} would run")
+                        continue
+
+                    missing = [p for p in stage.inputs.values() if not Path(p).exists()]
+                    if missing:
+                        results[name] = {'stage': name, 'status': 'failed', 'wall_s': 0.0,
+                                         'error': f"Missing inputs: {missing}"}
+                        print(f"   ❌ {name:<18} missing inputs: {missing}")
+                        continue
+
+                    print(f"   ▶️  {name:<18} running...")
+                    started_at[name] = time.perf_counter()
+                    future = executor.submit(_run_stage, stage, str(logs_dir / f"{name}.log"))
+                    running[future] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stage = self.stages[name]
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        results[name] = {'stage': name, 'status': 'failed',
+                                         'wall_s': round(time.perf_counter() - started_at[name], 3),
+                                         'error': str(e)}
+                        print(f"   ❌ {name:<18} failed: {e}")
+                        continue
+
+                    self.state['stages'][name] = {
+                        'fingerprint': stage_fingerprint(stage, self.hasher),
+                        'outputs': {path: self.hasher.hash(path) for path in stage.outputs.values()},
+                        'completed': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    }
+                    self.state['file_hashes'] = self.hasher.cache
+                    save_state(self.state_path, self.state)
+
+                    results[name] = {'stage': name, 'status': 'ran',
+                                     'wall_s': round(outcome['wall_s'], 3), 'stats': outcome['stats']}
+                    print(f"   ✅ {name:<18} {outcome['wall_s']:.2f} s")
+
+        if not self.dry_run:
+            self.state['file_hashes'] = self.hasher.cache
+            save_state(self.state_path, self.state)
+
+        self.total_wall_s = time.perf_counter() - pipeline_started
+        return [results[name] for name in self.stages]
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Run the NLK conversion -> FSH pipeline, skipping up-to-date stages")
+    parser.add_argument("--excel", default=DEFAULT_EXCEL, help="Source Excel file")
+    parser.add_argument("--input-csv", help="Start from an existing full CSV instead of converting the Excel file")
+    parser.add_argument("--csv-dir", default=f"{RESOURCES_DIR}/csv_output", help="Directory for CSV outputs")
+    parser.add_argument("--codesystems-dir", default=CODESYSTEMS_DIR, help="Directory for CodeSystem FSH outputs")
+    parser.add_argument("--build-dir", default=DEFAULT_BUILD_DIR,
+                        help="Directory for intermediate files, logs and pipeline state")
+    parser.add_argument("--jobs", type=int, default=2, help="Parallel stage workers (default: 2)")
+    parser.add_argument("--force", action="store_true", help="Run all stages even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Show which stages would run")
+    parser.add_argument("--report", help="Write per-stage results and timings to this JSON file")
+
+    args = parser.parse_args()
+
+    stages = define_stages(args.excel, args.csv_dir, args.codesystems_dir, args.build_dir, args.input_csv)
+    runner = PipelineRunner(stages, args.build_dir, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+
+    print("🔗 NLK Pipeline")
+    print(f"   Source: {args.input_csv or args.excel}")
+    results = runner.run()
+
+    print(f"\n📊 Stage Timings:")
+    for result in results:
+        print(f"   {result['stage']:<18} {result['status']:<10} {result['wall_s']:>8.2f} s")
+    print(f"   {'total':<18} {'':<10} {runner.total_wall_s:>8.2f} s")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'total_wall_s': round(runner.total_wall_s, 3), 'stages': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Report written to: {args.report}")
+
+    return 1 if any(r['status'] in ('failed', 'blocked') for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
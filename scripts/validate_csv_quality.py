@@ -11,27 +11,299 @@ Date: September 2024
 
 import pandas as pd
 import numpy as np
+import codecs
+import io
+import math
+import random
 import re
 import sys
 import argparse
 from pathlib import Path
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 warnings.filterwarnings('ignore')
 
+from nlk_duplicates import DuplicateResult, find_duplicates
+from nlk_profiling import profiled_main, span
+from nlk_unit_normalization import build_unit_table
+
+
+# Row references kept per issue; the count is always exact
+MAX_ROW_REFERENCES = 100
+
+# Strings read as missing values
+CSV_NA_VALUES = ['', 'NULL', 'null', 'N/A', 'n/a', 'NA', 'na']
+
+# Byte order marks, longest first
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Bytes decoded at a time when checking UTF-8 validity
+SNIFF_BLOCK_SIZE = 1 << 24
+
+# Single-byte encodings a non-UTF-8 Norwegian file may use, in order of preference
+SINGLE_BYTE_ENCODINGS = ('latin1', 'cp1252', 'cp865', 'mac_roman')
+NORWEGIAN_LETTERS = 'æøåÆØÅ'
+# latin1 decodes 0x80-0x9F as control characters; cp1252 has printable characters there
+CP1252_ONLY_BYTES = bytes(b for b in range(0x80, 0xA0) if b not in (0x81, 0x8D, 0x8F, 0x90, 0x9D))
+
+# Quick validation of a row sample (--sample)
+DEFAULT_SAMPLE_SIZE = 10000
+SAMPLE_CONFIDENCE_Z = 1.959964  # two-sided 95%
+# Issue types that compare rows with each other; a sample sees far fewer of them
+PAIRWISE_ISSUE_TYPES = ('exact_duplicates', 'duplicate_keys', 'same_content_different_key')
+
+# Values clean_data changes: leading/trailing whitespace, whitespace runs, or
+# whitespace other than a plain space (tab, newline, non-breaking space)
+NEEDS_WHITESPACE_CLEANING = re.compile(r'^\s|\s$|\s\s|[^\S ]')
+CLEANING_LOG_COLUMNS = ['row', 'column', 'before', 'after', 'rule']
+
+# Checks that run independently per column, with their per-column method.
+# run_full_validation(workers > 1) fans these out as (check, column) tasks.
+COLUMN_CHECKS = {
+    'validate_whitespace_issues': 'check_column_whitespace',
+    'validate_data_types': 'check_column_data_types',
+    'validate_consistency': 'check_column_consistency',
+}
+
+
+# Type inference: one alternation classifies a value in a single regex match.
+# The groups are mutually exclusive; unmatched values are free text.
+TYPE_PATTERN = re.compile(r'''^(?:
+    (?P<numeric>-?(?:\d{1,3}(?:,\d{3})*|\d+)(?:\.\d+)?)
+  | (?P<date_iso>\d{4}-\d{2}-\d{2})
+  | (?P<datetime_iso>\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})
+  | (?P<date_us>\d{2}/\d{2}/\d{4})
+  | (?P<date_eu>\d{2}\.\d{2}\.\d{4})
+  | (?P<code>[A-Za-z]{2,}[-_]?\d+)
+)$''', re.VERBOSE)
+
+DATE_FORMATS = {
+    'date_iso': '%Y-%m-%d',
+    'datetime_iso': '%Y-%m-%d %H:%M:%S',
+    'date_us': '%m/%d/%Y',
+    'date_eu': '%d.%m.%Y',
+}
+TYPE_CLASSES = ('numeric',) + tuple(DATE_FORMATS) + ('code', 'text')
+
+# A column is reported as numeric/date stored as text above this share of values
+TYPE_ISSUE_RATIO = 0.8
+# Values classified before deciding whether a full scan is needed
+TYPE_SAMPLE_SIZE = 1000
+# Sampled shares this close to TYPE_ISSUE_RATIO are ambiguous and trigger a full scan
+TYPE_SAMPLE_MARGIN = 0.1
+
+# NLK code formats per prefix: NOR codes are fixed-width, NPU numbering is open-ended
+NLK_CODE_FORMATS = {
+    'NOR': r'\d{5}',
+    'NPU': r'\d{5,}',
+}
+NLK_CODE_PATTERN = '|'.join(f'{prefix}{digits}' for prefix, digits in NLK_CODE_FORMATS.items())
+
+NLK_DOMAINS = (
+    'Immunologi og transfusjonsmedisin',
+    'Klinisk farmakologi',
+    'Medisinsk biokjemi',
+    'Medisinsk genetikk',
+    'Medisinsk mikrobiologi',
+    'Patologi',
+)
+
+
+@dataclass(frozen=True)
+class SchemaRule:
+    """
+    A declarative rule evaluated as one whole-column operation.
+    
+    Kinds:
+        required:   value must be present and non-blank
+        pattern:    present values must fully match `pattern`
+        date:       present values must parse as ISO 8601 dates
+        date_order: `column` must not be later than `other` where both are set
+        reference:  present values must occur in column `other`
+        vocabulary: present values must be one of `values`
+    """
+    name: str
+    kind: str
+    column: str
+    severity: str = 'warning'
+    other: Optional[str] = None
+    pattern: Optional[str] = None
+    values: Tuple[str, ...] = ()
+    suggested_fix: str = ''
+
+
+NLK_SCHEMA_RULES = (
+    SchemaRule('kode_required', 'required', 'kode', 'critical',
+               suggested_fix="Every row needs a code"),
+    SchemaRule('kode_format', 'pattern', 'kode', 'critical', pattern=NLK_CODE_PATTERN,
+               suggested_fix="Use NOR + 5 digits or NPU + 5 or more digits"),
+    SchemaRule('norsk_bruksnavn_required', 'required', 'norsk_bruksnavn', 'warning',
+               suggested_fix="Fill in the Norwegian display name"),
+    SchemaRule('gyldig_fra_date', 'date', 'gyldig_fra', 'warning',
+               suggested_fix="Use YYYY-MM-DD HH:MM:SS"),
+    SchemaRule('gyldig_til_date', 'date', 'gyldig_til', 'warning',
+               suggested_fix="Use YYYY-MM-DD HH:MM:SS"),
+    SchemaRule('endringsdato_date', 'date', 'endringsdato', 'warning',
+               suggested_fix="Use YYYY-MM-DD HH:MM:SS"),
+    SchemaRule('validity_period', 'date_order', 'gyldig_fra', 'warning', other='gyldig_til',
+               suggested_fix="gyldig_fra must not be after gyldig_til"),
+    SchemaRule('erstattes_av_reference', 'reference', 'erstattes_av', 'warning', other='kode',
+               suggested_fix="Point erstattes_av at a code in the same release"),
+    SchemaRule('primary_domain_vocabulary', 'vocabulary', 'primært_fagområde', 'warning',
+               values=NLK_DOMAINS, suggested_fix="Use one of the NLK fagområder"),
+    SchemaRule('secondary_domain_vocabulary', 'vocabulary', 'sekundært_fagområde', 'warning',
+               values=NLK_DOMAINS, suggested_fix="Use one of the NLK fagområder"),
+)
+
 
 @dataclass
+class ColumnTypeInference:
+    """Inferred type of one column and how well its values conform to it."""
+    column: str
+    inferred_type: str = 'empty'         # numeric, date, code, text or empty
+    date_format: Optional[str] = None    # strftime format for date columns
+    conformance: float = 0.0             # share of non-null values of the inferred type
+    ratios: Dict[str, float] = field(default_factory=dict)
+    non_null: int = 0
+    scanned: int = 0                     # non-null values classified
+    sampled: bool = False                # ratios are estimated from a sample
+
+
+def classify_values(series: pd.Series) -> Dict[str, int]:
+    """
+    Count the values of each TYPE_CLASSES class in one pass over the distinct values.
+    
+    Args:
+        series: Non-null values
+        
+    Returns:
+        dict: Number of values per class
+    """
+    counts = dict.fromkeys(TYPE_CLASSES, 0)
+    match = TYPE_PATTERN.match
+    value_counts = series.value_counts(sort=False)
+    
+    for value, count in zip(value_counts.index, value_counts.to_numpy()):
+        matched = match(str(value))
+        counts[matched.lastgroup if matched else 'text'] += int(count)
+    
+    return counts
+
+
+def infer_column_type(series: pd.Series, sample_size: int = TYPE_SAMPLE_SIZE) -> Tuple[ColumnTypeInference, Dict[str, int]]:
+    """
+    Infer a column's type, classifying an evenly spaced sample first.
+    
+    The full column is only scanned when the sample is ambiguous, i.e. when
+    a numeric or date class comes within TYPE_SAMPLE_MARGIN of
+    TYPE_ISSUE_RATIO. Otherwise the ratios are sample estimates.
+    
+    Args:
+        series: Column values
+        sample_size: Values classified before deciding on a full scan
+        
+    Returns:
+        tuple: (inference, per-class counts over the scanned values)
+    """
+    non_null = series.dropna()
+    inference = ColumnTypeInference(column=series.name, non_null=len(non_null))
+    if len(non_null) == 0:
+        return inference, dict.fromkeys(TYPE_CLASSES, 0)
+    
+    scanned = non_null
+    if len(non_null) > sample_size:
+        positions = np.linspace(0, len(non_null) - 1, sample_size).astype(np.int64)
+        scanned = non_null.iloc[positions]
+    counts = classify_values(scanned)
+    
+    if len(scanned) < len(non_null):
+        threshold = TYPE_ISSUE_RATIO - TYPE_SAMPLE_MARGIN
+        if any(counts[c] / len(scanned) >= threshold for c in ('numeric',) + tuple(DATE_FORMATS)):
+            scanned = non_null
+            counts = classify_values(scanned)
+        else:
+            inference.sampled = True
+    
+    inference.scanned = len(scanned)
+    inference.ratios = {c: counts[c] / len(scanned) for c in TYPE_CLASSES if counts[c]}
+    dominant = max(TYPE_CLASSES, key=lambda c: counts[c])
+    inference.conformance = counts[dominant] / len(scanned)
+    if dominant in DATE_FORMATS:
+        inference.inferred_type = 'date'
+        inference.date_format = DATE_FORMATS[dominant]
+    else:
+        inference.inferred_type = dominant
+    
+    return inference, counts
+
+
 class ValidationIssue:
-    """Represents a data quality issue found during validation."""
-    issue_type: str
-    severity: str  # 'critical', 'warning', 'info'
-    description: str
-    location: str  # row/column reference
-    current_value: Any
-    suggested_fix: Optional[Any] = None
-    count: int = 1
+    """
+    Represents a data quality issue found during validation.
+    
+    Row-level issues keep at most MAX_ROW_REFERENCES affected row labels as a
+    NumPy array (the first ones in file order) plus the total count, so memory
+    does not grow with the number of flagged cells. Their location string is
+    formatted on first access.
+    """
+    __slots__ = ('issue_type', 'severity', 'description', 'current_value', 'suggested_fix',
+                 'count', 'rows', 'column', 'rows_shown', '_location')
+    
+    def __init__(self, issue_type: str, severity: str, description: str,
+                 location: Optional[str] = None, current_value: Any = None,
+                 suggested_fix: Optional[Any] = None, count: int = 1,
+                 rows: Optional[np.ndarray] = None, column: Optional[str] = None,
+                 rows_shown: int = 10):
+        """
+        Args:
+            issue_type: Machine-readable issue type
+            severity: 'critical', 'warning' or 'info'
+            description: Human-readable description
+            location: Row/column reference (derived from rows/column if omitted)
+            current_value: Offending value or summary value
+            suggested_fix: Suggested fix
+            count: Number of affected rows or values
+            rows: Labels of (the first) affected rows
+            column: Affected column
+            rows_shown: Number of row labels listed in the location string
+        """
+        self.issue_type = issue_type
+        self.severity = severity
+        self.description = description
+        self.current_value = current_value
+        self.suggested_fix = suggested_fix
+        self.count = count
+        self.rows = rows
+        self.column = column
+        self.rows_shown = rows_shown
+        self._location = location
+    
+    @property
+    def location(self) -> str:
+        """Row/column reference, e.g. "Column: enhet, Rows: [3, 17]"."""
+        if self._location is None:
+            parts = []
+            if self.column is not None:
+                parts.append(f"Column: {self.column}")
+            if self.rows is not None:
+                shown = self.rows[:self.rows_shown].tolist()
+                parts.append(f"Rows: {shown}{'...' if self.count > len(shown) else ''}")
+            self._location = ', '.join(parts)
+        return self._location
+    
+    def __repr__(self) -> str:
+        return (f"ValidationIssue(issue_type={self.issue_type!r}, severity={self.severity!r}, "
+                f"count={self.count}, location={self.location!r})")
 
 
 @dataclass
@@ -46,6 +318,11 @@ class ValidationReport:
     whitespace_issues_found: int = 0
     encoding_issues_found: int = 0
     date_format_issues: int = 0
+    schema_violations_found: int = 0
+    population_rows: int = 0             # rows in the file when total_rows is a sample
+    duplicates: Optional[DuplicateResult] = None  # duplicate groups (row positions)
+    cleaning_changes: Dict[str, int] = field(default_factory=dict)  # changes per cleaning rule
+    column_types: Dict[str, ColumnTypeInference] = field(default_factory=dict)
     
     def add_issue(self, issue: ValidationIssue) -> None:
         """Add a validation issue to the report."""
@@ -63,6 +340,400 @@ class ValidationReport:
         return summary
 
 
+def flagged_rows(index: pd.Index, mask: Any) -> Tuple[int, np.ndarray]:
+    """
+    Count the rows selected by a boolean mask and keep the first row labels.
+    
+    Args:
+        index: Row index of the validated frame
+        mask: Boolean mask aligned with index
+        
+    Returns:
+        tuple: (number of flagged rows, labels of the first MAX_ROW_REFERENCES of them)
+    """
+    positions = np.flatnonzero(np.asarray(mask, dtype=bool))
+    return len(positions), index[positions[:MAX_ROW_REFERENCES]].to_numpy()
+
+
+# ----------------------------------------------------------------------
+# Shared-memory columns for parallel checks
+# ----------------------------------------------------------------------
+
+def share_column(series: pd.Series) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """
+    Copy a string column into one shared memory block.
+    
+    The layout is Arrow-like: int64 character offsets (n + 1), a uint8 null
+    mask (n) and the UTF-8 text of all non-null values concatenated, so a
+    worker decodes the column once instead of unpickling n string objects.
+    
+    Args:
+        series: Column to share (non-null values are converted with str())
+        
+    Returns:
+        tuple: (shared memory block owned by the caller, spec for attach_column)
+    """
+    n = len(series)
+    nulls = series.isna().to_numpy()
+    values = ['' if null else str(value) for value, null in zip(series.tolist(), nulls)]
+    
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    text = ''.join(values).encode('utf-8', 'surrogatepass')
+    
+    offsets_size = offsets.nbytes
+    size = offsets_size + n + len(text)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    shm.buf[:offsets_size] = offsets.tobytes()
+    shm.buf[offsets_size:offsets_size + n] = nulls.astype(np.uint8).tobytes()
+    shm.buf[offsets_size + n:size] = text
+    
+    spec = {'name': shm.name, 'column': series.name, 'rows': n, 'text_bytes': len(text)}
+    return shm, spec
+
+
+def attach_column(spec: Dict[str, Any]) -> pd.Series:
+    """
+    Rebuild a column shared with share_column.
+    
+    Args:
+        spec: Spec returned by share_column
+        
+    Returns:
+        pd.Series: Object column with NaN for missing values and a RangeIndex
+    """
+    n = spec['rows']
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    try:
+        offsets_size = (n + 1) * 8
+        offsets = np.frombuffer(shm.buf, dtype=np.int64, count=n + 1).tolist()
+        nulls = np.frombuffer(shm.buf, dtype=np.uint8, count=n, offset=offsets_size).astype(bool)
+        start = offsets_size + n
+        text = bytes(shm.buf[start:start + spec['text_bytes']]).decode('utf-8', 'surrogatepass')
+    finally:
+        shm.close()
+    
+    values = np.empty(n, dtype=object)
+    values[:] = [text[a:b] for a, b in zip(offsets, offsets[1:])]
+    values[nulls] = np.nan
+    return pd.Series(values, name=spec['column'])
+
+
+_worker_specs: List[Dict[str, Any]] = []
+_worker_columns: Dict[int, pd.Series] = {}
+_worker_validator: Optional['CSVQualityValidator'] = None
+
+
+def _init_column_worker(specs: List[Dict[str, Any]]) -> None:
+    """Process pool initializer: remember the shared columns and keep one validator per worker."""
+    global _worker_specs, _worker_columns, _worker_validator
+    _worker_specs = specs
+    _worker_columns = {}
+    _worker_validator = CSVQualityValidator('<worker>')
+
+
+def _run_column_check(method_name: str, column_index: int) -> Tuple[List[ValidationIssue], Optional[ColumnTypeInference]]:
+    """Worker: run one per-column check; row references are positions."""
+    series = _worker_columns.get(column_index)
+    if series is None:
+        series = _worker_columns[column_index] = attach_column(_worker_specs[column_index])
+    issues = getattr(_worker_validator, method_name)(series.name, series)
+    return issues, _worker_validator.report.column_types.pop(series.name, None)
+
+
+@dataclass
+class EncodingSniff:
+    """Encoding chosen from the raw bytes of a file."""
+    encoding: str
+    reason: str
+    mixed_encoding: Optional[str] = None  # encoding of the minority lines, if mixed
+    mixed_lines: int = 0
+    mixed_line_numbers: List[int] = field(default_factory=list)  # 1-based, first MAX_ROW_REFERENCES
+    mixed_byte_offsets: List[int] = field(default_factory=list)  # first offending byte per line
+    mixed_line_spans: Optional[np.ndarray] = None  # (start, end) byte span of every minority line
+
+
+def utf8_sequences(raw: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Locate UTF-8 multi-byte sequences and stray high bytes with array operations.
+    
+    Only bytes >= 0x80 are inspected. A lead byte starts a sequence when it
+    is followed by the right number of continuation bytes; overlong forms
+    are not distinguished, which is enough to tell UTF-8 lines from
+    single-byte lines.
+    
+    Args:
+        raw: File content as uint8 array
+        
+    Returns:
+        tuple: (start offsets of UTF-8 sequences, offsets of high bytes outside them)
+    """
+    high = np.flatnonzero(raw >= 0x80)
+    padded = np.concatenate([raw, np.zeros(3, dtype=np.uint8)])
+    lead = padded[high]
+    continued = [(padded[high + k] & 0xC0) == 0x80 for k in (1, 2, 3)]
+    
+    # Continuation bytes are high bytes too, so a sequence starting at high[i]
+    # occupies high[i:i + length + 1]
+    starts = np.zeros(len(high), dtype=bool)
+    covered = np.zeros(len(high), dtype=bool)
+    for low, top, length in ((0xC2, 0xDF, 1), (0xE0, 0xEF, 2), (0xF0, 0xF4, 3)):
+        valid = (lead >= low) & (lead <= top)
+        for k in range(length):
+            valid &= continued[k]
+        starts |= valid
+        sequence_starts = np.flatnonzero(valid)
+        for k in range(length + 1):
+            covered[sequence_starts + k] = True
+    
+    starts, invalid = high[starts], high[~covered]
+    return starts, invalid
+
+
+def _score_single_byte(histogram: np.ndarray) -> str:
+    """Pick the single-byte encoding under which most high bytes are æøå/ÆØÅ."""
+    high_bytes = max(int(histogram[0x80:].sum()), 1)
+    scores = {}
+    for encoding in SINGLE_BYTE_ENCODINGS:
+        letters = [b for b in range(0x80, 0x100)
+                   if bytes([b]).decode(encoding, errors='replace') in NORWEGIAN_LETTERS]
+        scores[encoding] = histogram[letters].sum() / high_bytes
+    
+    best = max(SINGLE_BYTE_ENCODINGS, key=lambda e: scores[e])  # ties keep the first
+    if best in ('latin1', 'cp1252'):
+        # æøå are the same bytes in both; printable 0x80-0x9F bytes mean cp1252
+        best = 'cp1252' if histogram[list(CP1252_ONLY_BYTES)].any() else 'latin1'
+    return best
+
+
+def is_valid_utf8(blocks: Iterable[bytes]) -> bool:
+    """Check UTF-8 validity block by block, so no full-size str is built."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for block in blocks:
+            decoder.decode(block)
+        decoder.decode(b'', final=True)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def _blocks(data: bytes, block_size: int = SNIFF_BLOCK_SIZE) -> Iterator[memoryview]:
+    view = memoryview(data)
+    return (view[start:start + block_size] for start in range(0, len(view), block_size))
+
+
+def sniff_encoding(data: bytes, preferred: str = 'utf-8') -> EncodingSniff:
+    """
+    Choose the encoding of a file from its raw bytes, without parsing it.
+    
+    Checks, in order: a byte order mark, UTF-8 validity of the whole file,
+    and for other files the frequency of Norwegian letters under candidate
+    single-byte encodings. Files mixing UTF-8 and single-byte lines get the
+    majority encoding; the minority lines are listed with their byte spans
+    for decode_mixed_lines.
+    
+    Args:
+        data: Raw file content
+        preferred: Encoding requested by the caller; a non-UTF-8 request is
+            kept for valid UTF-8 files and used as the single-byte encoding
+        
+    Returns:
+        EncodingSniff: Chosen encoding and any mixed-encoding lines
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return EncodingSniff(encoding, f"{encoding} byte order mark")
+    
+    preferred_is_utf8 = codecs.lookup(preferred).name == 'utf-8'
+    if is_valid_utf8(_blocks(data)):
+        return EncodingSniff('utf-8' if preferred_is_utf8 else preferred, "valid UTF-8")
+    
+    # Not UTF-8 as a whole: find the lines with UTF-8 sequences and those with stray high bytes
+    raw = np.frombuffer(data, dtype=np.uint8)
+    utf8_offsets, invalid_offsets = utf8_sequences(raw)
+    
+    newlines = np.flatnonzero(raw == 0x0A)
+    utf8_lines, utf8_first = np.unique(np.searchsorted(newlines, utf8_offsets), return_index=True)
+    invalid_lines, invalid_first = np.unique(np.searchsorted(newlines, invalid_offsets), return_index=True)
+    
+    # Score only the stray bytes; UTF-8 continuation bytes would look like cp865/mac_roman letters
+    histogram = np.bincount(raw[invalid_offsets], minlength=256)
+    single_byte = preferred if not preferred_is_utf8 else _score_single_byte(histogram)
+    
+    if len(utf8_lines) > len(invalid_lines):
+        sniff = EncodingSniff('utf-8', "mostly UTF-8 with single-byte lines", mixed_encoding=single_byte)
+        lines, first, offsets = invalid_lines, invalid_first, invalid_offsets
+    else:
+        sniff = EncodingSniff(single_byte, f"not UTF-8; Norwegian letters fit {single_byte}")
+        lines, first, offsets = utf8_lines, utf8_first, utf8_offsets
+        if len(utf8_lines):
+            sniff.reason = f"mostly {single_byte} with UTF-8 lines"
+            sniff.mixed_encoding = 'utf-8'
+    
+    sniff.mixed_lines = len(lines)
+    sniff.mixed_line_numbers = (lines[:MAX_ROW_REFERENCES] + 1).tolist()
+    sniff.mixed_byte_offsets = offsets[first[:MAX_ROW_REFERENCES]].tolist()
+    
+    # Line i spans from just after newline i-1 through newline i (or the end of the data)
+    line_ends = np.append(newlines + 1, len(data))
+    line_starts = np.concatenate(([0], newlines + 1))
+    sniff.mixed_line_spans = np.column_stack((line_starts[lines], line_ends[lines]))
+    return sniff
+
+
+def decode_mixed_lines(data: bytes, sniff: EncodingSniff) -> bytes:
+    """
+    Re-encode a file as UTF-8, decoding each line in its own encoding.
+    
+    Lines listed in sniff.mixed_line_spans are decoded with
+    sniff.mixed_encoding, all others with sniff.encoding, so the minority
+    lines keep their letters instead of becoming U+FFFD or mojibake.
+    
+    Args:
+        data: Raw file content
+        sniff: Result of sniff_encoding for the same content
+        
+    Returns:
+        bytes: UTF-8 content
+    """
+    if not sniff.mixed_lines:
+        return data
+    
+    majority_is_utf8 = codecs.lookup(sniff.encoding).name == 'utf-8'
+    
+    def majority(chunk: bytes) -> bytes:
+        return chunk if majority_is_utf8 else chunk.decode(sniff.encoding).encode('utf-8')
+    
+    pieces = []
+    position = 0
+    for start, end in sniff.mixed_line_spans.tolist():
+        pieces.append(majority(data[position:start]))
+        pieces.append(data[start:end].decode(sniff.mixed_encoding, errors='replace').encode('utf-8'))
+        position = end
+    pieces.append(majority(data[position:]))
+    return b''.join(pieces)
+
+
+def sniff_file_encoding(csv_file_path: Path, preferred: str = 'utf-8') -> Tuple[EncodingSniff, Optional[bytes]]:
+    """
+    Choose a file's encoding, streaming it when it turns out to be UTF-8.
+    
+    Args:
+        csv_file_path: File to sniff
+        preferred: Encoding requested by the caller
+        
+    Returns:
+        tuple: (sniff result, file content if it had to be read whole, else None)
+    """
+    with open(csv_file_path, 'rb') as f:
+        head = f.read(4)
+        if any(head.startswith(bom) for bom, _ in BOMS):
+            return sniff_encoding(head, preferred), None
+        
+        f.seek(0)
+        if is_valid_utf8(iter(lambda: f.read(SNIFF_BLOCK_SIZE), b'')):
+            return sniff_encoding(b'', preferred), None
+        
+        # Single-byte or mixed: the line analysis needs the whole content
+        f.seek(0)
+        data = f.read()
+    
+    return sniff_encoding(data, preferred), data
+
+
+def wilson_interval(successes: int, trials: int, z: float = SAMPLE_CONFIDENCE_Z) -> Tuple[float, float]:
+    """
+    Wilson score interval for a proportion.
+    
+    Args:
+        successes: Number of flagged rows in the sample
+        trials: Sample size
+        z: Normal quantile for the confidence level
+        
+    Returns:
+        tuple: (lower, upper) bounds of the rate
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z**2 / trials
+    center = (p + z**2 / (2 * trials)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def _iter_csv_records(f: Any) -> Any:
+    """
+    Yield the raw bytes of each CSV record, keeping quoted line breaks inside a record.
+    
+    A record ends at a line break outside quotes, i.e. after an even number
+    of quote characters ("" escapes keep the count even). Blank lines are
+    skipped like pandas does.
+    """
+    pending = b''
+    for line in f:
+        pending += line
+        if pending.count(b'"') % 2:
+            continue
+        if pending.strip():
+            yield pending
+        pending = b''
+    if pending.strip():
+        yield pending
+
+
+def reservoir_sample_csv(csv_file_path: str, sample_size: int, seed: int = 0) -> Tuple[bytes, List[int], List[bytes], int]:
+    """
+    Draw a uniform random sample of rows in one streaming pass over a CSV file.
+    
+    Records are split on raw bytes and only the sampled ones are kept, so
+    the file is never parsed or loaded as a whole. Uses reservoir sampling
+    with geometric skips (Algorithm L), drawing random numbers only for rows
+    that enter the sample.
+    
+    Args:
+        csv_file_path: CSV file to sample
+        sample_size: Number of rows to keep
+        seed: Random seed (the same seed gives the same sample)
+        
+    Returns:
+        tuple: (header record, row positions of the sample in file order,
+        their raw records, total rows in the file)
+    """
+    rng = random.Random(seed)
+    reservoir: List[Tuple[int, bytes]] = []
+    total_rows = 0
+    
+    with open(csv_file_path, 'rb') as f:
+        records = _iter_csv_records(f)
+        header = next(records, b'')
+        
+        w = math.exp(math.log(rng.random()) / sample_size) if sample_size else 0.0
+        next_pick = sample_size + _reservoir_skip(rng, w)
+        
+        for position, record in enumerate(records):
+            total_rows += 1
+            if position < sample_size:
+                reservoir.append((position, record))
+            elif position == next_pick:
+                reservoir[rng.randrange(sample_size)] = (position, record)
+                w *= math.exp(math.log(rng.random()) / sample_size)
+                next_pick += 1 + _reservoir_skip(rng, w)
+    
+    reservoir.sort()
+    return header, [p for p, _ in reservoir], [r for _, r in reservoir], total_rows
+
+
+def _reservoir_skip(rng: random.Random, w: float) -> int:
+    """Number of rows Algorithm L skips before the next replacement."""
+    if w <= 0.0:
+        return sys.maxsize
+    if w >= 1.0:
+        return 0
+    return int(math.floor(math.log(rng.random()) / math.log(1 - w)))
+
+
 class CSVQualityValidator:
     """Main class for validating and cleaning CSV data quality."""
     
@@ -79,6 +750,7 @@ class CSVQualityValidator:
         self.df: Optional[pd.DataFrame] = None
         self.original_df: Optional[pd.DataFrame] = None
         self.report = ValidationReport()
+        self.cleaning_log: Optional[pd.DataFrame] = None
         
         # Common patterns for validation
         self.email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
@@ -91,98 +763,257 @@ class CSVQualityValidator:
             'non_breaking_space': re.compile(r'\u00a0'),
         }
     
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, source_name: str = '<dataframe>') -> 'CSVQualityValidator':
+        """
+        Create a validator for an already loaded DataFrame.
+        
+        Args:
+            df: Data to validate (string columns, missing values as NaN)
+            source_name: Name shown as the file in reports
+            
+        Returns:
+            CSVQualityValidator: Validator that skips load_csv
+        """
+        validator = cls(source_name)
+        validator.df = df.copy()
+        validator.original_df = df
+        validator.report.total_rows = len(df)
+        validator.report.total_columns = len(df.columns)
+        return validator
+    
+    @classmethod
+    def from_csv_sample(cls, csv_file_path: str, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                        encoding: str = 'utf-8', seed: int = 0) -> 'CSVQualityValidator':
+        """
+        Create a validator for a random row sample of a CSV file.
+        
+        The file is streamed once and never fully loaded. Row references in
+        issues are row positions in the file.
+        
+        Args:
+            csv_file_path: CSV file to sample
+            sample_size: Number of rows to validate
+            encoding: Preferred file encoding (sniffed like load_csv)
+            seed: Random seed for the sample
+            
+        Returns:
+            CSVQualityValidator: Validator over the sample with report.population_rows
+                set, or with a file_loading_error issue and no data if the
+                file could not be sampled
+        """
+        validator = cls(csv_file_path, encoding)
+        
+        try:
+            header, positions, records, total_rows = reservoir_sample_csv(csv_file_path, sample_size, seed)
+            sample_bytes = header + b''.join(records)
+            
+            # Only the sampled bytes are sniffed and decoded
+            sniff = sniff_encoding(sample_bytes, encoding)
+            if sniff.mixed_lines:
+                sample_bytes = decode_mixed_lines(sample_bytes, sniff)
+            sample = pd.read_csv(io.BytesIO(sample_bytes), encoding='utf-8' if sniff.mixed_lines else sniff.encoding,
+                                 dtype=str, na_values=CSV_NA_VALUES, keep_default_na=True)
+        except (OSError, UnicodeError, LookupError, pd.errors.ParserError) as e:
+            validator.report.add_issue(ValidationIssue(
+                issue_type="file_loading_error",
+                severity="critical",
+                description=f"Could not sample CSV file: {str(e)}",
+                location="file_level",
+                current_value=str(e)
+            ))
+            return validator
+        
+        sample.index = pd.Index(positions[:len(sample)], dtype=np.int64)
+        
+        validator.df = sample
+        validator.original_df = sample.copy()
+        validator.encoding = sniff.encoding
+        validator.report.total_rows = len(sample)
+        validator.report.total_columns = len(sample.columns)
+        # A sample covering every row is the whole file, not an estimate
+        if len(records) < total_rows:
+            validator.report.population_rows = total_rows
+        return validator
+    
+    def sample_estimates(self) -> List[Dict[str, Any]]:
+        """
+        Estimate file-wide issue rates from a sampled validation.
+        
+        Row-level issues get the share of sampled rows affected, a Wilson
+        confidence interval and the implied number of rows in the file. Other
+        issues (column-level, duplicates) are listed without a rate.
+        
+        Returns:
+            list: One dict per issue, in report order
+        """
+        sample_rows = self.report.total_rows
+        population = self.report.population_rows or sample_rows
+        estimates = []
+        
+        for issue in self.report.issues:
+            label = issue.issue_type
+            if issue.column is not None:
+                label += f" [{issue.column}]"
+            if issue.rows is not None and isinstance(issue.current_value, str):
+                label += f" '{issue.current_value}'"
+            
+            estimate = {'issue': label, 'severity': issue.severity, 'sample_count': issue.count}
+            if issue.rows is not None and issue.issue_type not in PAIRWISE_ISSUE_TYPES and sample_rows:
+                low, high = wilson_interval(issue.count, sample_rows)
+                estimate.update({
+                    'rate': issue.count / sample_rows,
+                    'rate_low': low,
+                    'rate_high': high,
+                    'estimated_rows': round(issue.count / sample_rows * population),
+                })
+            estimates.append(estimate)
+        
+        return estimates
+    
     def load_csv(self) -> bool:
         """
-        Load the CSV file with error handling for common encoding issues.
+        Load the CSV file, choosing the encoding from its raw bytes first.
+        
+        The encoding is chosen once from the raw bytes (sniff_file_encoding)
+        and the file is parsed once. Lines in a second encoding are decoded
+        in that encoding and reported by line number and byte offset.
         
         Returns:
             bool: True if successfully loaded, False otherwise
         """
-        encodings_to_try = [self.encoding, 'utf-8', 'utf-8-sig', 'latin1', 'cp1252']
+        requested = self.encoding
         
-        for encoding in encodings_to_try:
-            try:
-                self.df = pd.read_csv(
-                    self.csv_file_path,
-                    encoding=encoding,
-                    dtype=str,  # Load everything as strings initially
-                    na_values=['', 'NULL', 'null', 'N/A', 'n/a', 'NA', 'na'],
-                    keep_default_na=True
-                )
-                self.original_df = self.df.copy()
-                self.encoding = encoding
-                
-                self.report.total_rows = len(self.df)
-                self.report.total_columns = len(self.df.columns)
-                
-                if encoding != encodings_to_try[0]:
-                    self.report.add_issue(ValidationIssue(
-                        issue_type="encoding_detection",
-                        severity="warning",
-                        description=f"File encoding detected as {encoding}, not {encodings_to_try[0]}",
-                        location="file_level",
-                        current_value=encoding,
-                        suggested_fix=f"Consider re-saving with {encoding} encoding"
-                    ))
-                
-                return True
-                
-            except (UnicodeDecodeError, pd.errors.ParserError) as e:
-                if encoding == encodings_to_try[-1]:
-                    self.report.add_issue(ValidationIssue(
-                        issue_type="file_loading_error",
-                        severity="critical",
-                        description=f"Could not load CSV file with any encoding: {str(e)}",
-                        location="file_level",
-                        current_value=str(e)
-                    ))
-                    return False
-                continue
+        try:
+            with span('sniff_encoding'):
+                sniff, data = sniff_file_encoding(self.csv_file_path, requested)
+            
+            # Mixed files are re-encoded as UTF-8 line by line, so no line is lost to U+FFFD
+            parse_encoding = sniff.encoding
+            if sniff.mixed_lines:
+                data = decode_mixed_lines(data, sniff)
+                parse_encoding = 'utf-8'
+            
+            # Parse once, from memory if the sniffer already read the file
+            self.df = pd.read_csv(
+                io.BytesIO(data) if data is not None else self.csv_file_path,
+                encoding=parse_encoding,
+                dtype=str,  # Load everything as strings initially
+                na_values=CSV_NA_VALUES,
+                keep_default_na=True
+            )
+            del data
+        except (OSError, UnicodeError, LookupError, pd.errors.ParserError) as e:
+            self.report.add_issue(ValidationIssue(
+                issue_type="file_loading_error",
+                severity="critical",
+                description=f"Could not load CSV file: {str(e)}",
+                location="file_level",
+                current_value=str(e)
+            ))
+            return False
         
-        return False
+        self.original_df = self.df.copy()
+        self.encoding = sniff.encoding
+        
+        self.report.total_rows = len(self.df)
+        self.report.total_columns = len(self.df.columns)
+        
+        # A UTF-8 byte order mark is still UTF-8
+        if codecs.lookup(sniff.encoding).name not in (codecs.lookup(requested).name, 'utf-8-sig'):
+            self.report.add_issue(ValidationIssue(
+                issue_type="encoding_detection",
+                severity="warning",
+                description=f"File encoding detected as {sniff.encoding}, not {requested} ({sniff.reason})",
+                location="file_level",
+                current_value=sniff.encoding,
+                suggested_fix=f"Consider re-saving with {sniff.encoding} encoding"
+            ))
+        
+        if sniff.mixed_lines:
+            self.report.encoding_issues_found = sniff.mixed_lines
+            shown = 10
+            more = '...' if sniff.mixed_lines > shown else ''
+            self.report.add_issue(ValidationIssue(
+                issue_type="mixed_encoding",
+                severity="warning",
+                description=f"Found {sniff.mixed_lines} lines encoded as {sniff.mixed_encoding} "
+                            f"in a {sniff.encoding} file",
+                location=f"Lines: {sniff.mixed_line_numbers[:shown]}{more}, "
+                         f"Byte offsets: {sniff.mixed_byte_offsets[:shown]}{more}",
+                current_value=sniff.mixed_encoding,
+                suggested_fix="Re-save the file with a single encoding (UTF-8)",
+                count=sniff.mixed_lines
+            ))
+        
+        return True
     
     def validate_duplicates(self) -> None:
-        """Check for duplicate rows (exact and near-duplicates)."""
+        """
+        Check for exact duplicate rows, duplicate keys and repeated content under different keys.
+        
+        All three come from one fingerprinting pass (nlk_duplicates); the
+        groups are kept in report.duplicates.
+        """
         if self.df is None:
             return
         
+        # Assume first column is a key column
+        key_column = self.df.columns[0] if len(self.df.columns) > 1 else None
+        result = find_duplicates(self.df, [key_column] if key_column is not None else [])
+        self.report.duplicates = result
+        
+        def repeated(kind: str) -> Tuple[int, np.ndarray]:
+            positions = result.repeated_rows(kind)
+            return len(positions), self.df.index[positions[:MAX_ROW_REFERENCES]].to_numpy()
+        
         # Exact duplicates
-        duplicated_mask = self.df.duplicated()
-        exact_duplicates = duplicated_mask.sum()
+        exact_duplicates, duplicate_rows = repeated('exact')
         
         if exact_duplicates > 0:
             self.report.duplicate_rows_found = exact_duplicates
-            duplicate_indices = self.df[duplicated_mask].index.tolist()
             
             self.report.add_issue(ValidationIssue(
                 issue_type="exact_duplicates",
                 severity="warning",
                 description=f"Found {exact_duplicates} exact duplicate rows",
-                location=f"Rows: {duplicate_indices[:10]}{'...' if len(duplicate_indices) > 10 else ''}",
                 current_value=exact_duplicates,
                 suggested_fix="Remove duplicate rows",
-                count=exact_duplicates
+                count=exact_duplicates,
+                rows=duplicate_rows
             ))
         
         # Near-duplicates (same key column values but different in other columns)
-        if len(self.df.columns) > 1:
-            # Assume first column is a key column
-            key_column = self.df.columns[0]
-            if not self.df[key_column].isna().all():
-                duplicate_keys = self.df[key_column].duplicated()
-                near_duplicates = duplicate_keys.sum()
-                
-                if near_duplicates > 0:
-                    duplicate_key_indices = self.df[duplicate_keys].index.tolist()
-                    self.report.add_issue(ValidationIssue(
-                        issue_type="duplicate_keys",
-                        severity="warning",
-                        description=f"Found {near_duplicates} duplicate values in key column '{key_column}'",
-                        location=f"Rows: {duplicate_key_indices[:10]}{'...' if len(duplicate_key_indices) > 10 else ''}",
-                        current_value=near_duplicates,
-                        suggested_fix=f"Review and consolidate records with duplicate {key_column} values",
-                        count=near_duplicates
-                    ))
+        if key_column is None or self.df[key_column].isna().all():
+            return
+        
+        near_duplicates, duplicate_key_rows = repeated('key')
+        
+        if near_duplicates > 0:
+            self.report.add_issue(ValidationIssue(
+                issue_type="duplicate_keys",
+                severity="warning",
+                description=f"Found {near_duplicates} duplicate values in key column '{key_column}'",
+                current_value=near_duplicates,
+                suggested_fix=f"Review and consolidate records with duplicate {key_column} values",
+                count=near_duplicates,
+                rows=duplicate_key_rows
+            ))
+        
+        # Same values in all other columns under a different key
+        same_content, same_content_rows = repeated('content')
+        
+        if same_content > 0:
+            self.report.add_issue(ValidationIssue(
+                issue_type="same_content_different_key",
+                severity="info",
+                description=f"Found {same_content} rows repeating another row's content under a different "
+                            f"'{key_column}' ({len(result.content_groups)} groups)",
+                current_value=len(result.content_groups),
+                suggested_fix=f"Check whether these {key_column} values describe the same concept",
+                count=same_content,
+                rows=same_content_rows
+            ))
     
     def validate_empty_rows_columns(self) -> None:
         """Check for completely empty rows and columns."""
@@ -190,21 +1021,19 @@ class CSVQualityValidator:
             return
         
         # Empty rows (all values are NaN)
-        empty_rows_mask = self.df.isna().all(axis=1)
-        empty_rows = empty_rows_mask.sum()
+        empty_rows, empty_row_labels = flagged_rows(self.df.index, self.df.isna().all(axis=1))
         
         if empty_rows > 0:
             self.report.empty_rows_found = empty_rows
-            empty_row_indices = self.df[empty_rows_mask].index.tolist()
             
             self.report.add_issue(ValidationIssue(
                 issue_type="empty_rows",
                 severity="warning",
                 description=f"Found {empty_rows} completely empty rows",
-                location=f"Rows: {empty_row_indices}",
                 current_value=empty_rows,
                 suggested_fix="Remove empty rows",
-                count=empty_rows
+                count=empty_rows,
+                rows=empty_row_labels
             ))
         
         # Empty columns (all values are NaN)
@@ -224,43 +1053,53 @@ class CSVQualityValidator:
                 count=len(empty_columns)
             ))
     
+    def _add_column_issues(self, check_name: str, issues: List[ValidationIssue]) -> None:
+        """Add the issues of one per-column check to the report."""
+        for issue in issues:
+            self.report.add_issue(issue)
+        if check_name == 'validate_whitespace_issues':
+            self.report.whitespace_issues_found += sum(issue.count for issue in issues)
+    
+    def check_column_whitespace(self, col: str, series: pd.Series) -> List[ValidationIssue]:
+        """Find whitespace problems in one string column."""
+        issues = []
+        
+        # Skip if column is all NaN
+        if series.isna().all():
+            return issues
+        
+        # Convert to string and check for whitespace issues
+        string_series = series.astype(str)
+        
+        for pattern_name, pattern in self.whitespace_patterns.items():
+            issue_count, problematic_rows = flagged_rows(
+                series.index, string_series.str.contains(pattern, regex=True, na=False))
+            
+            if issue_count:
+                severity = "warning" if pattern_name in ['leading_trailing', 'multiple_spaces'] else "info"
+                
+                issues.append(ValidationIssue(
+                    issue_type=f"whitespace_{pattern_name}",
+                    severity=severity,
+                    description=f"Found {issue_count} values with {pattern_name.replace('_', ' ')} in column '{col}'",
+                    current_value=issue_count,
+                    suggested_fix=f"Clean {pattern_name.replace('_', ' ')} whitespace",
+                    count=issue_count,
+                    rows=problematic_rows,
+                    column=col,
+                    rows_shown=5
+                ))
+        
+        return issues
+    
     def validate_whitespace_issues(self) -> None:
         """Check for various whitespace problems in string columns."""
         if self.df is None:
             return
         
-        whitespace_issues = 0
-        
+        self.report.whitespace_issues_found = 0
         for col in self.df.columns:
-            # Skip if column is all NaN
-            if self.df[col].isna().all():
-                continue
-            
-            # Convert to string and check for whitespace issues
-            string_series = self.df[col].astype(str)
-            
-            for pattern_name, pattern in self.whitespace_patterns.items():
-                problematic_values = string_series[
-                    string_series.str.contains(pattern, regex=True, na=False)
-                ].index.tolist()
-                
-                if problematic_values:
-                    issue_count = len(problematic_values)
-                    whitespace_issues += issue_count
-                    
-                    severity = "warning" if pattern_name in ['leading_trailing', 'multiple_spaces'] else "info"
-                    
-                    self.report.add_issue(ValidationIssue(
-                        issue_type=f"whitespace_{pattern_name}",
-                        severity=severity,
-                        description=f"Found {issue_count} values with {pattern_name.replace('_', ' ')} in column '{col}'",
-                        location=f"Column: {col}, Rows: {problematic_values[:5]}{'...' if len(problematic_values) > 5 else ''}",
-                        current_value=issue_count,
-                        suggested_fix=f"Clean {pattern_name.replace('_', ' ')} whitespace",
-                        count=issue_count
-                    ))
-        
-        self.report.whitespace_issues_found = whitespace_issues
+            self._add_column_issues('validate_whitespace_issues', self.check_column_whitespace(col, self.df[col]))
     
     def validate_column_names(self) -> None:
         """Check for issues with column names."""
@@ -290,6 +1129,7 @@ class CSVQualityValidator:
                     severity="warning",
                     description=f"Column name '{col}' appears {duplicate_count} times",
                     location=f"Column: {col}",
+                    column=col,
                     current_value=duplicate_count,
                     suggested_fix=f"Rename duplicate columns to unique names"
                 ))
@@ -301,62 +1141,116 @@ class CSVQualityValidator:
                     severity="info",
                     description=f"Column name has leading/trailing whitespace: '{col}'",
                     location=f"Column: {col}",
+                    column=col,
                     current_value=col,
                     suggested_fix=f"Trim whitespace: '{col.strip()}'"
                 ))
     
+    def check_column_data_types(self, col: str, series: pd.Series) -> List[ValidationIssue]:
+        """Infer one column's type and flag numbers or dates stored as text."""
+        issues = []
+        
+        inference, counts = infer_column_type(series)
+        self.report.column_types[col] = inference
+        if inference.sampled or inference.scanned == 0:
+            return issues
+        
+        # Check if values look like numbers but are stored as text
+        numeric_count = counts['numeric']
+        if numeric_count > inference.scanned * TYPE_ISSUE_RATIO and numeric_count > 5:
+            issues.append(ValidationIssue(
+                issue_type="potential_numeric_column",
+                severity="info",
+                description=f"Column '{col}' contains values that look like numbers but are stored as text",
+                location=f"Column: {col}",
+                column=col,
+                current_value="text",
+                suggested_fix="Convert to numeric data type",
+                count=numeric_count
+            ))
+        
+        # Check for potential date columns (the formats are mutually exclusive)
+        for date_class, date_format in DATE_FORMATS.items():
+            date_count = counts[date_class]
+            if date_count > inference.scanned * TYPE_ISSUE_RATIO and date_count > 5:
+                issues.append(ValidationIssue(
+                    issue_type="potential_date_column",
+                    severity="info",
+                    description=f"Column '{col}' contains values that look like dates ({date_format})",
+                    location=f"Column: {col}",
+                    column=col,
+                    current_value="text",
+                    suggested_fix="Convert to datetime data type",
+                    count=date_count
+                ))
+                break
+        
+        return issues
+    
     def validate_data_types(self) -> None:
         """Check for potential data type issues and inconsistencies."""
         if self.df is None:
             return
         
+        self.report.column_types = {}
         for col in self.df.columns:
-            if self.df[col].isna().all():
-                continue
-            
-            # Get non-null values
-            non_null_values = self.df[col].dropna()
-            if len(non_null_values) == 0:
-                continue
-            
-            # Check for mixed data types (numbers stored as text, etc.)
-            numeric_pattern = re.compile(r'^-?(\d{1,3}(,\d{3})*|\d+)(\.\d+)?$')
-            date_patterns = [
-                re.compile(r'^\d{4}-\d{2}-\d{2}$'),  # YYYY-MM-DD
-                re.compile(r'^\d{2}/\d{2}/\d{4}$'),  # MM/DD/YYYY
-                re.compile(r'^\d{2}\.\d{2}\.\d{4}$'), # DD.MM.YYYY
-            ]
+            self._add_column_issues('validate_data_types', self.check_column_data_types(col, self.df[col]))
+    
+    def check_column_consistency(self, col: str, series: pd.Series) -> List[ValidationIssue]:
+        """Find inconsistent capitalization and likely typos in one column."""
+        issues = []
+        
+        if series.isna().all():
+            return issues
+        
+        non_null_values = series.dropna().astype(str)
+        if len(non_null_values) == 0:
+            return issues
+        
+        # Check for inconsistent capitalization
+        unique_values = set(non_null_values)
+        lower_values = set(val.lower() for val in unique_values)
+        
+        if len(unique_values) != len(lower_values) and len(unique_values) > 1:
+            inconsistent_count = len(unique_values) - len(lower_values)
+            issues.append(ValidationIssue(
+                issue_type="inconsistent_capitalization",
+                severity="info",
+                description=f"Column '{col}' has {inconsistent_count} values with inconsistent capitalization",
+                location=f"Column: {col}",
+                column=col,
+                current_value=inconsistent_count,
+                suggested_fix="Standardize capitalization",
+                count=inconsistent_count
+            ))
+        
+        # Check for common typos or variations
+        if len(unique_values) < 50:  # Only for categorical-like columns
+            # Simple similarity check for potential typos
+            values_list = list(unique_values)
+            potential_typos = []
             
-            # Convert to string for pattern matching
-            str_values = non_null_values.astype(str)
+            for i, val1 in enumerate(values_list):
+                for val2 in values_list[i+1:]:
+                    # Simple Levenshtein-like check
+                    if abs(len(val1) - len(val2)) <= 2:
+                        common_chars = set(val1.lower()) & set(val2.lower())
+                        if len(common_chars) >= min(len(val1), len(val2)) * 0.8:
+                            potential_typos.append((val1, val2))
             
-            # Check if values look like numbers but are stored as text
-            potential_numbers = str_values[str_values.str.match(numeric_pattern, na=False)]
-            if len(potential_numbers) > len(str_values) * 0.8 and len(potential_numbers) > 5:
-                self.report.add_issue(ValidationIssue(
-                    issue_type="potential_numeric_column",
+            if potential_typos:
+                issues.append(ValidationIssue(
+                    issue_type="potential_typos",
                     severity="info",
-                    description=f"Column '{col}' contains values that look like numbers but are stored as text",
+                    description=f"Column '{col}' has potentially similar values that might be typos",
                     location=f"Column: {col}",
-                    current_value="text",
-                    suggested_fix="Convert to numeric data type",
-                    count=len(potential_numbers)
+                    column=col,
+                    current_value=potential_typos[:3],  # Show first 3 examples
+                    suggested_fix="Review and standardize similar values",
+                    count=len(potential_typos)
                 ))
-            
-            # Check for potential date columns
-            for date_pattern in date_patterns:
-                potential_dates = str_values[str_values.str.match(date_pattern, na=False)]
-                if len(potential_dates) > len(str_values) * 0.8 and len(potential_dates) > 5:
-                    self.report.add_issue(ValidationIssue(
-                        issue_type="potential_date_column",
-                        severity="info",
-                        description=f"Column '{col}' contains values that look like dates",
-                        location=f"Column: {col}",
-                        current_value="text",
-                        suggested_fix="Convert to datetime data type",
-                        count=len(potential_dates)
-                    ))
-                    break
+        
+        return issues
     
     def validate_consistency(self) -> None:
         """Check for data consistency issues."""
@@ -364,58 +1258,133 @@ class CSVQualityValidator:
             return
         
         for col in self.df.columns:
-            if self.df[col].isna().all():
+            self._add_column_issues('validate_consistency', self.check_column_consistency(col, self.df[col]))
+    
+    def validate_units(self, column: str = 'enhet') -> None:
+        """Check that all values in the unit column can be parsed for unit normalization."""
+        if self.df is None or column not in self.df.columns:
+            return
+        
+        unit_table = build_unit_table(self.df[column])
+        unparseable = unit_table[unit_table['error'].notna()]
+        
+        for _, row in unparseable.iterrows():
+            affected_count, affected_rows = flagged_rows(self.df.index, self.df[column] == row['unit'])
+            self.report.add_issue(ValidationIssue(
+                issue_type="unparseable_unit",
+                severity="warning",
+                description=f"Unit '{row['unit']}' in column '{column}' cannot be normalized: {row['error']}",
+                current_value=row['unit'],
+                suggested_fix="Use a standard unit notation (e.g. 'nmol/mmol')",
+                count=affected_count,
+                rows=affected_rows,
+                column=column
+            ))
+    
+    def _parsed_dates(self, column: str, cache: Dict[str, pd.Series]) -> pd.Series:
+        """Parse a date column once per schema validation (unparseable values become NaT)."""
+        if column not in cache:
+            cache[column] = pd.to_datetime(self.df[column], format='ISO8601', errors='coerce')
+        return cache[column]
+    
+    def _schema_rule_violations(self, rule: SchemaRule, dates: Dict[str, pd.Series]) -> pd.Series:
+        """
+        Evaluate one schema rule over whole columns.
+        
+        Args:
+            rule: Rule to evaluate
+            dates: Parsed date columns shared between rules
+            
+        Returns:
+            pd.Series: Boolean mask of violating rows
+        """
+        series = self.df[rule.column]
+        present = series.notna()
+        
+        if rule.kind == 'required':
+            return ~present | (series.fillna('').astype(str).str.strip() == '')
+        if rule.kind == 'pattern':
+            return present & ~series.fillna('').astype(str).str.fullmatch(rule.pattern)
+        if rule.kind == 'date':
+            return present & self._parsed_dates(rule.column, dates).isna()
+        if rule.kind == 'date_order':
+            return self._parsed_dates(rule.column, dates) > self._parsed_dates(rule.other, dates)
+        if rule.kind == 'reference':
+            return present & ~series.isin(self.df[rule.other].dropna())
+        if rule.kind == 'vocabulary':
+            return present & ~series.isin(rule.values)
+        raise ValueError(f"Unknown schema rule kind: {rule.kind}")
+    
+    def validate_nlk_schema(self, rules: Tuple[SchemaRule, ...] = NLK_SCHEMA_RULES) -> None:
+        """
+        Check NLK codebook rules (code formats, dates, replacements, vocabularies).
+        
+        Only runs for files with a 'kode' column. Each rule is one vectorized
+        operation over its columns.
+        
+        Args:
+            rules: Schema rules to evaluate (default: NLK_SCHEMA_RULES)
+        """
+        if self.df is None or 'kode' not in self.df.columns:
+            return
+        
+        dates: Dict[str, pd.Series] = {}
+        missing_reported = set()
+        self.report.schema_violations_found = 0
+        
+        for rule in rules:
+            # A sample lacks most reference targets; references need the full file
+            if rule.kind == 'reference' and self.report.population_rows:
                 continue
             
-            non_null_values = self.df[col].dropna().astype(str)
-            if len(non_null_values) == 0:
+            missing = [c for c in (rule.column, rule.other) if c and c not in self.df.columns]
+            if missing:
+                for col in missing:
+                    if col not in missing_reported:
+                        missing_reported.add(col)
+                        self.report.add_issue(ValidationIssue(
+                            issue_type="schema_missing_column",
+                            severity="warning",
+                            description=f"NLK column '{col}' is missing; dependent schema rules were skipped",
+                            column=col,
+                            suggested_fix=f"Add the '{col}' column"
+                        ))
                 continue
             
-            # Check for inconsistent capitalization
-            unique_values = set(non_null_values)
-            lower_values = set(val.lower() for val in unique_values)
+            mask = self._schema_rule_violations(rule, dates)
+            violation_count, violating_rows = flagged_rows(self.df.index, mask)
+            if not violation_count:
+                continue
             
-            if len(unique_values) != len(lower_values) and len(unique_values) > 1:
-                inconsistent_count = len(unique_values) - len(lower_values)
-                self.report.add_issue(ValidationIssue(
-                    issue_type="inconsistent_capitalization",
-                    severity="info",
-                    description=f"Column '{col}' has {inconsistent_count} values with inconsistent capitalization",
-                    location=f"Column: {col}",
-                    current_value=inconsistent_count,
-                    suggested_fix="Standardize capitalization",
-                    count=inconsistent_count
-                ))
+            self.report.schema_violations_found += violation_count
+            examples = self.df.loc[mask, rule.column].dropna().drop_duplicates().head(3).tolist()
+            if rule.kind == 'date_order':
+                examples = [f"{a} > {b}" for a, b in
+                            self.df.loc[mask, [rule.column, rule.other]].head(3).itertuples(index=False)]
+            example_text = f" (e.g. {', '.join(repr(e) for e in examples)})" if examples else ""
             
-            # Check for common typos or variations
-            if len(unique_values) < 50:  # Only for categorical-like columns
-                # Simple similarity check for potential typos
-                values_list = list(unique_values)
-                potential_typos = []
-                
-                for i, val1 in enumerate(values_list):
-                    for val2 in values_list[i+1:]:
-                        # Simple Levenshtein-like check
-                        if abs(len(val1) - len(val2)) <= 2:
-                            common_chars = set(val1.lower()) & set(val2.lower())
-                            if len(common_chars) >= min(len(val1), len(val2)) * 0.8:
-                                potential_typos.append((val1, val2))
-                
-                if potential_typos:
-                    self.report.add_issue(ValidationIssue(
-                        issue_type="potential_typos",
-                        severity="info",
-                        description=f"Column '{col}' has potentially similar values that might be typos",
-                        location=f"Column: {col}",
-                        current_value=potential_typos[:3],  # Show first 3 examples
-                        suggested_fix="Review and standardize similar values",
-                        count=len(potential_typos)
-                    ))
+            self.report.add_issue(ValidationIssue(
+                issue_type=f"schema_{rule.name}",
+                severity=rule.severity,
+                description=f"Schema rule '{rule.name}' failed for {violation_count} rows in column "
+                            f"'{rule.column}'{example_text}",
+                current_value=examples,
+                suggested_fix=rule.suggested_fix,
+                count=violation_count,
+                rows=violating_rows,
+                column=rule.column
+            ))
     
     def clean_data(self) -> pd.DataFrame:
         """
         Apply automatic fixes for common issues.
         
+        Every change is recorded in self.cleaning_log (row, column, before,
+        after, rule) and counted per rule in report.cleaning_changes; row is
+        the 0-based row position in the loaded data, so the log is unambiguous
+        for any index. Missing values stay missing; only string values are
+        cleaned.
+        
         Returns:
             pd.DataFrame: Cleaned dataframe
         """
@@ -423,61 +1392,208 @@ class CSVQualityValidator:
             return pd.DataFrame()
         
         cleaned_df = self.df.copy()
+        source_rows = np.arange(len(cleaned_df))  # position in self.df of each remaining row
+        log_parts: List[pd.DataFrame] = []
+        changes: Dict[str, int] = {}
+        
+        def record(rule: str, rows: Any, column: Any, before: Any, after: Any) -> None:
+            part = pd.DataFrame({'row': rows, 'column': column, 'before': before, 'after': after, 'rule': rule},
+                                columns=CLEANING_LOG_COLUMNS)
+            if len(part):
+                log_parts.append(part)
+                changes[rule] = changes.get(rule, 0) + len(part)
         
         # Remove exact duplicates
-        initial_rows = len(cleaned_df)
-        cleaned_df = cleaned_df.drop_duplicates()
-        removed_duplicates = initial_rows - len(cleaned_df)
+        duplicate_mask = cleaned_df.duplicated().to_numpy()
+        record('remove_duplicate_row', source_rows[duplicate_mask], None, None, None)
+        cleaned_df, source_rows = cleaned_df[~duplicate_mask], source_rows[~duplicate_mask]
         
         # Remove completely empty rows
-        cleaned_df = cleaned_df.dropna(how='all')
+        empty_mask = cleaned_df.isna().all(axis=1).to_numpy()
+        record('remove_empty_row', source_rows[empty_mask], None, None, None)
+        cleaned_df, source_rows = cleaned_df[~empty_mask], source_rows[~empty_mask]
         
         # Clean column names
-        cleaned_df.columns = [col.strip() for col in cleaned_df.columns]
+        stripped_names = [col.strip() for col in cleaned_df.columns]
+        renamed = [(old, new) for old, new in zip(cleaned_df.columns, stripped_names) if old != new]
+        record('strip_column_name', None, [old for old, _ in renamed], [old for old, _ in renamed],
+               [new for _, new in renamed])
+        cleaned_df.columns = stripped_names
         
-        # Clean whitespace in string columns
-        for col in cleaned_df.columns:
-            if cleaned_df[col].dtype == 'object':
-                # Remove leading/trailing whitespace
-                cleaned_df[col] = cleaned_df[col].astype(str).str.strip()
-                
-                # Replace multiple spaces with single space
-                cleaned_df[col] = cleaned_df[col].str.replace(r'\s+', ' ', regex=True)
-                
-                # Replace special whitespace characters
-                cleaned_df[col] = cleaned_df[col].str.replace(r'[\u00a0\t]', ' ', regex=True)
-                
-                # Convert back to NaN if originally NaN
-                cleaned_df[col] = cleaned_df[col].replace('nan', pd.NA)
+        # Clean whitespace in string columns, touching only the values that need it
+        for position, col in enumerate(cleaned_df.columns):
+            series = cleaned_df.iloc[:, position]
+            if not pd.api.types.is_string_dtype(series.dtype):
+                continue
+            
+            # Scan each distinct value once; most columns repeat their values
+            values = series.dropna().astype(str)
+            distinct = pd.Series(values.unique(), dtype=str)
+            dirty = distinct[distinct.str.contains(NEEDS_WHITESPACE_CLEANING)]
+            if len(dirty) == 0:
+                continue
+            positions = np.flatnonzero(series.isin(dirty).to_numpy())
+            before = series.iloc[positions].astype(str)
+            
+            # Remove leading/trailing whitespace, then turn runs of whitespace
+            # (including tabs, newlines and non-breaking spaces) into one space
+            stripped = before.str.strip()
+            after = stripped.str.replace(r'\s+', ' ', regex=True)
+            
+            # Rules that applied to each changed value, e.g. 'strip_whitespace+collapse_whitespace'
+            rule_masks = {
+                'strip_whitespace': (stripped != before).to_numpy(),
+                'collapse_whitespace': stripped.str.contains(r'\s\s', regex=True).to_numpy(),
+                'replace_special_whitespace': stripped.str.contains(r'[^\S ]', regex=True).to_numpy(),
+            }
+            rules = np.full(len(before), '', dtype=object)
+            for rule, mask in rule_masks.items():
+                rules[mask] = np.where(rules[mask] == '', rule, rules[mask] + '+' + rule)
+                if mask.any():
+                    changes[rule] = changes.get(rule, 0) + int(mask.sum())
+            
+            log_parts.append(pd.DataFrame({'row': source_rows[positions], 'column': col,
+                                           'before': before.to_numpy(), 'after': after.to_numpy(),
+                                           'rule': rules},
+                                          columns=CLEANING_LOG_COLUMNS))
+            cleaned_df.iloc[positions, position] = after.to_numpy()
         
+        self.cleaning_log = (pd.concat(log_parts, ignore_index=True) if log_parts
+                             else pd.DataFrame(columns=CLEANING_LOG_COLUMNS))
+        self.report.cleaning_changes = changes
         self.report.cleaned_rows = len(cleaned_df)
         return cleaned_df
     
-    def run_full_validation(self) -> ValidationReport:
+    def write_cleaning_log(self, output_file: str) -> Optional[Path]:
+        """
+        Write the change log of the last clean_data call.
+        
+        Args:
+            output_file: .parquet (needs pyarrow) or .csv path
+            
+        Returns:
+            Path: File written (the CSV fallback if Parquet is unavailable), or None before clean_data
+        """
+        if self.cleaning_log is None:
+            return None
+        
+        output_path = Path(output_file)
+        if output_path.suffix == '.parquet':
+            try:
+                self.cleaning_log.astype({'before': str, 'after': str}).to_parquet(
+                    output_path, index=False, engine='pyarrow')
+                return output_path
+            except ImportError:
+                print("⚠️  Parquet support not available (install pyarrow); writing CSV instead")
+                output_path = output_path.with_suffix('.csv')
+        
+        self.cleaning_log.to_csv(output_path, index=False, encoding='utf-8')
+        return output_path
+    
+    def run_full_validation(self, workers: int = 1) -> ValidationReport:
         """
         Run complete validation process.
         
+        Args:
+            workers: Worker processes for the per-column checks (1 = sequential).
+                The report is identical for any number of workers.
+        
         Returns:
             ValidationReport: Complete validation report
         """
-        print(f"Loading CSV file: {self.csv_file_path}")
-        
-        if not self.load_csv():
-            return self.report
+        if self.df is None:
+            print(f"Loading CSV file: {self.csv_file_path}")
+            
+            with span('load_csv') as load_span:
+                loaded = self.load_csv()
+                load_span['rows'] = self.report.total_rows
+            if not loaded:
+                return self.report
         
         print(f"Loaded {self.report.total_rows:,} rows and {self.report.total_columns} columns")
         print("Running validation checks...")
         
         # Run all validation checks
-        self.validate_duplicates()
-        self.validate_empty_rows_columns()
-        self.validate_whitespace_issues()
-        self.validate_column_names()
-        self.validate_data_types()
-        self.validate_consistency()
+        checks = [
+            self.validate_duplicates,
+            self.validate_empty_rows_columns,
+            self.validate_whitespace_issues,
+            self.validate_column_names,
+            self.validate_data_types,
+            self.validate_consistency,
+            self.validate_units,
+            self.validate_nlk_schema,
+        ]
+        if workers > 1 and len(self.df.columns) > 0:
+            self._run_checks_parallel(checks, workers)
+            return self.report
+        
+        for check in checks:
+            with span(check.__name__, rows=self.report.total_rows):
+                check()
         
         return self.report
     
+    def _run_checks_parallel(self, checks: List[Any], workers: int) -> None:
+        """
+        Run the per-column checks as (check, column) tasks in a process pool.
+        
+        Columns are placed in shared memory once. Frame-level checks run in
+        this process meanwhile, and all issues are merged in the sequential
+        order (check order, then column order).
+        
+        Args:
+            checks: Bound validate_* methods in report order
+            workers: Number of worker processes
+        """
+        blocks = []
+        try:
+            with span('share_columns', rows=self.report.total_rows):
+                specs = []
+                for col in self.df.columns:
+                    shm, spec = share_column(self.df[col])
+                    blocks.append(shm)
+                    specs.append(spec)
+            
+            tasks = [(name, i) for name in COLUMN_CHECKS for i in range(len(specs))]
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_column_worker,
+                                     initargs=(specs,)) as executor:
+                futures = {task: executor.submit(_run_column_check, COLUMN_CHECKS[task[0]], task[1])
+                           for task in tasks}
+                
+                # Frame-level checks, each collected separately for the merge
+                issues_by_check = {}
+                all_issues = self.report.issues
+                for check in checks:
+                    if check.__name__ not in COLUMN_CHECKS:
+                        self.report.issues = []
+                        with span(check.__name__, rows=self.report.total_rows):
+                            check()
+                        issues_by_check[check.__name__] = self.report.issues
+                self.report.issues = all_issues
+                
+                with span('column_checks', rows=self.report.total_rows, workers=workers, tasks=len(tasks)):
+                    self.report.whitespace_issues_found = 0
+                    self.report.column_types = {}
+                    for check in checks:
+                        name = check.__name__
+                        if name not in COLUMN_CHECKS:
+                            self.report.issues.extend(issues_by_check[name])
+                            continue
+                        for i in range(len(specs)):
+                            issues, inference = futures[(name, i)].result()
+                            if inference is not None:
+                                self.report.column_types[inference.column] = inference
+                            for issue in issues:
+                                # Workers see a RangeIndex; map positions back to row labels
+                                if issue.rows is not None:
+                                    issue.rows = self.df.index[issue.rows].to_numpy()
+                            self._add_column_issues(name, issues)
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+    
     def generate_report(self, output_file: Optional[str] = None) -> str:
         """
         Generate a detailed validation report.
@@ -501,6 +1617,8 @@ class CSVQualityValidator:
         report_lines.append("OVERVIEW")
         report_lines.append("-" * 40)
         report_lines.append(f"Total Rows: {self.report.total_rows:,}")
+        if self.report.population_rows:
+            report_lines.append(f"Sampled From: {self.report.population_rows:,} rows")
         report_lines.append(f"Total Columns: {self.report.total_columns}")
         report_lines.append(f"Total Issues Found: {len(self.report.issues)}")
         report_lines.append("")
@@ -527,6 +1645,37 @@ class CSVQualityValidator:
                         report_lines.append(f"  Suggested Fix: {issue.suggested_fix}")
                     report_lines.append("")
         
+        # Inferred column types
+        if self.report.column_types:
+            report_lines.append("COLUMN TYPES")
+            report_lines.append("-" * 40)
+            for col, inference in self.report.column_types.items():
+                type_name = inference.inferred_type
+                if inference.date_format:
+                    type_name += f" ({inference.date_format})"
+                details = f"{inference.conformance:.1%} conformant" if inference.non_null else "no values"
+                if inference.sampled:
+                    details += f", estimated from {inference.scanned:,} of {inference.non_null:,} values"
+                report_lines.append(f"{col}: {type_name} - {details}")
+            report_lines.append("")
+        
+        # File-wide estimates for sampled runs
+        if self.report.population_rows:
+            report_lines.append(f"SAMPLE ESTIMATES ({self.report.total_rows:,} of "
+                                f"{self.report.population_rows:,} rows, 95% confidence)")
+            report_lines.append("-" * 40)
+            for estimate in self.sample_estimates():
+                if 'rate' in estimate:
+                    report_lines.append(
+                        f"{estimate['issue']}: {estimate['rate']:.2%} of rows "
+                        f"[{estimate['rate_low']:.2%}, {estimate['rate_high']:.2%}], "
+                        f"~{estimate['estimated_rows']:,} rows in file")
+                else:
+                    report_lines.append(f"{estimate['issue']}: {estimate['sample_count']} in sample (no row rate)")
+            report_lines.append("Duplicates are only compared within the sample and are underestimated; "
+                                "reference rules need the full file and were skipped.")
+            report_lines.append("")
+        
         # Recommendations
         report_lines.append("RECOMMENDATIONS")
         report_lines.append("-" * 40)
@@ -554,6 +1703,7 @@ class CSVQualityValidator:
         return report_content
 
 
+@profiled_main
 def main():
     """Main function for command-line usage."""
     parser = argparse.ArgumentParser(
@@ -563,41 +1713,78 @@ def main():
     parser.add_argument("--encoding", default="utf-8", help="File encoding (default: utf-8)")
     parser.add_argument("--clean", action="store_true", help="Generate cleaned CSV file")
     parser.add_argument("--output-dir", help="Directory for output files (default: same as input)")
+    parser.add_argument("--cleaning-log",
+                        help="Change log written with --clean, .csv or .parquet "
+                             "(default: <input>_cleaning_log.csv in the output directory)")
     parser.add_argument("--report-file", help="Save validation report to file")
     parser.add_argument("--quiet", action="store_true", help="Suppress progress messages")
+    parser.add_argument("--sample", type=int, nargs="?", const=DEFAULT_SAMPLE_SIZE, metavar="ROWS",
+                        help=f"Validate a random sample of rows (default: {DEFAULT_SAMPLE_SIZE:,}) "
+                             "and estimate issue rates for the whole file")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --sample (default: 0)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for the per-column checks (default: 1)")
     
     args = parser.parse_args()
+    if args.sample is not None and args.sample < 1:
+        parser.error("--sample needs at least 1 row")
+    if args.sample is not None and args.clean:
+        parser.error("--clean needs the full file and cannot be combined with --sample")
     
     # Initialize validator
-    validator = CSVQualityValidator(args.input_file, args.encoding)
-    
-    # Run validation
-    if not args.quiet:
-        print("Starting CSV quality validation...")
+    if args.sample is not None:
+        if not args.quiet:
+            print(f"Sampling {args.sample:,} rows from: {args.input_file}")
+        with span('reservoir_sample') as sample_span:
+            validator = CSVQualityValidator.from_csv_sample(args.input_file, args.sample, args.encoding, args.seed)
+            sample_span['rows'] = validator.report.population_rows or validator.report.total_rows
+    else:
+        validator = CSVQualityValidator(args.input_file, args.encoding)
     
-    report = validator.run_full_validation()
+    if args.sample is not None and validator.df is None:
+        # The sample could not be read; report the loading error only
+        report = validator.report
+    else:
+        # Run validation
+        if not args.quiet:
+            print("Starting CSV quality validation...")
+        
+        with span('run_full_validation'):
+            report = validator.run_full_validation(workers=args.workers)
     
     # Generate and display report
     output_dir = Path(args.output_dir) if args.output_dir else Path(args.input_file).parent
     report_file = args.report_file or str(output_dir / f"{Path(args.input_file).stem}_quality_report.txt")
     
-    report_content = validator.generate_report(report_file)
+    with span('generate_report'):
+        report_content = validator.generate_report(report_file)
     
     if not args.quiet:
         print("\n" + report_content)
     
     # Clean data if requested
     if args.clean:
-        cleaned_df = validator.clean_data()
+        with span('clean_data', rows=report.total_rows):
+            cleaned_df = validator.clean_data()
         output_file = output_dir / f"{Path(args.input_file).stem}_cleaned.csv"
         
-        cleaned_df.to_csv(output_file, index=False, encoding='utf-8')
+        with span('write_cleaned_csv', rows=len(cleaned_df)):
+            cleaned_df.to_csv(output_file, index=False, encoding='utf-8')
         
         if not args.quiet:
             print(f"\nCleaned CSV saved to: {output_file}")
             print(f"Original rows: {report.total_rows:,}")
             print(f"Cleaned rows: {len(cleaned_df):,}")
             print(f"Rows removed: {report.total_rows - len(cleaned_df):,}")
+        
+        log_file = args.cleaning_log or output_dir / f"{Path(args.input_file).stem}_cleaning_log.csv"
+        with span('write_cleaning_log', rows=len(validator.cleaning_log)):
+            log_file = validator.write_cleaning_log(str(log_file))
+        
+        if not args.quiet:
+            print(f"Cleaning log saved to: {log_file} ({len(validator.cleaning_log):,} changes)")
+            for rule, count in sorted(report.cleaning_changes.items()):
+                print(f"  {rule}: {count:,}")
     
     # Exit with appropriate code
     critical_issues = len(report.get_issues_by_severity('critical'))
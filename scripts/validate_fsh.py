@@ -16,8 +16,14 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Set, Tuple, Optional
 from collections import defaultdict, Counter
+import os
 import sys
 
+# Add scripts directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from nlk_profiling import profiled_main, span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -347,24 +353,34 @@ class FSHValidator:
         """Run complete validation."""
         logger.info("🔍 Starting FSH CodeSystem validation...")
         
-        if not self.load_file():
+        with span('load_file') as load_span:
+            loaded = self.load_file()
+            load_span['rows'] = len(self.lines)
+        if not loaded:
             return False
         
         # Run validation steps
-        valid_header = self.validate_codesystem_header()
-        valid_properties = self.validate_property_definitions()
-        valid_concepts = self.validate_concepts()
-        valid_syntax = self.validate_syntax()
-        valid_consistency = self.validate_consistency()
+        steps = [
+            self.validate_codesystem_header,
+            self.validate_property_definitions,
+            self.validate_concepts,
+            self.validate_syntax,
+            self.validate_consistency,
+        ]
+        results = []
+        for step in steps:
+            with span(step.__name__, rows=len(self.lines)):
+                results.append(step())
         
         # Generate statistics
-        stats = self.generate_statistics()
+        with span('generate_statistics'):
+            stats = self.generate_statistics()
         
         # Print results
         self.print_results(stats)
         
         # Return overall validation result
-        return all([valid_header, valid_properties, valid_concepts, valid_syntax, valid_consistency])
+        return all(results)
     
     def print_results(self, stats: Dict):
         """Print validation results."""
@@ -415,6 +431,7 @@ class FSHValidator:
             print(f"⚠️  {len(self.warnings)} warnings found (review recommended)")
 
 
+@profiled_main
 def main():
     """Main validation function."""
     